@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "alert_rules.json"
+)
+RULE_TYPES = ("threshold", "rate")
+OPS = {">": 1.0, "<": -1.0}
+
+
+class AlertEvent(NamedTuple):
+    asset_id: str
+    rule_id: str
+    state: str  # "raised" | "cleared"
+    message: str
+    ts: float
+
+
+def load_rules(path: str = DEFAULT_RULES_PATH) -> List[Dict[str, Any]]:
+    with open(path) as fh:
+        return json.load(fh)
+
+
+class AlertRuleEngine:
+    """Declarative, stateful alert rules evaluated for all assets per tick.
+
+    Rule fields: ``id``, ``kpi``, ``op`` (``>`` or ``<``), ``threshold``,
+    and optionally ``type`` (``threshold``, or ``rate`` for change per
+    minute), ``duration_s`` (condition must hold this long before raising),
+    ``clear_threshold`` (hysteresis: stays active until this is crossed
+    back), ``cooldown_s`` (minimum time between two raises) and ``message``.
+
+    Rules are compiled into per-rule arrays and state is kept as
+    (assets x rules) arrays, so a tick is a handful of NumPy operations
+    regardless of how many rules or assets there are. Only state
+    transitions produce events, which deduplicates repeated alerts. A
+    missing (NaN) value changes nothing: it neither raises, clears nor
+    restarts a duration, and rates are taken against the last known value.
+    """
+
+    def __init__(self, rules: Sequence[Dict[str, Any]]):
+        self._lock = threading.Lock()
+        self.rules = list(rules)
+        for rule in self.rules:
+            if rule.get("type", "threshold") not in RULE_TYPES:
+                raise ValueError(
+                    f"Rule {rule.get('id')!r}: "
+                    f"unknown type {rule.get('type')!r}"
+                )
+            if rule.get("op") not in OPS:
+                raise ValueError(
+                    f"Rule {rule.get('id')!r}: op must be one of {sorted(OPS)}"
+                )
+        self.rule_ids = [r["id"] for r in self.rules]
+        self.messages = [
+            r.get(
+                "message", f"{r['id']}: {r['kpi']} {r['op']} {r['threshold']}"
+            )
+            for r in self.rules
+        ]
+        self.kpis = sorted({r["kpi"] for r in self.rules})
+        kpi_index = {k: i for i, k in enumerate(self.kpis)}
+        # Compile to per-rule arrays. Rules are evaluated in (type, kpi) order
+        # so the per-tick gathers are contiguous; "<" rules are flipped to ">"
+        # by negating both the value and the thresholds.
+        is_rate = np.array(
+            [r.get("type", "threshold") == "rate" for r in self.rules],
+            dtype=bool,
+        )
+        kpi = np.array(
+            [kpi_index[r["kpi"]] for r in self.rules], dtype=np.intp
+        )
+        self._order = np.lexsort((kpi, is_rate))
+        rules = [self.rules[i] for i in self._order]
+        self._n_level = int((~is_rate).sum())
+        self._kpi = kpi[self._order]
+        self._sign = np.array([OPS[r["op"]] for r in rules])
+        self._on = self._sign * np.array(
+            [float(r["threshold"]) for r in rules]
+        )
+        self._off = self._sign * np.array(
+            [float(r.get("clear_threshold", r["threshold"])) for r in rules]
+        )
+        self._duration = np.array(
+            [float(r.get("duration_s", 0)) for r in rules]
+        )
+        self._cooldown = np.array(
+            [float(r.get("cooldown_s", 0)) for r in rules]
+        )
+        self.assets: List[str] = []
+        self._asset_index: Dict[str, int] = {}
+        n_rules = len(self.rules)
+        # (assets x rules) state, in compiled rule order
+        self._beyond = np.empty((0, n_rules), dtype=bool)
+        self._active = np.empty((0, n_rules), dtype=bool)
+        self._since = np.empty((0, n_rules))
+        self._last_raised = np.empty((0, n_rules))
+        # Last known value of each KPI and when it was seen, per asset
+        self._prev_values = np.empty((0, len(self.kpis)))
+        self._prev_ts = np.empty((0, len(self.kpis)))
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_RULES_PATH) -> "AlertRuleEngine":
+        return cls(load_rules(path))
+
+    def _asset_rows(self, asset_ids: Sequence[str]):
+        new = [
+            a for a in dict.fromkeys(asset_ids) if a not in self._asset_index
+        ]
+        if new:
+            for a in new:
+                self._asset_index[a] = len(self.assets)
+                self.assets.append(a)
+            n, r, k = len(new), len(self.rules), len(self.kpis)
+            self._beyond = np.vstack(
+                [self._beyond, np.zeros((n, r), dtype=bool)]
+            )
+            self._active = np.vstack(
+                [self._active, np.zeros((n, r), dtype=bool)]
+            )
+            self._since = np.vstack([self._since, np.full((n, r), np.nan)])
+            self._last_raised = np.vstack(
+                [self._last_raised, np.full((n, r), -np.inf)]
+            )
+            self._prev_values = np.vstack(
+                [self._prev_values, np.full((n, k), np.nan)]
+            )
+            self._prev_ts = np.vstack([self._prev_ts, np.full((n, k), np.nan)])
+        rows = np.fromiter(
+            (self._asset_index[a] for a in asset_ids),
+            dtype=np.intp,
+            count=len(asset_ids),
+        )
+        # Whole-plant ticks in registration order work on the state in place
+        if (
+            len(rows) == len(self.assets)
+            and (rows == np.arange(len(rows))).all()
+        ):
+            return slice(None)
+        return rows
+
+    def evaluate(
+        self, asset_ids: Sequence[str], values: np.ndarray, ts=None
+    ) -> List[AlertEvent]:
+        """Advance state for one tick.
+
+        ``values`` is an (assets x len(self.kpis)) array in ``self.kpis``
+        column order (NaN = missing); ``ts`` is a scalar or per-asset array
+        of unix timestamps. Returns the raised/cleared transitions.
+        """
+        with self._lock:
+            rows = self._asset_rows(asset_ids)
+            values = np.asarray(values, dtype=float)
+            ts = np.broadcast_to(
+                np.asarray(time.time() if ts is None else ts, dtype=float),
+                (len(asset_ids),),
+            )
+            prev_values, prev_ts = self._prev_values[rows], self._prev_ts[rows]
+            dt_min = (ts[:, None] - prev_ts) / 60.0
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rates = (values - prev_values) / dt_min
+            rates[~(dt_min > 0)] = np.nan
+            seen = ~np.isnan(values)
+            self._prev_values[rows] = np.where(seen, values, prev_values)
+            self._prev_ts[rows] = np.where(seen, ts[:, None], prev_ts)
+            # Checked on the (assets x KPIs) inputs
+            # first; the per-rule mask is rarely needed
+            partial = not seen.all() or np.isnan(rates).any()
+
+            n = self._n_level
+            x = np.empty((len(asset_ids), len(self.rules)))
+            np.take(values, self._kpi[:n], axis=1, out=x[:, :n])
+            np.take(rates, self._kpi[n:], axis=1, out=x[:, n:])
+            x *= self._sign
+            with np.errstate(invalid="ignore"):
+                beyond_on = x > self._on
+                beyond_off = x > self._off
+            was_beyond = self._beyond[rows]
+            active = self._active[rows]
+            missing = np.isnan(x) if partial else None
+            if missing is not None:
+                # Missing values keep the previous
+                # state: no raise, no clear, no restart
+                beyond_on[missing] = was_beyond[missing]
+                beyond_off[missing] = True
+
+            # Dense work is limited to the comparisons above; durations and
+            # cooldowns are only checked where a rule could actually raise.
+            started = np.nonzero(beyond_on & ~was_beyond)
+            since = (
+                self._since if isinstance(rows, slice) else self._since[rows]
+            )
+            since[started] = ts[started[0]]
+            raisable = beyond_on & ~active
+            if missing is not None:
+                raisable &= ~missing
+            cand = np.nonzero(raisable)
+            last = (
+                self._last_raised
+                if isinstance(rows, slice)
+                else self._last_raised[rows]
+            )
+            now = ts[cand[0]]
+            ok = ((now - since[cand] >= self._duration[cand[1]])
+                  & (now - last[cand] >= self._cooldown[cand[1]]))
+            raised = (cand[0][ok], cand[1][ok])
+            last[raised] = now[ok]
+            cleared = np.nonzero(active & ~beyond_off)
+            active[raised] = True
+            active[cleared] = False
+
+            if not isinstance(rows, slice):
+                self._since[rows] = since
+                self._last_raised[rows] = last
+            self._beyond[rows] = beyond_on
+            self._active[rows] = active
+
+        events = []
+        for state, (a_idx, r_idx) in (
+            ("raised", raised),
+            ("cleared", cleared),
+        ):
+            for a, r in zip(a_idx.tolist(), self._order[r_idx].tolist()):
+                events.append(
+                    AlertEvent(
+                        asset_ids[a],
+                        self.rule_ids[r],
+                        state,
+                        self.messages[r],
+                        float(ts[a]),
+                    )
+                )
+        return events
+
+    def evaluate_records(
+        self, kpis_by_asset: Dict[str, Dict[str, Any]], ts=None
+    ) -> List[AlertEvent]:
+        assets = list(kpis_by_asset)
+        values = np.array(
+            [
+                [_float(kpis_by_asset[a].get(k)) for k in self.kpis]
+                for a in assets
+            ],
+            dtype=float,
+        )
+        return self.evaluate(
+            assets, values.reshape(len(assets), len(self.kpis)), ts
+        )
+
+    def evaluate_frame(self, kpis) -> List[AlertEvent]:
+        """Evaluate a KPI frame with ``asset_id`` and ``ts``, in time order."""
+        events = []
+        frame = kpis.reindex(columns=["asset_id", "ts", *self.kpis])
+        # Readings of different assets in the same batch are evaluated
+        # together; repeated readings of one asset become successive ticks.
+        tick = frame.groupby("asset_id", sort=False).cumcount().to_numpy()
+        for t in range(int(tick.max()) + 1 if len(tick) else 0):
+            part = frame[tick == t]
+            events.extend(
+                self.evaluate(
+                    part["asset_id"].tolist(),
+                    part[self.kpis].to_numpy(dtype=float),
+                    part["ts"].to_numpy(dtype=float),
+                )
+            )
+        return events
+
+    def active_messages(self, asset_id: str) -> List[str]:
+        with self._lock:
+            row = self._asset_index.get(asset_id)
+            if row is None:
+                return []
+            return [
+                self.messages[r]
+                for r in sorted(self._order[np.flatnonzero(self._active[row])])
+            ]
+
+    def active(self) -> Dict[str, List[str]]:
+        with self._lock:
+            return {
+                a: [
+                    self.rule_ids[r]
+                    for r in sorted(
+                        self._order[np.flatnonzero(self._active[i])]
+                    )
+                ]
+                for i, a in enumerate(self.assets)
+                if self._active[i].any()
+            }
+
+
+def _float(value: Optional[Any]) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
@@ -0,0 +1,392 @@
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models import FLUE_PREFIX
+
+# Furnace, flue gas, cooling and die signals scored jointly
+SIGNALS = (
+    "furnace_temp",
+    "gas_consumption",
+    "flue_gas_temp",
+    FLUE_PREFIX + "O2",
+    FLUE_PREFIX + "CO2",
+    FLUE_PREFIX + "NOx",
+    "cooling_water_in",
+    "cooling_water_out",
+    "water_discharge_temp",
+    "die_temp",
+)
+# Mean absolute deviation -> standard deviation for normal data
+MAD_TO_STD = 1.2533
+
+
+class AnomalyDetector:
+    """Streaming multivariate anomaly score per asset.
+
+    Each signal is standardized with a robust running location and scale
+    (Huber-type updates: a deviation moves them by at most ``clip`` scales,
+    so an outlier barely shifts the baseline). The clipped z-scores then go
+    through an online PCA (Sanger's rule, ``components`` directions): the
+    score adds the standardized energy in the principal directions
+    (Hotelling T²) and in the residual (Q, what breaks the usual relations
+    between signals, e.g. CO2 moving without O2). For normal data it is
+    about chi-square with one degree of freedom per signal. It splits
+    exactly into per-signal contributions, which name the signals behind
+    a high score.
+
+    Every update is O(signals x components) per asset, done for a batch of
+    assets at once. An asset is scored against its own history only; the
+    first ``warmup`` readings set the baseline, the next ``warmup`` train
+    the PCA, and only then can a reading be flagged (score above
+    ``threshold``). ``alpha`` is the forgetting rate per reading.
+    """
+
+    def __init__(
+        self,
+        signals: Sequence[str] = SIGNALS,
+        components: int = 3,
+        alpha: float = 0.01,
+        warmup: int = 100,
+        threshold: float = 50.0,
+        clip: float = 6.0,
+        capacity: int = 1024,
+    ):
+        self.signals = tuple(signals)
+        self.components = components
+        self.alpha = alpha
+        self.warmup = warmup
+        self.threshold = threshold
+        self.clip = clip
+        self._lock = threading.Lock()
+        self.assets: List[str] = []
+        self._index: Dict[str, int] = {}
+        f, k = len(self.signals), components
+        self._center = np.zeros((capacity, f))
+        self._scale = np.zeros((capacity, f))
+        self._seen = np.zeros((capacity, f), dtype=np.int64)
+        self._W = np.zeros((capacity, f, k))
+        self._lam = np.ones((capacity, k))
+        self._res = np.ones(capacity)
+        self._updates = np.zeros(capacity, dtype=np.int64)
+        self._flagged = np.zeros(capacity, dtype=bool)
+        self._raised = np.zeros(capacity, dtype=np.int64)
+        self._ts = np.full(capacity, np.nan)
+        self._score = np.full(capacity, np.nan)
+        self._x = np.full((capacity, f), np.nan)
+        self._z = np.zeros((capacity, f))
+        self._contrib = np.zeros((capacity, f))
+
+    def __len__(self) -> int:
+        return len(self.assets)
+
+    def __contains__(self, asset_id: str) -> bool:
+        return asset_id in self._index
+
+    def _rows(self, asset_ids: Sequence[str]) -> np.ndarray:
+        new = [a for a in dict.fromkeys(asset_ids) if a not in self._index]
+        if new:
+            needed = len(self.assets) + len(new)
+            if needed > len(self._center):
+                # Grow geometrically so registration stays amortized O(1)
+                size = max(needed, 2 * len(self._center))
+                for name in (
+                    "_center",
+                    "_scale",
+                    "_seen",
+                    "_W",
+                    "_lam",
+                    "_res",
+                    "_updates",
+                    "_flagged",
+                    "_raised",
+                    "_ts",
+                    "_score",
+                    "_x",
+                    "_z",
+                    "_contrib",
+                ):
+                    old = getattr(self, name)
+                    grown = np.zeros((size,) + old.shape[1:], dtype=old.dtype)
+                    grown[:len(old)] = old
+                    setattr(self, name, grown)
+            for a in new:
+                row = self._index[a] = len(self.assets)
+                self.assets.append(a)
+                # Start from the coordinate axes; Sanger's rule rotates them
+                # onto the principal directions
+                self._W[row] = np.eye(len(self.signals), self.components)
+                self._lam[row] = 1.0
+                self._res[row] = 1.0
+                self._ts[row] = self._score[row] = np.nan
+                self._x[row] = np.nan
+        return np.fromiter(
+            (self._index[a] for a in asset_ids),
+            dtype=np.intp,
+            count=len(asset_ids),
+        )
+
+    def update(
+        self, asset_ids: Sequence[str], values, ts=None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Score, then learn from, one reading each of distinct assets.
+
+        ``values`` has one column per signal (NaN = not measured). Returns
+        the scores, which readings raised a flag (the asset was not flagged
+        on its previous reading) and the per-signal contributions.
+        """
+        x = np.asarray(values, dtype=float).reshape(
+            len(asset_ids), len(self.signals)
+        )
+        ts = (
+            np.full(len(x), np.nan)
+            if ts is None
+            else np.asarray(ts, dtype=float)
+        )
+        f, k, a = len(self.signals), self.components, self.alpha
+        with self._lock:
+            rows = self._rows(asset_ids)
+            center, scale, seen = (
+                self._center[rows],
+                self._scale[rows],
+                self._seen[rows],
+            )
+            W, lam, res = self._W[rows], self._lam[rows], self._res[rows]
+            updates = self._updates[rows]
+            observed = ~np.isnan(x)
+
+            # Score against the state before this reading
+            sigma = MAD_TO_STD * scale
+            d = np.where(observed, x - center, 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z = np.where(observed & (sigma > 0), d / sigma, 0.0)
+            zc = np.clip(z, -self.clip, self.clip)
+            y = np.einsum("nfk,nf->nk", W, zc)
+            r = zc - np.einsum("nfk,nk->nf", W, y)
+            # score = y.Λ⁻¹.y + |r|² / res, split across
+            # signals (W has orthonormal columns)
+            contrib = (
+                zc * np.einsum("nfk,nk->nf", W, y / lam)
+                + zc * r / res[:, None]
+            )
+            score = contrib.sum(axis=1)
+            flagged = (updates >= 2 * self.warmup) & (score > self.threshold)
+            raised = flagged & ~self._flagged[rows]
+
+            # Flagged readings are learned from in proportion to threshold /
+            # score, so a fault is not absorbed into the baseline within
+            # seconds but a lasting change still is
+            a = (
+                a
+                * np.minimum(
+                    1.0,
+                    self.threshold / np.where(flagged, score, self.threshold),
+                )[:, None]
+            )
+
+            # Robust location and scale: running means
+            # during warmup, then clipped EW updates
+            seen = seen + observed
+            rate = np.where(seen < self.warmup, 1.0 / np.maximum(seen, 1), a)
+            robust = seen > self.warmup
+            limit = self.clip * sigma
+            step = np.where(robust, np.clip(d, -limit, limit), d)
+            dev = np.where(robust, np.minimum(np.abs(d), limit), np.abs(d))
+            dev = np.where(seen == 1, 0.0, dev)
+            center = center + np.where(observed, rate * step, 0.0)
+            scale = scale + np.where(observed, rate * (dev - scale), 0.0)
+
+            # Online PCA once the standardization has settled
+            learn = (updates >= self.warmup)[:, None]
+            yy = np.tril(y[:, :, None] * y[:, None, :])
+            dW = zc[:, :, None] * y[:, None, :] - np.einsum(
+                "nfj,njk->nfk", W, yy
+            )
+            # Normalized step (η / (1 + η|z|²)) keeps
+            # Sanger's rule stable on large, clipped z-scores
+            gain = a * learn / (1.0 + a * (zc * zc).sum(axis=1, keepdims=True))
+            W = W + gain[:, :, None] * dW
+            lam = np.maximum(lam + a * learn * (y * y - lam), 1e-3)
+            res = np.maximum(
+                res
+                + (a * learn)[:, 0] * ((r * r).sum(axis=1) / (f - k) - res),
+                1e-3,
+            )
+
+            self._center[rows], self._scale[rows], self._seen[rows] = (
+                center,
+                scale,
+                seen,
+            )
+            self._W[rows], self._lam[rows], self._res[rows] = W, lam, res
+            self._updates[rows] = updates + 1
+            self._flagged[rows] = flagged
+            self._raised[rows] += raised
+            self._ts[rows], self._score[rows] = ts, score
+            self._x[rows], self._z[rows], self._contrib[rows] = x, z, contrib
+        return score, raised, contrib
+
+    def update_frame(
+        self, readings: pd.DataFrame, key: str = "asset_id", top: int = 3
+    ) -> pd.DataFrame:
+        """Update from a readings frame in ts order.
+
+        Returns the readings that raised a flag: ``key``, ``ts``, ``score``
+        and ``signals``, the ``top`` contributing signals.
+        """
+        raised_rows = []
+        if not len(readings):
+            return self._events(raised_rows, top)
+        frame = (
+            readings.sort_values("ts", kind="stable")
+            if "ts" in readings.columns
+            else readings
+        )
+        ids = frame[key].to_numpy()
+        ts = (
+            frame["ts"].to_numpy(dtype=float)
+            if "ts" in frame.columns
+            else np.full(len(frame), np.nan)
+        )
+        x = signal_matrix(frame, self.signals)
+        tick = frame.groupby(key, sort=False).cumcount().to_numpy()
+        for t in range(int(tick.max()) + 1):
+            sel = np.flatnonzero(tick == t)
+            score, raised, contrib = self.update(
+                ids[sel].tolist(), x[sel], ts[sel]
+            )
+            raised_rows += [
+                (ids[sel[i]], ts[sel[i]], score[i], contrib[i])
+                for i in np.flatnonzero(raised)
+            ]
+        return self._events(raised_rows, top, key)
+
+    def update_one(
+        self,
+        asset_id: str,
+        reading: Mapping[str, Any],
+        ts: Optional[float] = None,
+        top: int = 3,
+    ) -> Optional[Dict[str, Any]]:
+        """Update from one reading dict; the event if it raised a flag."""
+        flue = reading.get("flue_gas_comp") or {}
+        values = [
+            (
+                flue.get(s[len(FLUE_PREFIX):])
+                if s.startswith(FLUE_PREFIX)
+                else reading.get(s)
+            )
+            for s in self.signals
+        ]
+        x = [np.nan if v is None else v for v in values]
+        score, raised, contrib = self.update(
+            [asset_id], [x], [np.nan if ts is None else ts]
+        )
+        if not raised[0]:
+            return None
+        return self._events(
+            [(asset_id, ts, score[0], contrib[0])], top
+        ).to_dict("records")[0]
+
+    def _events(
+        self, rows: List[tuple], top: int, key: str = "asset_id"
+    ) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                key: [r[0] for r in rows],
+                "ts": [r[1] for r in rows],
+                "score": [float(r[2]) for r in rows],
+                "signals": [
+                    [self.signals[i] for i in np.argsort(-r[3])[:top]]
+                    for r in rows
+                ],
+            }
+        )
+
+    def scores(
+        self, asset_ids: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """Latest score and flag per asset, and the flags raised so far."""
+        with self._lock:
+            if asset_ids is None:
+                ids = list(self.assets)
+                rows = np.arange(len(ids))
+            else:
+                ids = [a for a in asset_ids if a in self._index]
+                rows = np.array([self._index[a] for a in ids], dtype=np.intp)
+            frame = pd.DataFrame(
+                {
+                    "ts": self._ts[rows],
+                    "score": self._score[rows],
+                    "anomalous": self._flagged[rows],
+                    "flags_raised": self._raised[rows],
+                    "updates": self._updates[rows],
+                    "ready": self._updates[rows] >= 2 * self.warmup,
+                },
+                index=pd.Index(ids, name="asset_id"),
+            )
+        return frame
+
+    def explain(self, asset_id: str, top: int = 3) -> Optional[Dict[str, Any]]:
+        """An asset's latest score and the signals contributing most."""
+        with self._lock:
+            row = self._index.get(asset_id)
+            if row is None:
+                return None
+            x, z, contrib = (
+                self._x[row].copy(),
+                self._z[row].copy(),
+                self._contrib[row].copy(),
+            )
+            state = {
+                "asset_id": asset_id,
+                "ts": float(self._ts[row]),
+                "score": float(self._score[row]),
+                "threshold": self.threshold,
+                "anomalous": bool(self._flagged[row]),
+                "ready": bool(self._updates[row] >= 2 * self.warmup),
+                "updates": int(self._updates[row]),
+            }
+        order = np.argsort(-contrib)[:top]
+        state["signals"] = [
+            {
+                "signal": self.signals[i],
+                "value": _none(x[i]),
+                "z": float(z[i]),
+                "contribution": float(contrib[i]),
+            }
+            for i in order
+        ]
+        return {
+            k: _none(v) if isinstance(v, float) else v
+            for k, v in state.items()
+        }
+
+
+def signal_matrix(
+    frame: pd.DataFrame, signals: Sequence[str] = SIGNALS
+) -> np.ndarray:
+    # Flat columns as ReplaySource/SyntheticPlant
+    # send them, or the nested flue_gas_comp dicts
+    out = np.full((len(frame), len(signals)), np.nan)
+    nested = (
+        frame["flue_gas_comp"].tolist()
+        if "flue_gas_comp" in frame.columns
+        else None
+    )
+    for j, name in enumerate(signals):
+        if name in frame.columns:
+            out[:, j] = frame[name].to_numpy(dtype=float)
+        elif nested is not None and name.startswith(FLUE_PREFIX):
+            species = name[len(FLUE_PREFIX):]
+            out[:, j] = [
+                np.nan if (v := (d or {}).get(species)) is None else v
+                for d in nested
+            ]
+    return out
+
+
+def _none(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
@@ -0,0 +1,141 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from kpis_and_analytics import (
+    ASSISTANT_HELP,
+    alerts_answer,
+    assistant_intent,
+    oee_answer,
+)
+
+
+class AssistantContext:
+    """What the assistant knows about one asset at one point in time.
+
+    ``trend`` and ``sop`` are the finished answer texts; answers are
+    memoized per intent, so each context computes each answer once.
+    """
+    __slots__ = (
+        "asset_id",
+        "version",
+        "data_version",
+        "built_at",
+        "kpis",
+        "alerts",
+        "trend",
+        "sop",
+        "_answers",
+    )
+
+    def __init__(
+        self,
+        asset_id: str,
+        version: int,
+        data_version: Any,
+        kpis: Dict[str, Any],
+        alerts: List[str],
+        trend: str,
+        sop: str,
+    ):
+        self.asset_id = asset_id
+        self.version = version
+        self.data_version = data_version
+        self.built_at = time.monotonic()
+        self.kpis = kpis
+        self.alerts = alerts
+        self.trend = trend
+        self.sop = sop
+        self._answers: Dict[Optional[str], str] = {}
+
+    def answer(self, query: str) -> str:
+        intent = assistant_intent(query)
+        answer = self._answers.get(intent)
+        if answer is None:
+            if intent == "alert":
+                answer = alerts_answer(self.alerts)
+            elif intent == "trend":
+                answer = self.trend
+            elif intent == "oee":
+                answer = oee_answer(self.kpis)
+            elif intent == "sop":
+                answer = self.sop
+            else:
+                answer = ASSISTANT_HELP
+            self._answers[intent] = answer
+        return answer
+
+
+class AssistantContexts:
+    """Per-asset assistant contexts, rebuilt as new data arrives.
+
+    ``build(asset_id)`` returns the fields of a context (kpis, alerts,
+    trend, sop); ``data_version(asset_id)`` changes whenever readings are
+    ingested for the asset. A context is served until the data version
+    moves and it is at least ``max_age_s`` old, so a burst of queries
+    shares one build however fast readings arrive. Only one caller
+    rebuilds an asset's context at a time; the others wait for it.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[str], Dict[str, Any]],
+        data_version: Callable[[str], Any],
+        max_age_s: float = 1.0,
+    ):
+        self.build = build
+        self.data_version = data_version
+        self.max_age_s = max_age_s
+        self._contexts: Dict[str, AssistantContext] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._version = 0
+        self.builds = 0
+        self.hits = 0
+
+    def _fresh(
+        self, context: Optional[AssistantContext], data_version: Any
+    ) -> bool:
+        return context is not None and (
+            context.data_version == data_version
+            or time.monotonic() - context.built_at < self.max_age_s
+        )
+
+    def get(self, asset_id: str) -> AssistantContext:
+        data_version = self.data_version(asset_id)
+        context = self._contexts.get(asset_id)
+        if self._fresh(context, data_version):
+            self.hits += 1
+            return context
+        with self._lock:
+            lock = self._locks.setdefault(asset_id, threading.Lock())
+        with lock:
+            # Whoever held the lock may just have rebuilt it
+            context = self._contexts.get(asset_id)
+            if self._fresh(context, data_version):
+                self.hits += 1
+                return context
+            fields = self.build(asset_id)
+            with self._lock:
+                self._version += 1
+                version = self._version
+            context = AssistantContext(
+                asset_id, version, data_version, **fields
+            )
+            self._contexts[asset_id] = context
+            self.builds += 1
+            return context
+
+    def ask(self, asset_id: str, query: str) -> Dict[str, Any]:
+        context = self.get(asset_id)
+        return {
+            "response": context.answer(query),
+            "context_version": context.version,
+        }
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "contexts": len(self._contexts),
+            "builds": self.builds,
+            "hits": self.hits,
+        }
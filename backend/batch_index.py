@@ -0,0 +1,540 @@
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+# Process parameters that describe how a batch was run; nearest-neighbour
+# search works on these after scaling each to zero mean and unit variance.
+PROCESS_PARAMS = (
+    "furnace_temp",
+    "cycle_time",
+    "die_temp",
+    "material_input",
+    "cooling_water_in",
+)
+LABELS = ("asset_id", "part_number", "alloy")
+
+
+class _Array:
+    """Append-only NumPy array with amortised O(1) appends."""
+    __slots__ = ("data", "n")
+
+    def __init__(self, dtype, width: int = 0, capacity: int = 1024):
+        self.data = np.empty(
+            (capacity, width) if width else capacity, dtype=dtype
+        )
+        self.n = 0
+
+    def extend(self, values: np.ndarray) -> None:
+        end = self.n + len(values)
+        if end > len(self.data):
+            grown = np.empty(
+                (max(end, 2 * len(self.data)), *self.data.shape[1:]),
+                dtype=self.data.dtype,
+            )
+            grown[:self.n] = self.data[:self.n]
+            self.data = grown
+        self.data[self.n:end] = values
+        self.n = end
+
+    def truncate(self, n: int) -> None:
+        self.n = n
+
+    @property
+    def view(self) -> np.ndarray:
+        return self.data[:self.n]
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    # Positions of the k largest scores, best first
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+        return part[np.argsort(-scores[part], kind="stable")]
+    return np.argsort(-scores, kind="stable")
+
+
+def _scaling(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Per-parameter mean and standard deviation, ignoring missing values
+    with np.errstate(all="ignore"):
+        center = np.nanmean(x, axis=0) if len(x) else np.zeros(x.shape[1])
+        scale = np.nanstd(x, axis=0) if len(x) else np.ones(x.shape[1])
+    center = np.where(np.isnan(center), 0.0, center)
+    scale = np.where(np.isnan(scale) | (scale == 0), 1.0, scale)
+    return center, scale
+
+
+class _Partition:
+    """Batches of one (asset, part, alloy) key in arrival order.
+
+    Rows are grouped into fixed-size blocks with their maximum score and
+    time span. A top-k query scans the few blocks that straddle the time
+    range, then takes whole blocks in order of their maximum until none can
+    beat the k-th best candidate so far. Arrival order is close to time
+    order, so late batches only widen a block's span; nothing is re-sorted.
+    """
+    __slots__ = (
+        "rows",
+        "ts",
+        "score",
+        "block_max",
+        "block_first",
+        "block_last",
+    )
+
+    def __init__(self):
+        self.rows = _Array(np.intp)
+        self.ts = _Array(float)
+        self.score = _Array(float)
+        self.block_max = _Array(float, capacity=16)
+        self.block_first = _Array(float, capacity=16)
+        self.block_last = _Array(float, capacity=16)
+
+    def extend(
+        self, rows: np.ndarray, ts: np.ndarray, score: np.ndarray, block: int
+    ) -> None:
+        first = self.rows.n // block
+        self.rows.extend(rows)
+        self.ts.extend(ts)
+        self.score.extend(score)
+        starts = np.arange(0, self.rows.n - first * block, block)
+        for column, values, reduce in (
+            (self.block_max, self.score, np.maximum),
+            (self.block_first, self.ts, np.minimum),
+            (self.block_last, self.ts, np.maximum),
+        ):
+            column.truncate(first)
+            column.extend(reduce.reduceat(values.view[first * block:], starts))
+
+    def top(
+        self,
+        k: int,
+        since: Optional[float],
+        until: Optional[float],
+        block: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, rows) of the best ``k`` with ``since <= ts < until``."""
+        ts, score = self.ts.view, self.score.view
+        first, last = self.block_first.view, self.block_last.view
+        since = -np.inf if since is None else since
+        until = np.inf if until is None else until
+        inside = (first >= since) & (last < until)
+        straddling = np.flatnonzero(
+            ~inside & (last >= since) & (first < until)
+        )
+        cand = [
+            np.arange(b * block, min((b + 1) * block, len(ts)))
+            for b in straddling
+        ]
+        cand = np.concatenate(cand) if cand else np.empty(0, dtype=np.intp)
+        cand = cand[(ts[cand] >= since) & (ts[cand] < until)]
+        cand = cand[_top(score[cand], k)]
+        whole = np.flatnonzero(inside)
+        maxes = self.block_max.view[whole]
+        for b, best in zip(
+            whole[np.argsort(-maxes, kind="stable")], np.sort(maxes)[::-1]
+        ):
+            if len(cand) >= k and best <= score[cand[-1]]:
+                break
+            start = b * block
+            cand = np.concatenate(
+                [cand, start + _top(score[start:start + block], k)]
+            )
+            cand = cand[_top(score[cand], k)]
+        return score[cand], self.rows.view[cand]
+
+
+class _Level:
+    """Batches partitioned by one label combination, e.g. asset and part."""
+    __slots__ = ("labels", "partitions", "flushed")
+
+    def __init__(self, labels: Tuple[str, ...]):
+        self.labels = labels
+        self.partitions: Dict[Tuple[int, ...], _Partition] = {}
+        self.flushed = 0
+
+
+class BatchIndex:
+    """Closed-batch history for SOP queries: top-k and similar batches.
+
+    Each batch is one row: asset, part number and alloy labels, close time,
+    a score (OEE) and the process parameters. For every combination of
+    labels that has been filtered on, the batches are partitioned by those
+    labels, so a ``top_k`` query reads exactly one partition: a block-max
+    pruned scan over its time range. Partitions are brought up to date on
+    the next query rather than on every append, so adding batches stays
+    cheap however many presses and parts there are.
+
+    ``nearest`` searches a KD-tree over the scaled parameters; batches
+    added since the tree was built are searched by brute force until they
+    reach ``rebuild_fraction`` of the tree, when a new tree is built in a
+    background thread.
+    """
+
+    def __init__(
+        self,
+        params: Sequence[str] = PROCESS_PARAMS,
+        score: str = "oee",
+        block_size: int = 4096,
+        rebuild_fraction: float = 0.05,
+        min_rebuild: int = 4096,
+    ):
+        self.params = tuple(params)
+        self.score = score
+        self.block_size = block_size
+        self.rebuild_fraction = rebuild_fraction
+        self.min_rebuild = min_rebuild
+        self._ts = _Array(float)
+        self._score = _Array(float)
+        self._x = _Array(float, width=len(self.params))
+        self._codes = {label: _Array(np.int32) for label in LABELS}
+        self._lookup: Dict[str, Dict[str, int]] = {
+            label: {} for label in LABELS
+        }
+        self._names: Dict[str, List[str]] = {label: [] for label in LABELS}
+        self._levels: Dict[Tuple[str, ...], _Level] = {}
+        # asset code -> row of its newest batch
+        self._latest: Dict[int, int] = {}
+        self._newest = -np.inf
+        self._tree: Optional[cKDTree] = None
+        self._tree_n = 0
+        self._center = np.zeros(len(self.params))
+        self._scale = np.ones(len(self.params))
+        self._building = False
+        self._lock = threading.RLock()
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._ts.n
+
+    def _encode(self, label: str, values) -> np.ndarray:
+        lookup, names = self._lookup[label], self._names[label]
+        local, uniques = pd.factorize(np.asarray(values, dtype=object))
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(names)
+                names.append(value)
+            mapping[i] = code
+        return mapping[local]
+
+    # --------- Updates ---------
+
+    def add_frame(
+        self, readings: pd.DataFrame, kpis: Optional[pd.DataFrame] = None
+    ) -> int:
+        """Add one batch per row, scored from ``kpis`` if given."""
+        if readings.empty:
+            return 0
+        source = (
+            kpis
+            if kpis is not None and self.score in kpis.columns
+            else readings
+        )
+        labels = {}
+        for label in LABELS:
+            column = (
+                readings[label]
+                if label in readings.columns
+                else pd.Series("", index=readings.index)
+            )
+            labels[label] = (
+                column.astype(object)
+                .where(column.notna(), "")
+                .astype(str)
+                .to_numpy()
+            )
+        x = readings.reindex(columns=list(self.params)).to_numpy(dtype=float)
+        self._append(
+            labels,
+            readings["ts"].to_numpy(dtype=float),
+            source[self.score].to_numpy(dtype=float),
+            x,
+        )
+        return len(readings)
+
+    def add(
+        self,
+        asset_id: str,
+        ts: float,
+        reading: Mapping[str, Any],
+        score: float,
+        part_number: str = "",
+        alloy: str = "",
+    ) -> None:
+        labels = {
+            "asset_id": [asset_id],
+            "part_number": [part_number or ""],
+            "alloy": [alloy or ""],
+        }
+        x = np.array(
+            [[reading.get(p, np.nan) for p in self.params]], dtype=float
+        )
+        self._append(
+            labels,
+            np.array([ts], dtype=float),
+            np.array([score], dtype=float),
+            x,
+        )
+
+    def _append(
+        self,
+        labels: Dict[str, Sequence[str]],
+        ts: np.ndarray,
+        score: np.ndarray,
+        x: np.ndarray,
+    ) -> None:
+        score = np.where(np.isnan(score), -np.inf, score)
+        with self._lock:
+            codes = {
+                label: self._encode(label, labels[label]) for label in LABELS
+            }
+            start = self._ts.n
+            self._ts.extend(ts)
+            self._score.extend(score)
+            self._x.extend(x)
+            for label in LABELS:
+                self._codes[label].extend(codes[label])
+            assets, last = np.unique(
+                codes["asset_id"][::-1], return_index=True
+            )
+            self._latest.update(
+                zip(assets.tolist(), (start + len(ts) - 1 - last).tolist())
+            )
+            self._newest = max(self._newest, float(ts.max()))
+            self.version += 1
+
+    def _flush(self, level: _Level) -> None:
+        # Add the batches appended since the level
+        # was last queried to its partitions
+        n = self._ts.n
+        if level.flushed == n:
+            return
+        rows = np.arange(level.flushed, n)
+        ts, score = (
+            self._ts.view[level.flushed:],
+            self._score.view[level.flushed:],
+        )
+        if not level.labels:
+            groups = [((), slice(None))]
+        else:
+            # One integer per label combination,
+            # so grouping is a single 1-D sort
+            shape = tuple(len(self._names[label]) for label in level.labels)
+            keys = np.ravel_multi_index(
+                [
+                    self._codes[label].view[level.flushed:]
+                    for label in level.labels
+                ],
+                shape,
+            )
+            order = np.argsort(keys, kind="stable")
+            uniq, bounds = np.unique(keys[order], return_index=True)
+            bounds = np.append(bounds, len(keys))
+            groups = [
+                (
+                    tuple(int(c) for c in np.unravel_index(key, shape)),
+                    order[bounds[g]:bounds[g + 1]],
+                )
+                for g, key in enumerate(uniq)
+            ]
+        for key, members in groups:
+            partition = level.partitions.get(key)
+            if partition is None:
+                partition = level.partitions[key] = _Partition()
+            partition.extend(
+                rows[members], ts[members], score[members], self.block_size
+            )
+        level.flushed = n
+
+    # --------- Queries ---------
+
+    def top_k(
+        self,
+        k: int = 5,
+        asset_id: Optional[str] = None,
+        part_number: Optional[str] = None,
+        alloy: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Best batches first, matching every filter and the time range."""
+        filters = {
+            "asset_id": asset_id,
+            "part_number": part_number,
+            "alloy": alloy,
+        }
+        labels = tuple(label for label in LABELS if filters[label] is not None)
+        with self._lock:
+            if k < 1 or any(
+                filters[label] not in self._lookup[label] for label in labels
+            ):
+                return []
+            level = self._levels.get(labels)
+            if level is None:
+                level = self._levels[labels] = _Level(labels)
+            self._flush(level)
+            partition = level.partitions.get(
+                tuple(self._lookup[label][filters[label]] for label in labels)
+            )
+            if partition is None:
+                return []
+            _, rows = partition.top(k, since, until, self.block_size)
+            return self._records(rows[np.isfinite(self._score.view[rows])])
+
+    def nearest(
+        self,
+        values: Mapping[str, Any],
+        k: int = 5,
+        asset_id: Optional[str] = None,
+        part_number: Optional[str] = None,
+        alloy: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Batches run with the most similar process parameters, nearest first.
+
+        Parameters missing from ``values`` are taken at their mean, i.e.
+        they do not pull the search either way. Filters are applied to the
+        tree's candidates, fetching more until ``k`` match.
+        """
+        with self._lock:
+            self._maybe_rebuild()
+            n = self._ts.n
+            if not n or k < 1:
+                return []
+            tree, tree_n = self._tree, self._tree_n
+            x = self._x.view
+            center, scale = (
+                (self._center, self._scale)
+                if tree is not None
+                else _scaling(x)
+            )
+            codes = {label: self._codes[label].view for label in LABELS}
+            ts = self._ts.view
+            wanted = {}
+            for label, value in (
+                ("asset_id", asset_id),
+                ("part_number", part_number),
+                ("alloy", alloy),
+            ):
+                if value is not None:
+                    if value not in self._lookup[label]:
+                        return []
+                    wanted[label] = self._lookup[label][value]
+        query = np.array(
+            [values.get(p, np.nan) for p in self.params], dtype=float
+        )
+        query = np.where(np.isnan(query), center, query)
+        query = (query - center) / scale
+
+        def keep(rows):
+            mask = np.ones(len(rows), dtype=bool)
+            for label, code in wanted.items():
+                mask &= codes[label][rows] == code
+            if since is not None:
+                mask &= ts[rows] >= since
+            if until is not None:
+                mask &= ts[rows] < until
+            return mask
+
+        # Batches newer than the tree: brute force
+        scaled = np.nan_to_num((x[tree_n:n] - center) / scale)
+        dist = np.sqrt(((scaled - query) ** 2).sum(axis=1))
+        buffer = np.arange(tree_n, n)
+        mask = keep(buffer)
+        buffer, dist = buffer[mask], dist[mask]
+        best = _top(-dist, k)
+        found_rows, found_dist = [buffer[best]], [dist[best]]
+        fetch = k
+        while tree is not None:
+            fetch = min(fetch, tree_n)
+            d, r = tree.query(query, k=fetch)
+            d, r = np.atleast_1d(d), np.atleast_1d(r)
+            mask = keep(r)
+            if mask.sum() >= k or fetch == tree_n:
+                found_rows.append(r[mask])
+                found_dist.append(d[mask])
+                break
+            fetch *= 8
+        rows, dist = np.concatenate(found_rows), np.concatenate(found_dist)
+        order = np.argsort(dist, kind="stable")[:k]
+        with self._lock:
+            records = self._records(rows[order])
+        for record, d in zip(records, dist[order]):
+            record["distance"] = float(d)
+        return records
+
+    def latest(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        """The newest batch of an asset, e.g. for its current part number."""
+        with self._lock:
+            code = self._lookup["asset_id"].get(asset_id)
+            if code is None or code not in self._latest:
+                return None
+            return self._records(np.array([self._latest[code]]))[0]
+
+    def newest_ts(self) -> Optional[float]:
+        return None if not self._ts.n else self._newest
+
+    def _records(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        records = []
+        x, ts, score = self._x.view, self._ts.view, self._score.view
+        for row in rows:
+            record = {
+                label: self._names[label][self._codes[label].data[row]]
+                for label in LABELS
+            }
+            record["ts"] = float(ts[row])
+            record[self.score] = (
+                float(score[row]) if np.isfinite(score[row]) else None
+            )
+            record.update(
+                (p, None if np.isnan(v) else float(v))
+                for p, v in zip(self.params, x[row])
+            )
+            records.append(record)
+        return records
+
+    # --------- KD-tree maintenance ---------
+
+    def _maybe_rebuild(self) -> None:
+        pending = self._ts.n - self._tree_n
+        if self._building or pending < max(
+            self.min_rebuild, self.rebuild_fraction * self._tree_n
+        ):
+            return
+        if self._tree is None and self._ts.n < 4 * self.min_rebuild:
+            return  # small enough to brute force
+        self._building = True
+        # Rows below n never change, so the
+        # view is safe to read without the lock
+        threading.Thread(
+            target=self._build, args=(self._x.view, self._ts.n), daemon=True
+        ).start()
+
+    def _build(self, x: np.ndarray, n: int) -> None:
+        try:
+            center, scale = _scaling(x)
+            tree = cKDTree(
+                np.nan_to_num((x - center) / scale),
+                balanced_tree=False,
+                compact_nodes=False,
+            )
+            with self._lock:
+                self._tree, self._tree_n, self._center, self._scale = (
+                    tree,
+                    n,
+                    center,
+                    scale,
+                )
+        finally:
+            self._building = False
+
+    def build(self) -> None:
+        """Rebuild the KD-tree over every batch now, in the calling thread."""
+        with self._lock:
+            x, n = self._x.view, self._ts.n
+            self._building = True
+        self._build(x, n)
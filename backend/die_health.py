@@ -0,0 +1,260 @@
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Prior for a newly seen die: wear per cycle at the reference die temperature,
+# and how much that rate changes per t_scale degrees above it.
+DEFAULT_PRIOR = {"wear_per_cycle": 1e-3, "temp_sensitivity": 0.0}
+Z_95 = 1.645
+
+
+def cycles_in(reading: Mapping[str, Any]) -> float:
+    # Explicit cycle counts win; otherwise runtime (h) / cycle_time (min)
+    if reading.get("cycles") is not None:
+        return float(reading["cycles"])
+    cycle_time = reading.get("cycle_time") or 0
+    return (
+        float(reading.get("runtime", 1) or 0) * 60.0 / cycle_time
+        if cycle_time > 0
+        else 0.0
+    )
+
+
+class DieHealthEngine:
+    """Streaming wear / remaining-useful-life estimate per die.
+
+    Each die has a 3-state linear Kalman filter: wear level ``w`` (fraction
+    of the wear limit, observed as ``die_wear_rate``) and a wear-per-cycle
+    rate ``b0 + b1 * (die_temp - t_ref) / t_scale``. Between readings wear
+    advances by the cycles run at the observed die temperature; each
+    reading then corrects level and rate. Every update is a fixed number
+    of 3x3 operations per die, done for a whole batch of dies at once, so
+    cost does not depend on how much history a die has.
+
+    ``wear_noise``/``rate_noise`` are process variances per cycle and
+    ``obs_noise`` the variance of one wear reading. A reading far below the
+    current estimate (``replace_drop``) is taken as a die change and
+    restarts that die's filter.
+    """
+
+    def __init__(
+        self,
+        wear_limit: float = 1.0,
+        t_ref: float = 300.0,
+        t_scale: float = 100.0,
+        wear_noise: float = 1e-6,
+        rate_noise: float = 1e-10,
+        obs_noise: float = 1e-2,
+        prior: Optional[Mapping[str, float]] = None,
+        prior_std: Sequence[float] = (0.1, 1e-3, 5e-4),
+        replace_drop: float = 0.5,
+        capacity: int = 1024,
+    ):
+        self.wear_limit = wear_limit
+        self.t_ref = t_ref
+        self.t_scale = t_scale
+        self.obs_noise = obs_noise
+        self.replace_drop = replace_drop
+        prior = {**DEFAULT_PRIOR, **(prior or {})}
+        self._prior_rate = np.array(
+            [prior["wear_per_cycle"], prior["temp_sensitivity"]]
+        )
+        self._prior_cov = np.diag(
+            np.square(np.asarray(prior_std, dtype=float))
+        )
+        self._q = np.array([wear_noise, rate_noise, rate_noise])
+        self._lock = threading.Lock()
+        self.dies: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._x = np.zeros((capacity, 3))
+        self._P = np.zeros((capacity, 3, 3))
+        self._u = np.zeros(capacity)          # last scaled die temperature
+        self._limit = np.full(capacity, wear_limit)
+        self._updates = np.zeros(capacity, dtype=np.int64)
+        self._replaced = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.dies)
+
+    def __contains__(self, die_id: str) -> bool:
+        return die_id in self._index
+
+    def _rows(self, die_ids: Sequence[str]) -> np.ndarray:
+        new = [d for d in dict.fromkeys(die_ids) if d not in self._index]
+        if new:
+            needed = len(self.dies) + len(new)
+            if needed > len(self._x):
+                # Grow geometrically so registration stays amortized O(1)
+                size = max(needed, 2 * len(self._x))
+                for name in (
+                    "_x",
+                    "_P",
+                    "_u",
+                    "_limit",
+                    "_updates",
+                    "_replaced",
+                ):
+                    old = getattr(self, name)
+                    grown = np.zeros((size,) + old.shape[1:], dtype=old.dtype)
+                    grown[:len(old)] = old
+                    setattr(self, name, grown)
+                self._limit[len(self.dies):] = self.wear_limit
+            for d in new:
+                self._index[d] = len(self.dies)
+                self.dies.append(d)
+        return np.fromiter(
+            (self._index[d] for d in die_ids),
+            dtype=np.intp,
+            count=len(die_ids),
+        )
+
+    def set_wear_limit(self, die_id: str, limit: float) -> None:
+        with self._lock:
+            self._limit[self._rows([die_id])[0]] = limit
+
+    def update(self, die_ids: Sequence[str], wear, die_temp, cycles) -> None:
+        """Advance and correct distinct dies' filters by one reading each.
+
+        ``wear`` is the observed wear level (NaN = not measured, predict
+        only), ``die_temp`` in °C and ``cycles`` the cycles run since the
+        die's previous reading.
+        """
+        wear = np.asarray(wear, dtype=float)
+        u = (np.asarray(die_temp, dtype=float) - self.t_ref) / self.t_scale
+        dn = np.nan_to_num(np.asarray(cycles, dtype=float))
+        with self._lock:
+            rows = self._rows(die_ids)
+            u = np.where(np.isnan(u), self._u[rows], u)
+            first = self._updates[rows] == 0
+            x, P = self._x[rows], self._P[rows]
+            if first.any():
+                x[first, 0] = np.nan_to_num(wear[first])
+                x[first, 1:] = self._prior_rate
+                P[first] = self._prior_cov
+
+            # Predict: w += dn * (b0 + b1 * u); a
+            # die's first reading only initializes it
+            g1 = np.where(first, 0.0, dn)
+            g2 = g1 * u
+            x[:, 0] += g1 * x[:, 1] + g2 * x[:, 2]
+            # P = F P F^T with F = [[1, g1, g2], [0, 1,
+            # 0], [0, 0, 1]], written out per element
+            row0 = (
+                P[:, 0, :]
+                + g1[:, None] * P[:, 1, :]
+                + g2[:, None] * P[:, 2, :]
+            )
+            P[:, 0, :] = row0
+            P[:, :, 0] = row0
+            P[:, 0, 0] = row0[:, 0] + g1 * row0[:, 1] + g2 * row0[:, 2]
+            P[:, [0, 1, 2], [0, 1, 2]] += self._q * g1[:, None]
+
+            # Correct with the observed wear level (H = [1, 0, 0])
+            observed = ~np.isnan(wear) & ~first
+            innovation = np.where(observed, wear - x[:, 0], 0.0)
+            replaced = observed & (innovation < -self.replace_drop)
+            s = P[:, 0, 0] + self.obs_noise
+            gain = np.where(observed[:, None], P[:, :, 0] / s[:, None], 0.0)
+            x += gain * innovation[:, None]
+            P -= gain[:, :, None] * P[:, None, 0, :]
+            if replaced.any():
+                x[replaced, 0] = wear[replaced]
+                x[replaced, 1:] = self._prior_rate
+                P[replaced] = self._prior_cov
+
+            self._x[rows], self._P[rows] = x, P
+            self._u[rows] = u
+            self._updates[rows] += 1
+            self._replaced[rows] += replaced
+
+    def update_frame(
+        self, readings: pd.DataFrame, key: str = "asset_id"
+    ) -> None:
+        """Update from a readings frame; a die's readings apply in order."""
+        if not len(readings):
+            return
+        frame = (
+            readings.sort_values("ts", kind="stable")
+            if "ts" in readings.columns
+            else readings
+        )
+        ids = frame[key].to_numpy()
+        wear = _column(frame, "die_wear_rate")
+        temp = _column(frame, "die_temp")
+        if "cycles" in frame.columns:
+            cycles = frame["cycles"].to_numpy(dtype=float)
+        else:
+            cycle_time = _column(frame, "cycle_time")
+            runtime = np.nan_to_num(_column(frame, "runtime"), nan=1.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cycles = np.where(
+                    cycle_time > 0, runtime * 60.0 / cycle_time, 0.0
+                )
+        tick = frame.groupby(key, sort=False).cumcount().to_numpy()
+        for t in range(int(tick.max()) + 1):
+            sel = tick == t
+            self.update(ids[sel].tolist(), wear[sel], temp[sel], cycles[sel])
+
+    def update_one(self, die_id: str, reading: Mapping[str, Any]) -> None:
+        wear = reading.get("die_wear_rate")
+        temp = reading.get("die_temp")
+        self.update(
+            [die_id],
+            [np.nan if wear is None else wear],
+            [np.nan if temp is None else temp],
+            [cycles_in(reading)],
+        )
+
+    def estimates(
+        self, die_ids: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """Current wear, wear rate and RUL (cycles to the wear limit).
+
+        ``rul_cycles_p05`` is the conservative RUL at the 95% upper bound
+        of the wear rate. RUL is NaN when the estimated rate is not positive.
+        """
+        with self._lock:
+            if die_ids is None:
+                rows = np.arange(len(self.dies))
+                ids = list(self.dies)
+            else:
+                ids = [d for d in die_ids if d in self._index]
+                rows = np.array([self._index[d] for d in ids], dtype=np.intp)
+            x, P, u = self._x[rows], self._P[rows], self._u[rows]
+            limit, updates = self._limit[rows], self._updates[rows]
+            replaced = self._replaced[rows]
+        rate = x[:, 1] + u * x[:, 2]
+        rate_var = P[:, 1, 1] + 2 * u * P[:, 1, 2] + u * u * P[:, 2, 2]
+        remaining = np.maximum(limit - x[:, 0], 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rul = np.where(rate > 0, remaining / rate, np.nan)
+            upper = rate + Z_95 * np.sqrt(np.maximum(rate_var, 0.0))
+            rul_p05 = np.where(upper > 0, remaining / upper, np.nan)
+        return pd.DataFrame(
+            {
+                "wear": x[:, 0],
+                "wear_std": np.sqrt(np.maximum(P[:, 0, 0], 0.0)),
+                "wear_per_cycle": rate,
+                "wear_limit": limit,
+                "rul_cycles": rul,
+                "rul_cycles_p05": rul_p05,
+                "updates": updates,
+                "replacements": replaced,
+            },
+            index=pd.Index(ids, name="die_id"),
+        )
+
+    def estimate(self, die_id: str) -> Optional[Dict[str, Any]]:
+        frame = self.estimates([die_id])
+        if not len(frame):
+            return None
+        return {k: (None if isinstance(v, float) and np.isnan(v) else v)
+                for k, v in frame.astype(object).iloc[0].to_dict().items()}
+
+
+def _column(frame: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in frame.columns:
+        return np.full(len(frame), np.nan)
+    return frame[name].to_numpy(dtype=float)
@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("lttb", "minmax")
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of ``n_out`` points chosen by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point; from each of the ``n_out - 2`` buckets in
+    between it keeps the point forming the largest triangle with the point
+    kept before it and the mean of the next bucket. ``x`` must be sorted.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    counts = np.diff(edges)
+    # Bucket means up front; only the argmax depends on the previous choice
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+    out = np.empty(n_out, dtype=np.intp)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs(
+            (ax - mean_x[i]) * (y[lo:hi] - ay)
+            - (ax - x[lo:hi]) * (mean_y[i] - ay)
+        )
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the min and max of ``n_out // 2`` buckets, plus the ends.
+
+    Cheaper than LTTB and never drops a spike, at the cost of up to two
+    points per bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    size = -(-n // (n_out // 2))
+    rows = -(-n // size)
+    # Pad the last bucket so every bucket is a row of one (rows, size) block
+    pad = rows * size - n
+    lows = (
+        np.concatenate([y, np.full(pad, np.inf)])
+        .reshape(rows, size)
+        .argmin(axis=1)
+    )
+    highs = (
+        np.concatenate([y, np.full(pad, -np.inf)])
+        .reshape(rows, size)
+        .argmax(axis=1)
+    )
+    offsets = np.arange(rows) * size
+    return np.unique(
+        np.concatenate([[0, n - 1], offsets + lows, offsets + highs])
+    )
+
+
+def downsample(
+    x, y, n_out: int, method: str = "lttb"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample one series for plotting; NaN values are dropped first."""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[keep], y[keep]
+    idx = (lttb if method == "lttb" else minmax)(x, y, n_out)
+    return x[idx], y[idx]
+
+
+def downsample_frame(
+    frame: pd.DataFrame,
+    columns: Optional[Iterable[str]] = None,
+    n_out: int = 2000,
+    method: str = "lttb",
+    x: str = "ts",
+) -> Dict[str, Dict[str, list]]:
+    """Per-column ``{"ts": [...], "values": [...]}``, about ``n_out`` points.
+
+    Each series keeps its own x positions, so peaks in one column are not
+    lost to the sampling of another.
+    """
+    if len(frame) and not frame[x].is_monotonic_increasing:
+        frame = frame.sort_values(x, kind="stable")
+    columns = (
+        [c for c in frame.columns if c != x]
+        if columns is None
+        else list(columns)
+    )
+    stamps = frame[x].to_numpy(dtype=float)
+    series = {}
+    for column in columns:
+        xs, ys = downsample(
+            stamps, frame[column].to_numpy(dtype=float), n_out, method
+        )
+        series[column] = {"ts": xs.tolist(), "values": ys.tolist()}
+    return series
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_FACTORS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "emission_factors.json"
+)
+# Emission category of each metered resource (kg CO2e per unit of resource)
+CATEGORIES = {
+    "gas_consumption": "scope_1",   # per Nm3 of natural gas burnt on site
+    "power_usage": "scope_2",       # per kWh of purchased electricity
+    "water_usage": "water",         # per m3 of supplied water
+    "material_input": "material",   # per kg of steel (embodied, scope 3)
+}
+# Categories summed into total_ghg: the operational footprint. Embodied
+# material emissions are reported in their own column only.
+TOTAL_GHG = ("scope_1", "scope_2", "water")
+
+
+@dataclass
+class FactorSet:
+    """One published version of the emission factors.
+
+    ``factors`` are constants; ``series`` optionally overrides a resource
+    with a step profile ``(ts, values)``, e.g. hourly grid-carbon intensity
+    for ``power_usage``. Outside the profile the constant applies.
+    """
+    version: str
+    factors: Dict[str, float]
+    series: Dict[str, Tuple[np.ndarray, np.ndarray]] = field(
+        default_factory=dict
+    )
+    source: str = ""
+
+    def factor(self, resource: str, ts=None):
+        base = self.factors.get(resource, 0.0)
+        profile = self.series.get(resource)
+        if profile is None or ts is None:
+            return (
+                base
+                if ts is None or np.ndim(ts) == 0
+                else np.full(np.shape(ts), base)
+            )
+        stamps, values = profile
+        t = np.asarray(ts, dtype=float)
+        idx = np.searchsorted(stamps, t, side="right") - 1
+        out = np.where(idx >= 0, values[np.clip(idx, 0, None)], base)
+        out = np.where(np.isnan(t), base, out)
+        return float(out) if out.ndim == 0 else out
+
+
+class EmissionFactorRegistry:
+    """Versioned emission factors shared by the KPI and projection code.
+
+    Versions are kept side by side so historic reports can be re-run with
+    the factors they were published with; ``active`` is used when no
+    version is given.
+    """
+
+    def __init__(
+        self,
+        versions: Optional[Dict[str, FactorSet]] = None,
+        active: Optional[str] = None,
+    ):
+        self._lock = threading.Lock()
+        self.versions: Dict[str, FactorSet] = dict(versions or {})
+        self.active = (
+            active
+            if active is not None
+            else next(reversed(self.versions), None)
+        )
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Any]) -> "EmissionFactorRegistry":
+        versions = {
+            name: FactorSet(
+                name,
+                {k: float(v) for k, v in body["factors"].items()},
+                source=body.get("source", ""),
+            )
+            for name, body in spec["versions"].items()
+        }
+        return cls(versions, spec.get("active"))
+
+    @classmethod
+    def from_file(
+        cls, path: str = DEFAULT_FACTORS_PATH
+    ) -> "EmissionFactorRegistry":
+        with open(path) as fh:
+            return cls.from_dict(json.load(fh))
+
+    def get(self, version: Optional[str] = None) -> FactorSet:
+        name = self.active if version is None else version
+        try:
+            return self.versions[name]
+        except KeyError:
+            raise KeyError(
+                f"Unknown emission factor version: {name!r}"
+            ) from None
+
+    def add_version(
+        self,
+        version: str,
+        factors: Dict[str, float],
+        source: str = "",
+        base: Optional[str] = None,
+        activate: bool = False,
+    ) -> FactorSet:
+        """Add a version; unset factors come from ``base`` (or the active)."""
+        with self._lock:
+            inherited = (
+                self.get(base)
+                if (base is not None or self.active is not None)
+                else None
+            )
+            merged = dict(inherited.factors) if inherited else {}
+            merged.update({k: float(v) for k, v in factors.items()})
+            series = dict(inherited.series) if inherited else {}
+            self.versions[version] = FactorSet(version, merged, series, source)
+            if activate or self.active is None:
+                self.active = version
+            return self.versions[version]
+
+    def set_series(
+        self, resource: str, ts, values, version: Optional[str] = None
+    ) -> None:
+        """Attach a time-varying profile (a step function over timestamps)."""
+        stamps = np.asarray(ts, dtype=float)
+        order = np.argsort(stamps, kind="stable")
+        with self._lock:
+            self.get(version).series[resource] = (
+                stamps[order],
+                np.asarray(values, dtype=float)[order],
+            )
+
+    def load_series_csv(
+        self, resource: str, path: str, version: Optional[str] = None
+    ) -> None:
+        """Load a profile from a CSV with ``ts`` and ``factor`` columns."""
+        frame = pd.read_csv(path)
+        ts = frame["ts"]
+        if not pd.api.types.is_numeric_dtype(ts):
+            # Seconds since the epoch whatever resolution
+            # pandas parses to; naive times are UTC
+            ts = (
+                pd.to_datetime(ts, utc=True, format="ISO8601")
+                - pd.Timestamp(0, tz="UTC")
+            ) / pd.Timedelta(seconds=1)
+        self.set_series(
+            resource,
+            ts.to_numpy(dtype=float),
+            frame["factor"].to_numpy(dtype=float),
+            version,
+        )
+
+    def factor(self, resource: str, ts=None, version: Optional[str] = None):
+        return self.get(version).factor(resource, ts)
+
+    def factors(
+        self, ts=None, version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        factor_set = self.get(version)
+        return {
+            resource: factor_set.factor(resource, ts)
+            for resource in CATEGORIES
+        }
+
+
+_registry = EmissionFactorRegistry.from_file()
+
+
+def get_registry() -> EmissionFactorRegistry:
+    return _registry
+
+
+def set_registry(registry: EmissionFactorRegistry) -> None:
+    global _registry
+    _registry = registry
@@ -1,18 +1,217 @@
-EMISSIONS_FACTORS = {
-    "power_usage": 0.82,        # kg CO₂e per kWh
-    "gas_consumption": 2.0,     # kg CO₂e per Nm³
-    "water_usage": 0.344,       # kg CO₂e per m³
-    "material_input": 1.5,      # kg CO₂e per kg steel
-}
-
-def project_ghg_emissions(resource_usage: dict) -> dict:
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from emission_factors import (
+    CATEGORIES,
+    TOTAL_GHG,
+    EmissionFactorRegistry,
+    get_registry,
+)
+
+# Reporting periods -> NumPy datetime64 units
+PERIODS = {"hour": "h", "day": "D", "month": "M", "year": "Y"}
+# Seconds a reading stands for when nothing says otherwise, and at most (a gap
+# in the data is not filled)
+DEFAULT_INTERVAL_S = 60.0
+MAX_INTERVAL_S = 3600.0
+
+
+def project_ghg_emissions(
+    resource_usage: dict,
+    ts: Optional[float] = None,
+    version: Optional[str] = None,
+    registry: Optional[EmissionFactorRegistry] = None,
+) -> dict:
+    factors = (registry or get_registry()).factors(ts=ts, version=version)
     ghg = {}
     total = 0
     for resource, usage in resource_usage.items():
-        factor = EMISSIONS_FACTORS.get(resource)
+        factor = factors.get(resource)
         if factor is not None:
             emission = usage * factor
             ghg[resource] = emission
-            total += emission
+            if CATEGORIES.get(resource) in TOTAL_GHG:
+                total += emission
     ghg["total_ghg"] = total
     return ghg
+
+
+def interval_usage(
+    readings: pd.DataFrame,
+    resources: Sequence[str] = tuple(CATEGORIES),
+    default_interval_s: float = DEFAULT_INTERVAL_S,
+    max_interval_s: float = MAX_INTERVAL_S,
+    previous_ts: Optional[Mapping[str, float]] = None,
+) -> pd.DataFrame:
+    """Resource use per reading from the per-hour rates readings carry.
+
+    Each rate is multiplied by the hours the reading stands for: its
+    ``interval_s`` column if set, else the time since the asset's previous
+    reading (in the frame, or its ``previous_ts`` entry), else
+    ``default_interval_s``; at most ``max_interval_s``. Totals then do not
+    depend on how often an asset is sampled.
+    """
+    n = len(readings)
+    ts = readings["ts"].to_numpy(dtype=float)
+    assets = (
+        readings["asset_id"].to_numpy()
+        if "asset_id" in readings.columns
+        else np.zeros(n, dtype=int)
+    )
+    codes, names = pd.factorize(assets)
+    order = np.lexsort((ts, codes))
+    gap = np.full(n, np.nan)
+    same = codes[order][1:] == codes[order][:-1]
+    gap[order[1:][same]] = np.diff(ts[order])[same]
+    if previous_ts:
+        first = order[np.r_[True, ~same]]
+        before = np.array(
+            [previous_ts.get(names[c], np.nan) for c in codes[first]],
+            dtype=float,
+        )
+        gap[first] = np.where(before < ts[first], ts[first] - before, np.nan)
+    if "interval_s" in readings.columns:
+        given = readings["interval_s"].to_numpy(dtype=float)
+        gap = np.where(given > 0, given, gap)
+    hours = (
+        np.minimum(
+            np.where(np.isnan(gap), default_interval_s, gap), max_interval_s
+        )
+        / 3600.0
+    )
+    usage = readings.copy()
+    for resource in resources:
+        if resource in usage.columns:
+            usage[resource] = usage[resource].to_numpy(dtype=float) * hours
+    return usage
+
+
+def emissions_frame(
+    usage: pd.DataFrame,
+    version: Optional[str] = None,
+    registry: Optional[EmissionFactorRegistry] = None,
+) -> pd.DataFrame:
+    """Per-interval emissions by category for a frame of resource usage.
+
+    ``usage`` has one row per interval with resource columns (missing ones
+    count as zero) and optionally ``ts`` for time-varying factors. Returns
+    one column per category plus ``total_ghg`` (the ``TOTAL_GHG`` categories).
+    """
+    registry = registry or get_registry()
+    ts = usage["ts"].to_numpy(dtype=float) if "ts" in usage.columns else None
+    factors = registry.factors(ts=ts, version=version)
+    n = len(usage)
+    out = {}
+    total = np.zeros(n)
+    for resource, category in CATEGORIES.items():
+        if resource in usage.columns:
+            amount = (
+                np.nan_to_num(usage[resource].to_numpy(dtype=float))
+                * factors[resource]
+            )
+        else:
+            amount = np.zeros(n)
+        out[category] = amount
+        if category in TOTAL_GHG:
+            total += amount
+    out["total_ghg"] = total
+    return pd.DataFrame(out, index=usage.index)
+
+
+def emissions_report(
+    usage: pd.DataFrame,
+    period: str = "month",
+    by: Optional[str] = None,
+    version: Optional[str] = None,
+    registry: Optional[EmissionFactorRegistry] = None,
+    weights: Optional[np.ndarray] = None,
+) -> pd.DataFrame:
+    """Emissions by category per calendar period (UTC) of ``usage.ts``.
+
+    ``by`` adds a grouping column (e.g. ``asset_id``) in front of the period.
+    ``weights`` counts each row as that many intervals (compacted history).
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {sorted(PERIODS)}")
+    emissions = emissions_frame(usage, version, registry)
+    stamps = (usage["ts"].to_numpy(dtype=float) * 1e3).astype("datetime64[ms]")
+    periods = stamps.astype(f"datetime64[{PERIODS[period]}]").astype(
+        "datetime64[ms]"
+    )
+    if by is None:
+        # Single key: bincount over the period codes beats a pandas groupby
+        keys, codes = np.unique(periods, return_inverse=True)
+        sums = {
+            c: np.bincount(
+                codes, weights=emissions[c].to_numpy(), minlength=len(keys)
+            )
+            for c in emissions.columns
+        }
+        report = pd.DataFrame(
+            sums, index=pd.DatetimeIndex(keys, name="period")
+        )
+        report.insert(
+            0,
+            "intervals",
+            np.bincount(codes, weights=weights, minlength=len(keys)).astype(
+                int
+            ),
+        )
+        return report
+    emissions.insert(
+        0,
+        "intervals",
+        1 if weights is None else np.asarray(weights, dtype=int),
+    )
+    return (
+        emissions.groupby([usage[by].to_numpy(), periods])
+        .sum()
+        .rename_axis([by, "period"])
+    )
+
+
+def project_horizons(
+    rates: pd.DataFrame,
+    horizons_h: Sequence[float],
+    start_ts: float,
+    step_s: float = 3600.0,
+    version: Optional[str] = None,
+    registry: Optional[EmissionFactorRegistry] = None,
+) -> pd.DataFrame:
+    """Cumulative emissions for constant usage rates over several horizons.
+
+    ``rates`` has one row per asset/scenario and resource columns in units
+    per hour. Factors are integrated over a ``step_s`` time grid starting at
+    ``start_ts``, so time-varying factors are honoured, then combined with
+    all rows and horizons at once. Returns one row per (rate row, horizon).
+    """
+    registry = registry or get_registry()
+    horizons = np.asarray(horizons_h, dtype=float)
+    if not len(horizons) or (horizons <= 0).any():
+        raise ValueError("horizons_h must be positive")
+    # Horizons are rounded up to whole steps
+    upto = np.ceil(horizons * 3600.0 / step_s).astype(int)
+    grid = start_ts + np.arange(upto.max()) * step_s
+    factors = registry.factors(ts=grid, version=version)
+    resources = [r for r in CATEGORIES if r in rates.columns]
+    # rows x resources
+    rate_matrix = np.nan_to_num(rates[resources].to_numpy(dtype=float))
+    # resources x (steps + 1)
+    cumulative = np.zeros((len(resources), len(grid) + 1))
+    for i, resource in enumerate(resources):
+        np.cumsum(factors[resource] * (step_s / 3600.0), out=cumulative[i, 1:])
+    # rows x resources x horizons
+    emissions = rate_matrix[:, :, None] * cumulative[None, :, upto]
+
+    index = pd.MultiIndex.from_product(
+        [rates.index, horizons], names=[rates.index.name or "row", "horizon_h"]
+    )
+    frame = pd.DataFrame(
+        {c: np.zeros(len(index)) for c in CATEGORIES.values()}, index=index
+    )
+    for i, resource in enumerate(resources):
+        frame[CATEGORIES[resource]] = emissions[:, i, :].ravel()
+    frame["total_ghg"] = frame[list(TOTAL_GHG)].sum(axis=1)
+    return frame
@@ -0,0 +1,426 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from models import FLUE_PREFIX, LABEL_FIELDS, READING_FIELDS
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+_COLUMNS_SQL = ", ".join(_q(f) for f in READING_FIELDS)
+_LABELS_SQL = ", ".join(_q(f) for f in LABEL_FIELDS)
+_AVG_SQL = ", ".join(f"AVG({_q(f)})" for f in READING_FIELDS)
+# Late readings for a bucket that is already compacted are merged into its
+# row, each side weighted by its reading count
+_MERGE_SQL = ", ".join(
+    f"{_q(f)} = CASE WHEN {_q(f)} IS NULL THEN excluded.{_q(f)} "
+    f"WHEN excluded.{_q(f)} IS NULL THEN {_q(f)} "
+    f"ELSE ({_q(f)} * n + excluded.{_q(f)} * excluded.n) / (n + excluded.n) "
+    f"END"
+    for f in READING_FIELDS
+)
+_WEIGHTED_AVG_SQL = ", ".join(
+    f"SUM({_q(f)} * n) / SUM(CASE WHEN {_q(f)} IS NOT NULL THEN n END)"
+    for f in READING_FIELDS
+)
+
+
+def _select(columns: Sequence[str]) -> str:
+    unknown = set(columns) - set(READING_FIELDS) - set(LABEL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown reading fields: {sorted(unknown)}")
+    return (
+        _COLUMNS_SQL
+        if tuple(columns) == READING_FIELDS
+        else ", ".join(_q(f) for f in columns)
+    )
+
+
+def flatten_reading(reading: Dict[str, Any]) -> List[Optional[float]]:
+    flue = reading.get("flue_gas_comp") or {}
+    row = []
+    for field in READING_FIELDS:
+        if field.startswith(FLUE_PREFIX):
+            row.append(flue.get(field[len(FLUE_PREFIX):], reading.get(field)))
+        else:
+            row.append(reading.get(field))
+    return row
+
+
+def unflatten_reading(
+    row: Sequence[Any], names: Sequence[str]
+) -> Dict[str, Any]:
+    reading: Dict[str, Any] = {}
+    flue: Dict[str, float] = {}
+    for name, value in zip(names, row):
+        if name.startswith(FLUE_PREFIX):
+            if value is not None:
+                flue[name[len(FLUE_PREFIX):]] = value
+        elif value is not None:
+            reading[name] = value
+    reading["flue_gas_comp"] = flue
+    return reading
+
+
+class HistoryStore:
+    """Append-only SQLite store of raw readings, indexed by (asset_id, ts).
+
+    Raw rows also keep the reading's text labels (``LABEL_FIELDS``), which
+    can be selected like any field. Raw rows older than
+    ``downsample_after_s`` are folded into per-bucket averages (without
+    labels) in ``readings_downsampled``, one row per asset and bucket: late
+    readings for a compacted bucket are merged into it, weighted by count.
+    Downsampled rows older than ``retention_s`` are dropped. Reads take a
+    time range and optionally a limit; a range from 0 returns everything
+    kept, so walk long ranges with ``window_chunks``.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        retention_s: Optional[float] = None,
+        downsample_after_s: Optional[float] = None,
+        downsample_bucket_s: float = 3600,
+        compact_every: int = 10_000,
+        cache_kib: int = 16_384,
+    ):
+        self.path = path
+        self.retention_s = retention_s
+        self.downsample_after_s = downsample_after_s
+        self.downsample_bucket_s = downsample_bucket_s
+        self.compact_every = compact_every
+        self.version = 0
+        self._since_compact = 0
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute(f"PRAGMA cache_size = -{int(cache_kib)}")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS readings "
+            f"(asset_id TEXT NOT NULL, ts REAL NOT NULL, "
+            f"{', '.join(_q(f) + ' REAL' for f in READING_FIELDS)}, "
+            f"{', '.join(_q(f) + ' TEXT' for f in LABEL_FIELDS)})"
+        )
+        # Stores written before the labels were kept
+        # get the columns added (NULL for old rows)
+        existing = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(readings)")
+        }
+        for label in LABEL_FIELDS:
+            if label not in existing:
+                self._conn.execute(
+                    f"ALTER TABLE readings ADD COLUMN {_q(label)} TEXT"
+                )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS readings_asset_ts "
+            "ON readings (asset_id, ts)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS readings_ts ON readings (ts)"
+        )
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS readings_downsampled "
+            f"(asset_id TEXT NOT NULL, ts REAL NOT NULL, "
+            f"bucket_s REAL NOT NULL, n INTEGER NOT NULL, "
+            f"{', '.join(_q(f) + ' REAL' for f in READING_FIELDS)})"
+        )
+        indexes = {
+            row[1]
+            for row in self._conn.execute(
+                "PRAGMA index_list(readings_downsampled)"
+            )
+        }
+        if "readings_downsampled_bucket" not in indexes:
+            # Stores compacted before buckets were
+            # merged may hold several rows per bucket
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                f"CREATE TEMP TABLE merged AS SELECT asset_id, ts, "
+                f"MAX(bucket_s) AS bucket_s, SUM(n) AS n, {_WEIGHTED_AVG_SQL} "
+                f"FROM readings_downsampled GROUP BY asset_id, ts "
+                f"HAVING COUNT(*) > 1"
+            )
+            self._conn.execute(
+                "DELETE FROM readings_downsampled WHERE (asset_id, ts) IN "
+                "(SELECT asset_id, ts FROM merged)"
+            )
+            self._conn.execute(
+                f"INSERT INTO readings_downsampled "
+                f"(asset_id, ts, bucket_s, n, {_COLUMNS_SQL}) "
+                f"SELECT * FROM merged"
+            )
+            self._conn.execute("DROP TABLE merged")
+            self._conn.execute(
+                "DROP INDEX IF EXISTS readings_downsampled_asset_ts"
+            )
+            self._conn.execute(
+                "CREATE UNIQUE INDEX readings_downsampled_bucket "
+                "ON readings_downsampled (asset_id, ts)"
+            )
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --------- Writes ---------
+
+    def append(
+        self,
+        asset_id: str,
+        reading: Dict[str, Any],
+        ts: Optional[float] = None,
+    ) -> None:
+        self.append_batch(asset_id, [reading], None if ts is None else [ts])
+
+    def append_batch(self, asset_id: str, readings: Iterable[Dict[str, Any]],
+                     timestamps: Optional[Iterable[float]] = None) -> int:
+        readings = list(readings)
+        if timestamps is None:
+            now = time.time()
+            timestamps = [now] * len(readings)
+        rows = [
+            (
+                asset_id,
+                float(ts),
+                *flatten_reading(r),
+                *(r.get(f) for f in LABEL_FIELDS),
+            )
+            for r, ts in zip(readings, timestamps)
+        ]
+        return self._insert(rows)
+
+    def append_frame(self, frame: pd.DataFrame) -> int:
+        """Bulk insert a flat frame of ``asset_id``, ``ts`` and fields."""
+        if "flue_gas_comp" in frame.columns:
+            frame = pd.concat(
+                [
+                    frame.drop(columns="flue_gas_comp"),
+                    pd.json_normalize(frame["flue_gas_comp"].tolist())
+                    .add_prefix(FLUE_PREFIX)
+                    .set_index(frame.index),
+                ],
+                axis=1,
+            )
+        cols = frame.reindex(
+            columns=["asset_id", "ts", *READING_FIELDS, *LABEL_FIELDS]
+        ).astype(object)
+        cols = cols.where(cols.notna(), None)
+        return self._insert(list(cols.itertuples(index=False, name=None)))
+
+    def _insert(self, rows: List[tuple]) -> int:
+        if not rows:
+            return 0
+        placeholders = ", ".join(
+            "?" * (len(READING_FIELDS) + len(LABEL_FIELDS) + 2)
+        )
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                f"INSERT INTO readings "
+                f"(asset_id, ts, {_COLUMNS_SQL}, {_LABELS_SQL}) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+            self.version += 1
+            self._since_compact += len(rows)
+            if self._since_compact >= self.compact_every:
+                self.compact()
+        return len(rows)
+
+    # --------- Reads ---------
+
+    def latest(self, asset_id: str, n: int) -> List[Dict[str, Any]]:
+        """The trailing ``n`` raw readings for an asset, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ts, {_COLUMNS_SQL} FROM readings "
+                f"WHERE asset_id = ? ORDER BY ts DESC LIMIT ?",
+                (asset_id, int(n)),
+            ).fetchall()
+        return [self._to_reading(r) for r in reversed(rows)]
+
+    def window(self, asset_id: str, start: float, end: Optional[float] = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [
+            self._to_reading(r)
+            for r in self._window_rows(asset_id, start, end, limit)
+        ]
+
+    def latest_frame(self, asset_id: str, n: int) -> pd.DataFrame:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ts, {_COLUMNS_SQL} FROM readings "
+                f"WHERE asset_id = ? ORDER BY ts DESC LIMIT ?",
+                (asset_id, int(n)),
+            ).fetchall()
+        return self._to_frame(rows[::-1])
+
+    def window_frame(
+        self,
+        asset_id: str,
+        start: float,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Raw readings in [start, end), only ``columns`` if given."""
+        columns = READING_FIELDS if columns is None else columns
+        return self._to_frame(
+            self._window_rows(asset_id, start, end, limit, columns), columns
+        )
+
+    def window_chunks(
+        self,
+        asset_id: str,
+        start: float,
+        end: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+        chunk_rows: int = 50_000,
+    ) -> Iterator[pd.DataFrame]:
+        """Raw readings in [start, end) in ``chunk_rows`` frames, in order."""
+        columns = READING_FIELDS if columns is None else columns
+        sql = (
+            f"SELECT rowid, ts, {_select(columns)} FROM readings "
+            f"WHERE asset_id = ? AND ts >= ? AND ts < ? "
+            f"AND (ts, rowid) > (?, ?) ORDER BY ts, rowid LIMIT ?"
+        )
+        end = float("inf") if end is None else end
+        last = (start, -1)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    sql, (asset_id, start, end, *last, int(chunk_rows))
+                ).fetchall()
+            if rows:
+                last = (rows[-1][1], rows[-1][0])
+                yield self._to_frame([row[1:] for row in rows], columns)
+            if len(rows) < chunk_rows:
+                return
+
+    def downsampled_frame(
+        self,
+        asset_id: str,
+        start: float,
+        end: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+        counts: bool = False,
+    ) -> pd.DataFrame:
+        """Bucket averages in [start, end); ``counts`` adds column ``n``."""
+        columns = READING_FIELDS if columns is None else columns
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ts, {'n, ' if counts else ''}{_select(columns)} "
+                f"FROM readings_downsampled "
+                f"WHERE asset_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (asset_id, start, float("inf") if end is None else end),
+            ).fetchall()
+        return self._to_frame(rows, ["n", *columns] if counts else columns)
+
+    def series_frame(
+        self,
+        asset_id: str,
+        start: float,
+        end: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Compacted bucket averages, then the raw readings, ordered by ts."""
+        older = self.downsampled_frame(asset_id, start, end, columns)
+        recent = self.window_frame(asset_id, start, end, columns=columns)
+        if older.empty:
+            return recent
+        return (
+            pd.concat([older, recent], ignore_index=True)
+            if not recent.empty
+            else older
+        )
+
+    def assets(self) -> List[str]:
+        with self._lock:
+            return [
+                r[0]
+                for r in self._conn.execute(
+                    "SELECT asset_id FROM readings "
+                    "UNION SELECT asset_id FROM readings_downsampled"
+                )
+            ]
+
+    def count(self, asset_id: Optional[str] = None) -> int:
+        with self._lock:
+            if asset_id is None:
+                return self._conn.execute(
+                    "SELECT COUNT(*) FROM readings"
+                ).fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM readings WHERE asset_id = ?", (asset_id,)
+            ).fetchone()[0]
+
+    def _window_rows(
+        self, asset_id, start, end, limit, columns=READING_FIELDS
+    ):
+        sql = (f"SELECT ts, {_select(columns)} FROM readings "
+               f"WHERE asset_id = ? AND ts >= ? AND ts < ? ORDER BY ts")
+        params = [asset_id, start, float("inf") if end is None else end]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _to_reading(row) -> Dict[str, Any]:
+        reading = unflatten_reading(row[1:], READING_FIELDS)
+        reading["ts"] = row[0]
+        return reading
+
+    @staticmethod
+    def _to_frame(rows, columns=READING_FIELDS) -> pd.DataFrame:
+        return pd.DataFrame.from_records(
+            rows, columns=["ts", *columns], coerce_float=True
+        )
+
+    # --------- Retention ---------
+
+    def compact(self, now: Optional[float] = None) -> None:
+        """Downsample old raw rows and apply retention."""
+        now = time.time() if now is None else now
+        bucket = float(self.downsample_bucket_s)
+        with self._lock:
+            self._since_compact = 0
+            self._conn.execute("BEGIN")
+            if self.downsample_after_s is not None:
+                # Align to a bucket boundary; readings arriving after their
+                # bucket was compacted are merged into it on the next run
+                cutoff = (now - self.downsample_after_s) // bucket * bucket
+                self._conn.execute(
+                    f"INSERT INTO readings_downsampled "
+                    f"(asset_id, ts, bucket_s, n, {_COLUMNS_SQL}) "
+                    f"SELECT asset_id, CAST(ts / ? AS INTEGER) * ?, ?, "
+                    f"COUNT(*), {_AVG_SQL} FROM readings WHERE ts < ? "
+                    f"GROUP BY asset_id, CAST(ts / ? AS INTEGER) "
+                    f"ON CONFLICT (asset_id, ts) DO UPDATE SET "
+                    f"n = n + excluded.n, {_MERGE_SQL}",
+                    (bucket, bucket, bucket, cutoff, bucket),
+                )
+                self._conn.execute(
+                    "DELETE FROM readings WHERE ts < ?", (cutoff,)
+                )
+            if self.retention_s is not None:
+                cutoff = now - self.retention_s
+                self._conn.execute(
+                    "DELETE FROM readings WHERE ts < ?", (cutoff,)
+                )
+                self._conn.execute(
+                    "DELETE FROM readings_downsampled WHERE ts < ?", (cutoff,)
+                )
+            self._conn.execute("COMMIT")
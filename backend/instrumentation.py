@@ -0,0 +1,377 @@
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds of the histogram buckets (Prometheus "le"); +Inf is implicit
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+SIZE_BUCKETS = (
+    100,
+    1_000,
+    10_000,
+    100_000,
+    1_000_000,
+    10_000_000,
+    100_000_000,
+)
+# Innermost frames of threads that are parked rather than working
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    return ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+
+
+class Metrics:
+    """Request and stage latency histograms, call counts and payload sizes.
+
+    Requests are recorded by ``MetricsMiddleware`` per method and route
+    template (``/die-health``, not the raw URL), so label cardinality stays
+    bounded. Analytic stages are recorded with ``@metrics.timed(name)`` or
+    ``with metrics.stage(name):``; stages nest, so each stage's time includes
+    the stages it calls. ``render()`` is the Prometheus text exposition.
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = "dt"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._requests: Dict[Tuple[str, str], Histogram] = {}
+        self._request_sizes: Dict[Tuple[str, str], Histogram] = {}
+        self._response_sizes: Dict[Tuple[str, str], Histogram] = {}
+        self._statuses: Counter = Counter()
+        self._stages: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        request_bytes: int,
+        response_bytes: int,
+    ) -> None:
+        key = (method, route)
+        with self._lock:
+            latency = self._requests.get(key)
+            if latency is None:
+                latency = self._requests[key] = Histogram(LATENCY_BUCKETS)
+                self._request_sizes[key] = Histogram(SIZE_BUCKETS)
+                self._response_sizes[key] = Histogram(SIZE_BUCKETS)
+            latency.observe(seconds)
+            self._request_sizes[key].observe(request_bytes)
+            self._response_sizes[key].observe(response_bytes)
+            self._statuses[(method, route, status)] += 1
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = Histogram(LATENCY_BUCKETS)
+            hist.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - t0)
+
+    def timed(self, name: str) -> Callable:
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe_stage(name, time.perf_counter() - t0)
+            return wrapper
+        return decorate
+
+    def stage_summary(self) -> Dict[str, dict]:
+        # Call count and mean seconds per stage, for logs and ad-hoc checks
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "mean_s": h.sum / h.count if h.count else 0.0,
+                }
+                for name, h in self._stages.items()
+            }
+
+    def _histogram_lines(
+        self,
+        name: str,
+        help_: str,
+        label_names: Tuple[str, ...],
+        series: Dict[Tuple, Histogram],
+    ) -> List[str]:
+        lines = [f"# HELP {name} {help_}", f"# TYPE {name} histogram"]
+        for key, hist in sorted(series.items()):
+            labels = _labels(
+                label_names, key if isinstance(key, tuple) else (key,)
+            )
+            total = 0
+            for bound, count in zip((*hist.bounds, "+Inf"), hist.counts):
+                total += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.sum!r}")
+            lines.append(f"{name}_count{{{labels}}} {total}")
+        return lines
+
+    def render(self) -> str:
+        p = self.prefix
+        with self._lock:
+            requests = {k: _copy(h) for k, h in self._requests.items()}
+            request_sizes = {
+                k: _copy(h) for k, h in self._request_sizes.items()
+            }
+            response_sizes = {
+                k: _copy(h) for k, h in self._response_sizes.items()
+            }
+            statuses = dict(self._statuses)
+            stages = {k: _copy(h) for k, h in self._stages.items()}
+        lines = [f"# HELP {p}_http_requests_total Completed HTTP requests.",
+                 f"# TYPE {p}_http_requests_total counter"]
+        status_labels = ("method", "route", "status")
+        for key, count in sorted(statuses.items()):
+            labels = _labels(status_labels, key)
+            lines.append(f"{p}_http_requests_total{{{labels}}} {count}")
+        route = ("method", "route")
+        lines += self._histogram_lines(
+            f"{p}_http_request_duration_seconds",
+            "HTTP request latency.",
+            route,
+            requests,
+        )
+        lines += self._histogram_lines(
+            f"{p}_http_request_size_bytes",
+            "HTTP request body size.",
+            route,
+            request_sizes,
+        )
+        lines += self._histogram_lines(
+            f"{p}_http_response_size_bytes",
+            "HTTP response body size.",
+            route,
+            response_sizes,
+        )
+        lines += self._histogram_lines(
+            f"{p}_stage_duration_seconds",
+            "Analytic stage latency.",
+            ("stage",),
+            stages,
+        )
+        return "\n".join(lines) + "\n"
+
+
+def _copy(hist: Histogram) -> Histogram:
+    copy = Histogram(hist.bounds)
+    copy.counts = list(hist.counts)
+    copy.sum = hist.sum
+    return copy
+
+
+class SamplingProfiler:
+    """Samples thread stacks during requests; dumps them for slow ones.
+
+    A daemon thread records every other thread's stack each ``interval_s``,
+    but only while at least one request is active. A request that takes at
+    least ``slow_s`` gets the samples taken during it written to
+    ``out_dir`` as ``<ms>-<method>-<route>.folded`` (one ``a;b;c count``
+    line per stack, as read by flamegraph.pl and speedscope). Samples are
+    not attributed to a request, so concurrent requests appear in each
+    other's profiles. ``busy_s`` is the time spent sampling.
+
+    A sample holds the GIL, so it only records each thread's code objects;
+    they are turned into names when a slow request's profile is written.
+    """
+
+    def __init__(
+        self,
+        out_dir: str,
+        slow_s: float = 0.5,
+        interval_s: float = 0.01,
+        max_samples: int = 100_000,
+    ):
+        self.out_dir = out_dir
+        self.slow_s = slow_s
+        self.interval_s = interval_s
+        self.written = 0
+        self.busy_s = 0.0
+        self._samples: deque = deque(maxlen=max_samples)
+        self._names: Dict[object, str] = {}
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def begin(self) -> float:
+        with self._lock:
+            self._active += 1
+            self._wake.set()
+        return time.perf_counter()
+
+    def end(self, started: float, label: str) -> Optional[str]:
+        with self._lock:
+            self._active -= 1
+            if not self._active:
+                self._wake.clear()
+        if time.perf_counter() - started < self.slow_s:
+            return None
+        stacks = Counter(
+            codes for t, codes in list(self._samples) if t >= started
+        )
+        if not stacks:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")
+        path = os.path.join(
+            self.out_dir, f"{int(time.time() * 1000)}-{name}.folded"
+        )
+        with open(path, "w") as f:
+            f.writelines(
+                f"{self._fold(codes)} {count}\n"
+                for codes, count in stacks.most_common()
+            )
+        self.written += 1
+        return path
+
+    def _frame_name(self, code) -> str:
+        name = self._names.get(code)
+        if name is None:
+            filename = os.path.basename(code.co_filename)
+            name = self._names[code] = (
+                f"{code.co_name} ({filename}:{code.co_firstlineno})"
+            )
+        return name
+
+    def _fold(self, codes: Tuple) -> str:
+        return ";".join(self._frame_name(code) for code in reversed(codes))
+
+    @staticmethod
+    def _stack(frame) -> Optional[Tuple]:
+        # Code objects from the innermost frame out; None for a parked thread
+        if frame.f_code.co_filename.endswith(IDLE_FILES):
+            return None
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        return tuple(codes)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    codes = self._stack(frame)
+                    if codes is not None:
+                        self._samples.append((now, codes))
+            self.busy_s += time.perf_counter() - now
+            time.sleep(self.interval_s)
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding ``Metrics`` and a ``SamplingProfiler``."""
+
+    def __init__(
+        self,
+        app,
+        metrics: Metrics,
+        profiler: Optional[SamplingProfiler] = None,
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        response_bytes = 0
+
+        async def counting_send(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = self.profiler.begin() if self.profiler is not None else None
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - t0
+            # The router stores the matched route in the
+            # scope; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_bytes = 0
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    request_bytes = int(value)
+                    break
+            self.metrics.observe_request(
+                scope["method"],
+                route,
+                status,
+                elapsed,
+                request_bytes,
+                response_bytes,
+            )
+            if started is not None:
+                self.profiler.end(started, f"{scope['method']} {route}")
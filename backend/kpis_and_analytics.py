@@ -1,21 +1,50 @@
+import re
+from functools import lru_cache
+
 import numpy as np
-from typing import Dict, Any, List
+import pandas as pd
+from typing import Dict, Any, List, Optional, Union
+
+from emission_factors import get_registry
+from models import FLUE_GAS_SPECIES, READING_FIELDS, Reading, ReadingBatch
+
 
 def ingest_kpis(data: Dict[str, Any]) -> Dict[str, Any]:
-    electricity_per_unit = data.get("power_usage", 0) / max(data.get("production_output", 1), 1e-3)
-    furnace_thermal_eff = (data.get("production_output", 1) * data.get("furnace_temp", 1)) / (
-        data.get("power_usage", 1) + data.get("gas_consumption", 1) * 8.5)
+    electricity_per_unit = data.get("power_usage", 0) / max(
+        data.get("production_output", 1), 1e-3
+    )
+    furnace_thermal_eff = (
+        data.get("production_output", 1) * data.get("furnace_temp", 1)
+    ) / (data.get("power_usage", 1) + data.get("gas_consumption", 1) * 8.5)
     idle_energy = data.get("idle_power_usage", 0)
     peak_demand = data.get("peak_power", data.get("power_usage", 0))
-    water_per_unit = data.get("water_usage", 0) / max(data.get("production_output", 1), 1e-3)
-    gas_per_unit = data.get("gas_consumption", 0) / max(data.get("production_output", 1), 1e-3)
-    cooling_deltaT = data.get("cooling_water_out", 0) - data.get("cooling_water_in", 0)
-    scrap = max(data.get("material_input", 0) - data.get("production_output", 0), 0)
+    water_per_unit = data.get("water_usage", 0) / max(
+        data.get("production_output", 1), 1e-3
+    )
+    gas_per_unit = data.get("gas_consumption", 0) / max(
+        data.get("production_output", 1), 1e-3
+    )
+    cooling_deltaT = data.get("cooling_water_out", 0) - data.get(
+        "cooling_water_in", 0
+    )
+    scrap = max(
+        data.get("material_input", 0) - data.get("production_output", 0), 0
+    )
     scrap_rate = scrap / max(data.get("material_input", 1), 1e-3) * 100
-    first_pass_yield = data.get("production_output", 0) / max(data.get("material_input", 1), 1e-3) * 100
+    first_pass_yield = (
+        data.get("production_output", 0)
+        / max(data.get("material_input", 1), 1e-3)
+        * 100
+    )
     ghg = emissions_calc(data)
-    availability = max(1 - data.get("downtime", 0) / (data.get("runtime", 1) + 1e-3), 0)
-    performance = min(data.get("production_output", 0) / max(data.get("target_output", 1), 1e-3), 1)
+    availability = max(
+        1 - data.get("downtime", 0) / (data.get("runtime", 1) + 1e-3), 0
+    )
+    performance = min(
+        data.get("production_output", 0)
+        / max(data.get("target_output", 1), 1e-3),
+        1,
+    )
     oee = availability * performance * (first_pass_yield / 100)
     return {
         "electricity_per_unit": electricity_per_unit,
@@ -34,7 +63,10 @@ def ingest_kpis(data: Dict[str, Any]) -> Dict[str, Any]:
         "unplanned_downtime": data.get("downtime", 0),
         "maintenance_frequency": data.get("maintenance_count", 0),
         "mtbf": data.get("mtbf", None),
-        "throughput_rate": data.get("production_output", 0) / max(data.get("runtime", 1), 1e-3),
+        "throughput_rate": (
+            data.get("production_output", 0)
+            / max(data.get("runtime", 1), 1e-3)
+        ),
         "cycle_time": data.get("cycle_time", None),
         "die_temp": data.get("die_temp", None),
         "die_wear_rate": data.get("die_wear_rate", None),
@@ -43,23 +75,243 @@ def ingest_kpis(data: Dict[str, Any]) -> Dict[str, Any]:
         "furnace_temp": data.get("furnace_temp", 1200),  # For optimization
     }
 
+
+# Scalar-valued KPI fields copied straight through from the reading, with the
+# same defaults ingest_kpis uses (None becomes NaN in the batch output).
+_PASSTHROUGH_FIELDS = {
+    "idle_energy": ("idle_power_usage", 0),
+    "flue_gas_temperature": ("flue_gas_temp", None),
+    "unplanned_downtime": ("downtime", 0),
+    "maintenance_frequency": ("maintenance_count", 0),
+    "mtbf": ("mtbf", None),
+    "cycle_time": ("cycle_time", None),
+    "die_temp": ("die_temp", None),
+    "die_wear_rate": ("die_wear_rate", None),
+    "water_discharge_temp": ("water_discharge_temp", None),
+    "water_discharge_pH": ("water_discharge_pH", None),
+    "furnace_temp": ("furnace_temp", 1200),
+}
+
+# Reading fields behind each computed batch KPI,
+# so range queries can load only those columns
+KPI_INPUTS = {
+    "electricity_per_unit": ("power_usage", "production_output"),
+    "furnace_thermal_efficiency": (
+        "production_output",
+        "furnace_temp",
+        "power_usage",
+        "gas_consumption",
+    ),
+    "peak_demand": ("peak_power", "power_usage"),
+    "water_per_unit": ("water_usage", "production_output"),
+    "gas_per_unit": ("gas_consumption", "production_output"),
+    "cooling_water_deltaT": ("cooling_water_out", "cooling_water_in"),
+    "scrap_rate": ("material_input", "production_output"),
+    "first_pass_yield": ("production_output", "material_input"),
+    "oee": (
+        "downtime",
+        "runtime",
+        "production_output",
+        "target_output",
+        "material_input",
+    ),
+    "throughput_rate": ("production_output", "runtime"),
+}
+
+
+def kpi_inputs(names) -> Optional[List[str]]:
+    """Reading fields behind ``names``; None if any is unknown (load all)."""
+    fields = []
+    for name in names:
+        if name in KPI_INPUTS:
+            fields.extend(KPI_INPUTS[name])
+        elif name in _PASSTHROUGH_FIELDS:
+            fields.append(_PASSTHROUGH_FIELDS[name][0])
+        elif name in READING_FIELDS:
+            fields.append(name)
+        else:
+            return None
+    return list(dict.fromkeys(fields))
+
+
+def _batch_columns(
+    data: Union[pd.DataFrame, np.ndarray, ReadingBatch],
+) -> Dict[str, Any]:
+    # Normalise the supported batch inputs into a name -> array mapping.
+    if isinstance(data, ReadingBatch):
+        cols = dict(data.columns, ts=data.ts)
+        n = len(data)
+    elif isinstance(data, np.ndarray):
+        if data.dtype.names is None:
+            raise TypeError(
+                "ingest_kpis_batch expects a structured array "
+                "with named fields"
+            )
+        cols = {name: data[name] for name in data.dtype.names}
+        n = len(data)
+    elif isinstance(data, pd.DataFrame):
+        cols = {name: data[name].to_numpy() for name in data.columns}
+        n = len(data)
+    else:
+        raise TypeError(f"Unsupported batch type: {type(data).__name__}")
+    # Nested flue gas dicts (e.g. pd.DataFrame(list_of_readings)) are flattened
+    # into "flue_gas_comp.<species>" columns, matching pd.json_normalize.
+    nested = cols.pop("flue_gas_comp", None)
+    if nested is not None:
+        for species in FLUE_GAS_SPECIES:
+            cols.setdefault(
+                f"flue_gas_comp.{species}",
+                np.array(
+                    [
+                        d.get(species, 0) if isinstance(d, dict) else 0
+                        for d in nested
+                    ],
+                    dtype=float,
+                ),
+            )
+    cols["__len__"] = n
+    return cols
+
+
+def _col(cols: Dict[str, Any], name: str, default=None) -> np.ndarray:
+    # Missing columns and missing (NaN) cells both take the scalar default.
+    fill = np.nan if default is None else default
+    if name not in cols:
+        return np.full(cols["__len__"], fill, dtype=float)
+    values = np.asarray(cols[name], dtype=float)
+    if default is not None and np.isnan(values).any():
+        values = np.where(np.isnan(values), fill, values)
+    return values
+
+
+def emissions_calc_batch(cols: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    # Factors come from the shared registry; with a ts column, time-varying
+    # factors (e.g. hourly grid intensity) are looked up per reading.
+    ts = cols.get("ts")
+    EF = get_registry().factors(
+        ts=None if ts is None else np.asarray(ts, dtype=float)
+    )
+    scope_1 = _col(cols, "gas_consumption", 0) * EF["gas_consumption"]
+    scope_2 = _col(cols, "power_usage", 0) * EF["power_usage"]
+    water = _col(cols, "water_usage", 0) * EF["water_usage"]
+    return {
+        "scope_1": scope_1,
+        "scope_2": scope_2,
+        "water": water,
+        "material": _col(cols, "material_input", 0) * EF["material_input"],
+        "flue_CO2": _col(cols, "flue_gas_comp.CO2", 0),
+        "flue_NOx": _col(cols, "flue_gas_comp.NOx", 0),
+        "flue_SOx": _col(cols, "flue_gas_comp.SOx", 0),
+        "total_ghg": scope_1 + scope_2 + water
+    }
+
+
+def ingest_kpis_batch(
+    data: Union[pd.DataFrame, np.ndarray, ReadingBatch],
+) -> pd.DataFrame:
+    """Vectorised ingest_kpis over a frame, structured array or batch.
+
+    Returns one row per reading. The nested ``ghg_scope_1_2`` and
+    ``flue_gas_composition`` dicts of the scalar version are flattened into
+    ``ghg_<key>`` and ``flue_gas_comp.<species>`` columns.
+    """
+    cols = _batch_columns(data)
+    output = _col(cols, "production_output", 0)
+    output_or_1 = _col(cols, "production_output", 1)
+    material_in = _col(cols, "material_input", 0)
+    material_or_1 = _col(cols, "material_input", 1)
+    power = _col(cols, "power_usage", 0)
+    gas = _col(cols, "gas_consumption", 0)
+    downtime = _col(cols, "downtime", 0)
+    runtime_or_1 = _col(cols, "runtime", 1)
+
+    out_denom = np.maximum(output_or_1, 1e-3)
+    mat_denom = np.maximum(material_or_1, 1e-3)
+    first_pass_yield = output / mat_denom * 100
+    availability = np.maximum(1 - downtime / (runtime_or_1 + 1e-3), 0)
+    performance = np.minimum(
+        output / np.maximum(_col(cols, "target_output", 1), 1e-3), 1
+    )
+
+    kpis = {
+        "electricity_per_unit": power / out_denom,
+        "furnace_thermal_efficiency": (
+            output_or_1 * _col(cols, "furnace_temp", 1)
+            / (_col(cols, "power_usage", 1)
+               + _col(cols, "gas_consumption", 1) * 8.5)
+        ),
+        "peak_demand": _col(cols, "peak_power"),
+        "water_per_unit": _col(cols, "water_usage", 0) / out_denom,
+        "gas_per_unit": gas / out_denom,
+        "cooling_water_deltaT": (
+            _col(cols, "cooling_water_out", 0)
+            - _col(cols, "cooling_water_in", 0)
+        ),
+        "scrap_rate": np.maximum(material_in - output, 0) / mat_denom * 100,
+        "first_pass_yield": first_pass_yield,
+        "oee": availability * performance * (first_pass_yield / 100),
+        "throughput_rate": output / np.maximum(runtime_or_1, 1e-3),
+    }
+    # peak_power falls back to power_usage, as in the scalar version
+    kpis["peak_demand"] = np.where(
+        np.isnan(kpis["peak_demand"]), power, kpis["peak_demand"]
+    )
+    for kpi, (field, default) in _PASSTHROUGH_FIELDS.items():
+        kpis[kpi] = _col(cols, field, default)
+    for species in FLUE_GAS_SPECIES:
+        kpis[f"flue_gas_comp.{species}"] = _col(
+            cols, f"flue_gas_comp.{species}", 0
+        )
+    for key, values in emissions_calc_batch(cols).items():
+        kpis[f"ghg_{key}"] = values
+    index = data.index if isinstance(data, pd.DataFrame) else None
+    return pd.DataFrame(kpis, index=index)
+
+
+# Stateless checks on one snapshot as (KPI, comparison, limit, message);
+# durations and hysteresis are only enforced by alert_rules.AlertRuleEngine.
+ANALYTIC_ALERTS = (
+    ("scrap_rate", ">", 3,
+     "Scrap rate > 3% for 2 hrs: Send maintenance alert."),
+    ("flue_gas_temperature", ">", 350,
+     "High flue gas temperature: Check for heat loss or burner issue."),
+    ("water_per_unit", ">", 2,
+     "High water usage per unit: Inspect for leaks or cooling inefficiency."),
+    ("electricity_per_unit", ">", 0.5,
+     "High electricity consumption per unit: "
+     "Check for idle running or inefficiency."),
+    ("unplanned_downtime", ">", 2,
+     "Unplanned downtime exceeds 2 hrs/month: Investigate root cause."),
+    ("oee", "<", 0.7, "OEE below 70%: Investigate production bottlenecks."),
+)
+
+
 def analytic_alerts(kpis: Dict[str, Any]) -> list:
     alerts = []
-    if kpis.get("scrap_rate", 0) > 3:
-        alerts.append("Scrap rate > 3% for 2 hrs: Send maintenance alert.")
-    if kpis.get("flue_gas_temperature", 0) and kpis.get("flue_gas_temperature", 0) > 350:
-        alerts.append("High flue gas temperature: Check for heat loss or burner issue.")
-    if kpis.get("water_per_unit", 0) > 2:
-        alerts.append("High water usage per unit: Inspect for leaks or cooling inefficiency.")
-    if kpis.get("electricity_per_unit", 0) > 0.5:
-        alerts.append("High electricity consumption per unit: Check for idle running or inefficiency.")
-    if kpis.get("unplanned_downtime", 0) > 2:
-        alerts.append("Unplanned downtime exceeds 2 hrs/month: Investigate root cause.")
-    if kpis.get("oee", 1) < 0.7:
-        alerts.append("OEE below 70%: Investigate production bottlenecks.")
+    for kpi, op, limit, message in ANALYTIC_ALERTS:
+        value = kpis.get(kpi)
+        if value is not None and (
+            value > limit if op == ">" else value < limit
+        ):
+            alerts.append(message)
     return alerts
 
-def analytic_energy_optimization(kpis: Dict[str, Any], history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+
+def analytic_alerts_batch(kpis: pd.DataFrame) -> np.ndarray:
+    """Number of analytic_alerts raised per ingest_kpis_batch row."""
+    count = np.zeros(len(kpis), dtype=np.int64)
+    for kpi, op, limit, _ in ANALYTIC_ALERTS:
+        if kpi in kpis.columns:
+            values = kpis[kpi].to_numpy(dtype=float)
+            count += (values > limit) if op == ">" else (values < limit)
+    return count
+
+
+def analytic_energy_optimization(
+    kpis: Dict[str, Any],
+    history: List[Dict[str, Any]] = None,
+    rolling: Dict[str, Any] = None,
+) -> Dict[str, Any]:
     inefficiency_score = 0
     if kpis["electricity_per_unit"] > 0.5:
         inefficiency_score += 1
@@ -68,20 +320,25 @@ def analytic_energy_optimization(kpis: Dict[str, Any], history: List[Dict[str, A
     if kpis["idle_energy"] > 5:
         inefficiency_score += 1
     forecast = None
-    if history:
+    if rolling and len(rolling.get("electricity_per_unit", ())):
+        # Incrementally maintained window (see
+        # rolling_stats.RollingStats.asset)
+        forecast = rolling["electricity_per_unit"].mean()
+    elif history:
         try:
             y = np.array([h["electricity_per_unit"] for h in history])
             forecast = float(np.mean(y[-5:]))
         except Exception:
             forecast = None
-    return {"inefficiency_score": inefficiency_score, "electricity_forecast": forecast}
+    return {
+        "inefficiency_score": inefficiency_score,
+        "electricity_forecast": forecast,
+    }
+
 
 def emissions_calc(data: Dict[str, Any]) -> Dict[str, float]:
-    EF = {
-        "power_usage": 0.82,
-        "gas_consumption": 2.0,
-        "water_usage": 0.344,
-    }
+    # total_ghg is the operational footprint (emission_factors.TOTAL_GHG)
+    EF = get_registry().factors(ts=data.get("ts"))
     scope_1 = data.get("gas_consumption", 0) * EF["gas_consumption"]
     scope_2 = data.get("power_usage", 0) * EF["power_usage"]
     water = data.get("water_usage", 0) * EF["water_usage"]
@@ -93,31 +350,59 @@ def emissions_calc(data: Dict[str, Any]) -> Dict[str, float]:
         "scope_1": scope_1,
         "scope_2": scope_2,
         "water": water,
+        "material": data.get("material_input", 0) * EF["material_input"],
         "flue_CO2": co2,
         "flue_NOx": nox,
         "flue_SOx": sox,
         "total_ghg": scope_1 + scope_2 + water
     }
 
-def analytic_predictive_maintenance(data: Dict[str, Any], history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+
+def analytic_predictive_maintenance(
+    data: Dict[str, Any],
+    history: List[Dict[str, Any]] = None,
+    estimate: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    # Stateful callers pass the die's die_health.DieHealthEngine estimate
+    if estimate and estimate.get("rul_cycles") is not None:
+        return {
+            "die_rul_cycles": estimate["rul_cycles"],
+            "die_rul_cycles_p05": estimate["rul_cycles_p05"],
+            "wear": estimate["wear"],
+            "wear_per_cycle": estimate["wear_per_cycle"],
+            "model": "kalman",
+        }
     die_rul = None
     if data.get("die_wear_rate", 0) > 0.8:
         die_rul = 10
     elif data.get("die_wear_rate", 0) > 0:
         die_rul = 50
-    return {"die_rul_cycles": die_rul}
+    return {"die_rul_cycles": die_rul, "model": "threshold"}
 
-def analytic_process_simulation(data: Dict[str, Any], scenario: Dict[str, float]) -> Dict[str, Any]:
-    simulated = data.copy()
+
+def analytic_process_simulation(
+    data: Dict[str, Any], scenario: Dict[str, float]
+) -> Dict[str, Any]:
+    simulated = data.to_dict() if isinstance(data, Reading) else data.copy()
     simulated.update(scenario)
     return ingest_kpis(simulated)
 
-def full_analytics(data: Dict[str, Any], history: List[Dict[str, Any]] = None, scenario: Dict[str, float] = None) -> Dict[str, Any]:
+
+def full_analytics(
+    data: Dict[str, Any],
+    history: List[Dict[str, Any]] = None,
+    scenario: Dict[str, float] = None,
+    rolling: Dict[str, Any] = None,
+    alerts: List[str] = None,
+    maintenance: Dict[str, Any] = None,
+) -> Dict[str, Any]:
     kpis = ingest_kpis(data)
-    alerts = analytic_alerts(kpis)
-    energy_opt = analytic_energy_optimization(kpis, history)
+    # Stateful callers pass the alerts raised by alert_rules.AlertRuleEngine
+    if alerts is None:
+        alerts = analytic_alerts(kpis)
+    energy_opt = analytic_energy_optimization(kpis, history, rolling)
     emissions = kpis["ghg_scope_1_2"]
-    maintenance = analytic_predictive_maintenance(data, history)
+    maintenance = analytic_predictive_maintenance(data, history, maintenance)
     simulation = None
     if scenario:
         simulation = analytic_process_simulation(data, scenario)
@@ -130,9 +415,13 @@ def full_analytics(data: Dict[str, Any], history: List[Dict[str, Any]] = None, s
         "whatif_simulation": simulation
     }
 
+
 # --------- New Features Below ---------
 
-def closed_loop_optimization(kpis: Dict[str, Any], history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+
+def closed_loop_optimization(
+    kpis: Dict[str, Any], history: List[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     # Simple logic: optimize temp based on OEE/scrap
     oee = kpis.get("oee", 0.8)
     scrap = kpis.get("scrap_rate", 1.5)
@@ -149,27 +438,84 @@ def closed_loop_optimization(kpis: Dict[str, Any], history: List[Dict[str, Any]]
         rec["reason"] = "Current settings optimal"
     return rec
 
-def ai_sop_recommendation(history: List[Dict[str, Any]]) -> str:
+
+def ai_sop_recommendation(
+    history: List[Dict[str, Any]], basis: str = ""
+) -> str:
+    # history: batches to choose from, e.g. BatchIndex.top_k results; basis
+    # describes how they were selected
     if not history:
-        return "No batch history available."
-    best_batch = max(history, key=lambda h: h.get("oee", 0))
-    temp = best_batch.get("furnace_temp", "N/A")
-    cycle = best_batch.get("cycle_time", "N/A")
-    return f"Best practice: Furnace Temp = {temp:.1f}°C, Cycle Time = {cycle:.2f}min (based on highest OEE batch)"
-
-def digital_worker_assistant(query: str, kpis: Dict[str, Any], history: List[Dict[str, Any]] = None) -> str:
-    q = query.lower()
-    if "alert" in q:
-        return "Current critical alerts: " + ("; ".join(analytic_alerts(kpis)) if analytic_alerts(kpis) else "No alerts.")
-    elif "trend" in q or "scrap" in q:
-        if history:
-            trend = np.mean([h.get("scrap_rate", 0) for h in history[-10:]])
-            return f"Scrap rate trend (last 10): {trend:.2f}%"
-        else:
-            return f"Scrap rate (current): {kpis.get('scrap_rate', 0):.2f}%"
-    elif "oee" in q:
-        return f"Current OEE: {kpis.get('oee', 0)*100:.2f}%"
-    elif "recommend" in q or "sop" in q:
+        return "No batch history available" + (f" {basis}." if basis else ".")
+    best_batch = max(history, key=lambda h: h.get("oee") or 0)
+    temp = best_batch.get("furnace_temp")
+    cycle = best_batch.get("cycle_time")
+    temp = "N/A" if temp is None else f"{temp:.1f}°C"
+    cycle = "N/A" if cycle is None else f"{cycle:.2f}min"
+    basis = f" {basis}" if basis else ""
+    return (
+        f"Best practice: Furnace Temp = {temp}, Cycle Time = {cycle} "
+        f"(based on highest OEE batch{basis})"
+    )
+
+
+# Assistant intents in priority order, all matched in one pass over the query
+ASSISTANT_INTENTS = ("alert", "trend", "oee", "sop")
+_INTENT_RE = re.compile(
+    r"(?P<alert>alert)|(?P<trend>trend|scrap)|(?P<oee>oee)"
+    r"|(?P<sop>recommend|sop)",
+    re.IGNORECASE,
+)
+ASSISTANT_HELP = (
+    "I'm your digital assistant. "
+    "Ask about alerts, trends, OEE, or best practices!"
+)
+
+
+@lru_cache(maxsize=4096)
+def assistant_intent(query: str) -> Optional[str]:
+    found = {m.lastgroup for m in _INTENT_RE.finditer(query)}
+    return next(
+        (intent for intent in ASSISTANT_INTENTS if intent in found), None
+    )
+
+
+def alerts_answer(alerts: List[str]) -> str:
+    return "Current critical alerts: " + (
+        "; ".join(alerts) if alerts else "No alerts."
+    )
+
+
+def scrap_trend_answer(
+    kpis: Dict[str, Any],
+    history: List[Dict[str, Any]] = None,
+    rolling: Dict[str, Any] = None,
+) -> str:
+    if rolling and len(rolling.get("scrap_rate", ())):
+        window = rolling["scrap_rate"]
+        return f"Scrap rate trend (last {len(window)}): {window.mean():.2f}%"
+    elif history:
+        trend = np.mean([h.get("scrap_rate", 0) for h in history[-10:]])
+        return f"Scrap rate trend (last 10): {trend:.2f}%"
+    return f"Scrap rate (current): {kpis.get('scrap_rate', 0):.2f}%"
+
+
+def oee_answer(kpis: Dict[str, Any]) -> str:
+    return f"Current OEE: {kpis.get('oee', 0)*100:.2f}%"
+
+
+def digital_worker_assistant(
+    query: str,
+    kpis: Dict[str, Any],
+    history: List[Dict[str, Any]] = None,
+    rolling: Dict[str, Any] = None,
+) -> str:
+    intent = assistant_intent(query)
+    if intent == "alert":
+        return alerts_answer(analytic_alerts(kpis))
+    elif intent == "trend":
+        return scrap_trend_answer(kpis, history, rolling)
+    elif intent == "oee":
+        return oee_answer(kpis)
+    elif intent == "sop":
         return ai_sop_recommendation(history or [])
-    else:
-        return "I'm your digital assistant. Ask about alerts, trends, OEE, or best practices!"
+    return ASSISTANT_HELP
@@ -1,37 +1,1151 @@
-from fastapi import FastAPI, Query, Request
-from sample_data import generate_sample_data
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sample_data import SyntheticPlant, generate_sample_data
+from history_store import HistoryStore
+from rolling_stats import RollingStats
+from scada_client import (
+    IngestionPipeline,
+    SimulatedPLCSource,
+    ReplaySource,
+    SyntheticSource,
+    fetch_scada_data,
+    get_pipeline,
+    readings_frame,
+    run_sinks,
+    set_pipeline,
+)
+from scenario_sweep import (
+    scenario_sweep,
+    DEFAULT_OBJECTIVES,
+    METHODS as SWEEP_METHODS,
+    SWEEP_PARAMETERS,
+)
+from result_cache import ResultCache
+from streaming import KpiBroadcaster
+from alert_rules import AlertRuleEngine, DEFAULT_RULES_PATH
+from models import AssetRegistry, LABEL_FIELDS, READING_FIELDS
+from emission_factors import (
+    CATEGORIES,
+    EmissionFactorRegistry,
+    get_registry,
+    set_registry,
+)
+from ghg_projection import PERIODS, emissions_report, interval_usage
+from plant_analytics import (
+    plant_analytics,
+    shutdown_pools,
+    MODES as PLANT_MODES,
+)
+from setpoint_optimizer import SetpointOptimizer
+from die_health import DieHealthEngine
+from anomaly import AnomalyDetector
+from assistant import AssistantContexts
+from batch_index import PROCESS_PARAMS, BatchIndex
+from rollups import RESOURCES as ROLLUP_RESOURCES, ROLLUP_PERIODS, RollupStore
+from downsample import METHODS as DOWNSAMPLE_METHODS, downsample_frame
+from instrumentation import Metrics, MetricsMiddleware, SamplingProfiler
+from ml.optimizer import recommend_batch, simulate_optimized_batch
+from ml.surrogate import DEFAULT_MODEL_DIR, get_surrogate
+from ml.train import train_from_store
 from kpis_and_analytics import (
-    full_analytics, closed_loop_optimization, ai_sop_recommendation, digital_worker_assistant
+    full_analytics,
+    closed_loop_optimization,
+    ai_sop_recommendation,
+    ingest_kpis,
+    ingest_kpis_batch,
+    kpi_inputs,
+    scrap_trend_answer,
 )
 import numpy as np
+import pandas as pd
 
-app = FastAPI()
+DEFAULT_ASSET = "press-1"
+# Until a site configuration is loaded, model a synthetic plant layout
+registry = AssetRegistry.synthetic(
+    plants=int(os.environ.get("DT_SYNTHETIC_PLANTS", 1))
+)
+store = HistoryStore(
+    os.environ.get("DT_HISTORY_DB", "history.db"),
+    retention_s=float(
+        os.environ.get("DT_HISTORY_RETENTION_S", 2 * 365 * 86400)
+    ),
+    downsample_after_s=float(os.environ.get("DT_HISTORY_RAW_S", 7 * 86400)),
+)
+rolling = RollingStats()
+cache = ResultCache(
+    max_entries=int(os.environ.get("DT_CACHE_ENTRIES", 1024)),
+    ttl_s=float(os.environ.get("DT_CACHE_TTL_S", 5.0)),
+)
+alert_engine = AlertRuleEngine.from_file(
+    os.environ.get("DT_ALERT_RULES", DEFAULT_RULES_PATH)
+)
+alert_events = deque(maxlen=1000)
+broadcaster = KpiBroadcaster(
+    alerts_fn=lambda asset_id, kpis: alert_engine.active_messages(asset_id)
+)
+if os.environ.get("DT_EMISSION_FACTORS"):
+    set_registry(
+        EmissionFactorRegistry.from_file(os.environ["DT_EMISSION_FACTORS"])
+    )
+if os.environ.get("DT_GRID_INTENSITY_CSV"):
+    # Hourly grid-carbon intensity (kg CO2e/kWh) for scope 2
+    get_registry().load_series_csv(
+        "power_usage", os.environ["DT_GRID_INTENSITY_CSV"]
+    )
+MODEL_DIR = os.environ.get("DT_MODEL_DIR", DEFAULT_MODEL_DIR)
+setpoint_optimizer = SetpointOptimizer(
+    budget_s=float(os.environ.get("DT_CLOSED_LOOP_BUDGET_MS", 50)) / 1e3,
+    refit_s=float(os.environ.get("DT_CLOSED_LOOP_REFIT_S", 300)),
+)
+die_health = DieHealthEngine(
+    wear_limit=float(os.environ.get("DT_DIE_WEAR_LIMIT", 1.0)),
+    obs_noise=float(os.environ.get("DT_DIE_WEAR_NOISE", 1e-2)),
+)
+anomaly_detector = AnomalyDetector(
+    threshold=float(os.environ.get("DT_ANOMALY_THRESHOLD", 50)),
+    alpha=float(os.environ.get("DT_ANOMALY_ALPHA", 0.01)),
+)
+anomaly_events = deque(maxlen=1000)
+batch_index = BatchIndex()
+BATCH_INDEX_DAYS = float(os.environ.get("DT_BATCH_INDEX_DAYS", 90))
+_batch_index_warm = threading.Event()
+_batch_index_lock = threading.Lock()
+# Same database file as the history by default, in its own table
+rollups = RollupStore(
+    os.environ.get("DT_ROLLUP_DB", store.path),
+    group_of=lambda asset_id: registry.locate(asset_id)["plant_id"],
+)
+_rollups_warm = threading.Event()
+_rollups_lock = threading.Lock()
+# Downsampled range series are cached on a TTL
+# only: one new reading barely moves a long chart
+series_cache = ResultCache(
+    max_entries=256, ttl_s=float(os.environ.get("DT_SERIES_TTL_S", 30.0))
+)
+CLOSED_LOOP_WINDOW = int(os.environ.get("DT_CLOSED_LOOP_WINDOW", 2000))
+# A sampled reading invalidates the asset's cached results, so by default
+# sample no faster than they live
+SAMPLE_INTERVAL_S = float(os.environ.get("DT_SAMPLE_INTERVAL_S", cache.ttl_s))
+_last_sample = {}
+_sample_lock = threading.Lock()
+metrics = Metrics(enabled=os.environ.get("DT_METRICS", "1") != "0")
+# Opt-in: folded stacks of requests slower
+# than DT_PROFILE_SLOW_MS go to DT_PROFILE_DIR
+profiler = SamplingProfiler(
+    os.environ.get("DT_PROFILE_DIR", "profiles"),
+    slow_s=float(os.environ["DT_PROFILE_SLOW_MS"]) / 1e3,
+    interval_s=float(os.environ.get("DT_PROFILE_INTERVAL_MS", 10)) / 1e3,
+) if os.environ.get("DT_PROFILE_SLOW_MS") else None
 
-@app.get("/full-analytics")
-def get_full_analytics():
-    data = generate_sample_data()
-    history = [generate_sample_data() for _ in range(10)]
+
+def warm_rolling(asset_id: str) -> None:
+    # Seed the rolling windows from what the store already holds
+    if asset_id not in rolling:
+        history = store.latest_frame(asset_id, rolling.default_window)
+        if not history.empty:
+            rolling.update_frame(asset_id, ingest_kpis_batch(history))
+
+
+def warm_batch_index() -> None:
+    # Once, before the first batch is added: index what the store already holds
+    if _batch_index_warm.is_set():
+        return
+    with _batch_index_lock:
+        if _batch_index_warm.is_set():
+            return
+        since = time.time() - BATCH_INDEX_DAYS * 86400
+        columns = [
+            *sorted(
+                set(kpi_inputs(["oee"]) or READING_FIELDS)
+                | set(PROCESS_PARAMS)
+            ),
+            *LABEL_FIELDS,
+        ]
+        for asset_id in store.assets():
+            for frame in store.window_chunks(asset_id, since, columns=columns):
+                frame.insert(0, "asset_id", asset_id)
+                batch_index.add_frame(frame, ingest_kpis_batch(frame))
+        _batch_index_warm.set()
+
+
+def current_labels(asset_id: str) -> dict:
+    # The part and alloy of the asset's newest
+    # batch: a sampled reading continues that run
+    warm_batch_index()
+    current = batch_index.latest(asset_id)
+    return (
+        {}
+        if current is None
+        else {f: current[f] for f in LABEL_FIELDS if current[f]}
+    )
+
+
+def batch_index_sink(readings, kpis):
+    # Each reading closes one batch; runs before
+    # store_sink so warming does not index it twice
+    warm_batch_index()
+    batch_index.add_frame(readings, kpis)
+
+
+def warm_rollups() -> None:
+    # Once: if the rollups are new but the store
+    # is not, total up what the store holds
+    if _rollups_warm.is_set():
+        return
+    with _rollups_lock:
+        if _rollups_warm.is_set():
+            return
+        if rollups.empty():
+            columns = list(ROLLUP_RESOURCES)
+            for asset_id in store.assets():
+                # Raw readings first: the gap before the first
+                # one is not taken from a compacted bucket
+                for recent in store.window_chunks(
+                    asset_id, 0.0, columns=columns
+                ):
+                    rollups.add_frame(recent.assign(asset_id=asset_id))
+                older, weights = compacted_frame(
+                    asset_id, 0.0, columns=columns
+                )
+                if not older.empty:
+                    rollups.add_frame(
+                        older.assign(asset_id=asset_id), weights=weights
+                    )
+        _rollups_warm.set()
+
+
+def compacted_frame(asset_id: str, start: float, end: Optional[float] = None,
+                    columns: Optional[List[str]] = None) -> tuple:
+    # Bucket averages of n readings each, together
+    # covering at most the bucket; returns (frame, n)
+    older = store.downsampled_frame(
+        asset_id, start, end, columns=columns, counts=True
+    )
+    weights = older.pop("n").to_numpy(dtype=float)
+    interval_s = np.minimum(
+        rollups.default_interval_s,
+        store.downsample_bucket_s / np.maximum(weights, 1),
+    )
+    return older.assign(interval_s=interval_s), weights
+
+
+def usage_history(
+    asset_id: str, start: float, end: Optional[float] = None
+) -> tuple:
+    # Resource use per row over raw and compacted history, counted as the
+    # rollups count it; returns (usage, n)
+    intervals = {
+        "default_interval_s": rollups.default_interval_s,
+        "max_interval_s": rollups.max_interval_s,
+    }
+    recent = interval_usage(
+        store.window_frame(asset_id, start, end), **intervals
+    )
+    older, weights = compacted_frame(asset_id, start, end)
+    older = interval_usage(older, **intervals)
+    for resource in older.columns.intersection(list(CATEGORIES)):
+        older[resource] = older[resource].to_numpy(dtype=float) * weights
+    if older.empty:
+        return recent, np.ones(len(recent))
+    return (
+        pd.concat([older, recent], ignore_index=True),
+        np.r_[weights, np.ones(len(recent))],
+    )
+
+
+def rollup_sink(readings, kpis):
+    # Before store_sink, like batch_index_sink,
+    # so warming does not count the batch twice
+    warm_rollups()
+    rollups.add_frame(readings)
+
+
+def store_sink(readings, kpis):
+    store.append_frame(readings)
+    for asset_id in readings["asset_id"].unique():
+        cache.invalidate(asset_id)
+
+
+def rolling_sink(readings, kpis):
+    for asset_id, asset_kpis in kpis.groupby("asset_id", sort=False):
+        warm_rolling(asset_id)
+        rolling.update_frame(asset_id, asset_kpis)
+
+
+def alert_sink(readings, kpis):
+    alert_events.extend(alert_engine.evaluate_frame(kpis))
+
+
+def die_health_sink(readings, kpis):
+    # Wear belongs to the die mounted in the press
+    # (or the reading's die_id); furnaces have no die
+    asset_ids = readings["asset_id"]
+    dies = asset_ids.map({a: registry.die_for(a) for a in asset_ids.unique()})
+    if "die_id" in readings.columns:
+        dies = readings["die_id"].where(readings["die_id"].notna(), dies)
+    mounted = dies.notna().to_numpy()
+    if mounted.any():
+        die_health.update_frame(
+            readings[mounted].assign(die_id=dies[mounted]), key="die_id"
+        )
+
+
+def die_estimate(asset_id: str) -> Optional[dict]:
+    die_id = registry.die_for(asset_id)
+    return None if die_id is None else die_health.estimate(die_id)
+
+
+def anomaly_sink(readings, kpis):
+    anomaly_events.extend(
+        anomaly_detector.update_frame(readings).to_dict("records")
+    )
+
+
+def stream_sink(readings, kpis):
+    broadcaster.publish_frame(kpis)
+
+
+# Every ingested batch, from the pipeline or a sampled reading, goes through
+# the same sinks in this order
+SINKS = [
+    rolling_sink,
+    batch_index_sink,
+    rollup_sink,
+    store_sink,
+    alert_sink,
+    die_health_sink,
+    anomaly_sink,
+    stream_sink,
+]
+sampled_sink_errors = {}
+
+
+def build_pipeline(spec: str) -> IngestionPipeline:
+    # DT_SCADA_SOURCE is "simulated", "synthetic"
+    # or the path of a CSV/Parquet file to replay
+    speed = float(os.environ.get("DT_REPLAY_SPEED", 1.0)) or None
+    if spec == "simulated":
+        assets = os.environ.get("DT_SCADA_ASSETS", DEFAULT_ASSET).split(",")
+        source = SimulatedPLCSource(
+            assets, rate_hz=float(os.environ.get("DT_SCADA_RATE_HZ", 1.0))
+        )
+    elif spec == "synthetic":
+        # Correlated plant data with shifts, drift and faults; DT_REPLAY_SPEED
+        # simulated seconds per second
+        assets = os.environ.get("DT_SCADA_ASSETS")
+        plant = SyntheticPlant(
+            assets.split(",") if assets else list(registry.presses),
+            interval_s=float(os.environ.get("DT_SYNTHETIC_INTERVAL_S", 60)),
+            start_ts=time.time(),
+            seed=int(os.environ.get("DT_SYNTHETIC_SEED", 0)),
+        )
+        source = SyntheticSource(plant, speed=speed)
+    else:
+        source = ReplaySource(spec, speed=speed)
+    return IngestionPipeline(source, sinks=SINKS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    broadcaster.attach(asyncio.get_running_loop())
+    spec = os.environ.get("DT_SCADA_SOURCE")
+    if spec:
+        pipeline = build_pipeline(spec)
+        set_pipeline(pipeline)
+        await pipeline.start()
+    yield
+    if get_pipeline() is not None:
+        await get_pipeline().stop()
+        set_pipeline(None)
+    shutdown_pools()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, metrics=metrics, profiler=profiler)
+
+
+def ingest_reading(asset_id: str) -> dict:
+    return ingest_readings([asset_id])[asset_id]
+
+
+@metrics.timed("ingest_reading")
+def ingest_readings(asset_ids: List[str]) -> dict:
+    # Latest reading per asset from the live source. Without one, synthesize a
+    # reading at most every SAMPLE_INTERVAL_S, as a polled sensor would, so
+    # repeated requests can share cached results; the new ones go through the
+    # sinks as one batch, like a pipeline batch.
+    latest, due = {}, []
+    for asset_id in asset_ids:
+        try:
+            latest[asset_id] = fetch_scada_data(asset_id)
+        except (NotImplementedError, LookupError):
+            due.append(asset_id)
+    if due:
+        with _sample_lock:
+            now = time.monotonic()
+            fresh = []
+            for asset_id in dict.fromkeys(due):
+                last = _last_sample.get(asset_id)
+                if last is not None and now - last[0] < SAMPLE_INTERVAL_S:
+                    latest[asset_id] = last[1]
+                else:
+                    fresh.append(asset_id)
+            if fresh:
+                with metrics.stage("sample_data"):
+                    samples = [generate_sample_data() for _ in fresh]
+                ts = time.time()
+                with metrics.stage("ingest_kpis"):
+                    readings, kpis = readings_frame(
+                        [
+                            (
+                                asset_id,
+                                ts,
+                                {**data, **current_labels(asset_id)},
+                            )
+                            for asset_id, data in zip(fresh, samples)
+                        ]
+                    )
+                run_sinks(SINKS, readings, kpis, sampled_sink_errors)
+                for asset_id, data in zip(fresh, samples):
+                    _last_sample[asset_id] = (now, data)
+                    latest[asset_id] = data
+    return {asset_id: latest[asset_id] for asset_id in asset_ids}
+
+
+@metrics.timed("kpi_history")
+def kpi_history(asset_id: str, n: int) -> list:
+    frame = store.latest_frame(asset_id, n)
+    if frame.empty:
+        return []
+    return ingest_kpis_batch(frame).to_dict("records")
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def cached_response(
+    request: Request, key: tuple, asset_id: str, compute
+) -> Response:
+    # Serve from the shared result cache, honouring If-None-Match.
+    entry = cache.get_or_compute(key, asset_id, compute)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+@metrics.timed("full_analytics")
+def asset_analytics(asset_id: str, data: dict) -> dict:
     scenario = {"gas_consumption": data["gas_consumption"] * 0.9}
-    result = full_analytics(data, history=history, scenario=scenario)
-    return result
+    return full_analytics(
+        data,
+        scenario=scenario,
+        rolling=rolling.asset(asset_id),
+        alerts=alert_engine.active_messages(asset_id),
+        maintenance=die_estimate(asset_id),
+    )
+
+
+@app.get("/full-analytics")
+def get_full_analytics(request: Request, asset_id: str = Query(DEFAULT_ASSET)):
+    data = ingest_reading(asset_id)
+    return cached_response(
+        request,
+        ("full-analytics", asset_id),
+        asset_id,
+        lambda: asset_analytics(asset_id, data),
+    )
+
+
+@app.get("/die-health")
+def get_die_health(
+    die_id: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=10_000),
+):
+    # One die, or the dies closest to their wear
+    # limit (lowest conservative RUL first)
+    if die_id is not None:
+        estimate = die_health.estimate(die_id)
+        if estimate is None:
+            return Response(
+                status_code=404, content=f"No readings for die {die_id!r}"
+            )
+        return {"die_id": die_id, **estimate}
+    frame = (
+        die_health.estimates()
+        .sort_values("rul_cycles_p05", na_position="last")
+        .head(limit)
+        .reset_index()
+    )
+    dies = frame.astype(object).where(frame.notna(), None).to_dict("records")
+    return {"dies": dies, "tracked": len(die_health)}
+
+
+@app.get("/anomalies")
+def get_anomalies(
+    asset_id: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=1000),
+    top: int = Query(3, ge=1, le=20),
+):
+    # One asset's latest score and top contributing signals, or the
+    # highest-scoring assets and recent flags
+    if asset_id is not None:
+        state = anomaly_detector.explain(asset_id, top=top)
+        if state is None:
+            return Response(
+                status_code=404, content=f"No readings for asset {asset_id!r}"
+            )
+        return state
+    frame = (
+        anomaly_detector.scores()
+        .sort_values("score", ascending=False, na_position="last")
+        .head(limit)
+    )
+    return {
+        "assets": [anomaly_detector.explain(a, top=top) for a in frame.index],
+        "events": list(anomaly_events)[-limit:][::-1],
+        "threshold": anomaly_detector.threshold,
+        "tracked": len(anomaly_detector),
+    }
+
+
+@metrics.timed("setpoint_optimizer")
+def model_setpoints(asset_id: str, data: dict) -> Optional[dict]:
+    # Response model refreshed from recent history every refit_s; None until
+    # there is enough of it. A failed fit (too little or too uniform history)
+    # is not retried before refit_s either.
+    if setpoint_optimizer.needs_fit(asset_id):
+        try:
+            setpoint_optimizer.fit(
+                asset_id, store.latest_frame(asset_id, CLOSED_LOOP_WINDOW)
+            )
+        except ValueError:
+            pass
+    if setpoint_optimizer.model(asset_id) is None:
+        return None
+    return setpoint_optimizer.step(asset_id, data)
+
 
 @app.get("/closed-loop-optimization")
-def get_closed_loop_optimization():
-    data = generate_sample_data()
-    kpis = full_analytics(data)["kpis"]
-    return closed_loop_optimization(kpis)
+def get_closed_loop_optimization(
+    request: Request,
+    asset_id: str = Query(DEFAULT_ASSET),
+    mode: str = Query("model"),
+):
+    if mode not in ("model", "rule"):
+        return Response(
+            status_code=422, content="mode must be 'model' or 'rule'"
+        )
+    data = ingest_reading(asset_id)
+    return cached_response(
+        request,
+        ("closed-loop-optimization", asset_id, mode),
+        asset_id,
+        lambda: closed_loop_setpoints(asset_id, data, mode),
+    )
+
+
+def closed_loop_setpoints(
+    asset_id: str, data: dict, mode: str = "model"
+) -> dict:
+    result = model_setpoints(asset_id, data) if mode == "model" else None
+    if result is None:
+        kpis = full_analytics(data)["kpis"]
+        result = {"mode": "rule", **closed_loop_optimization(kpis)}
+    return result
+
 
 @app.get("/ai-sop-recommendation")
-def get_ai_sop_recommendation():
-    history = [generate_sample_data() for _ in range(15)]
-    return {"recommendation": ai_sop_recommendation(history)}
+def get_ai_sop_recommendation(
+    request: Request,
+    asset_id: str = Query(DEFAULT_ASSET),
+    part_number: Optional[str] = Query(None),
+    alloy: Optional[str] = Query(None),
+    days: float = Query(BATCH_INDEX_DAYS, gt=0),
+    k: int = Query(5, ge=1, le=100),
+    any_press: bool = Query(False),
+):
+    # Best and most similar past batches for this press
+    # (or any press with any_press) and part; part_number
+    # defaults to the part the press is running now
+    ingest_reading(asset_id)
+    return cached_response(
+        request,
+        (
+            "ai-sop-recommendation",
+            asset_id,
+            part_number,
+            alloy,
+            days,
+            k,
+            any_press,
+        ),
+        asset_id,
+        lambda: sop_recommendation(
+            asset_id, part_number, alloy, days, k, any_press
+        ),
+    )
+
+
+@metrics.timed("sop_recommendation")
+def sop_recommendation(
+    asset_id: str,
+    part_number: Optional[str] = None,
+    alloy: Optional[str] = None,
+    days: float = BATCH_INDEX_DAYS,
+    k: int = 5,
+    any_press: bool = False,
+) -> dict:
+    warm_batch_index()
+    current = batch_index.latest(asset_id)
+    if part_number is None and current is not None and current["part_number"]:
+        part_number = current["part_number"]
+    # "Last N days" of batch history, so replayed
+    # data is measured from its own newest batch
+    newest = batch_index.newest_ts()
+    since = None if newest is None else newest - days * 86400
+    filters = {"part_number": part_number, "alloy": alloy, "since": since}
+    best = batch_index.top_k(
+        k, asset_id=None if any_press else asset_id, **filters
+    )
+    similar = []
+    if current is not None:
+        similar = [
+            b
+            for b in batch_index.nearest(current, k + 1, **filters)
+            if (b["asset_id"], b["ts"]) != (current["asset_id"], current["ts"])
+        ][:k]
+    basis = ", ".join(
+        filter(
+            None,
+            [
+                "any press" if any_press else asset_id,
+                part_number and f"part {part_number}",
+                alloy and f"alloy {alloy}",
+                f"last {days:g} days",
+            ],
+        )
+    )
+    return {
+        "recommendation": ai_sop_recommendation(best, f"of {basis}"),
+        "part_number": part_number,
+        "best_batches": best,
+        "similar_batches": similar,
+    }
+
+
+# Series the dashboard charts by default, and everything /timeseries can serve
+DASHBOARD_SERIES = (
+    "electricity_per_unit",
+    "gas_per_unit",
+    "water_per_unit",
+    "oee",
+    "furnace_temp",
+)
+SERIES_FIELDS = frozenset(READING_FIELDS) | frozenset(
+    ingest_kpis_batch(
+        pd.DataFrame(columns=["ts", *READING_FIELDS], dtype=float)
+    ).columns
+)
+
+
+@metrics.timed("downsampled_series")
+def downsampled_series(
+    asset_id: str,
+    fields: List[str],
+    start: float,
+    end: Optional[float],
+    points: int,
+    method: str,
+) -> dict:
+    def compute():
+        frame = store.series_frame(
+            asset_id, start, end, columns=kpi_inputs(fields)
+        )
+        if any(f not in frame.columns for f in fields):
+            frame = pd.concat(
+                [frame[["ts"]], ingest_kpis_batch(frame)], axis=1
+            )
+        return {"rows": len(frame), "points": points, "method": method,
+                "series": downsample_frame(frame, fields, points, method)}
+    # Keyed under a pseudo-asset that ingestion never invalidates
+    entry = series_cache.get_or_compute(
+        ("series", asset_id, tuple(fields), start, end, points, method),
+        "",
+        compute,
+    )
+    return json.loads(entry.body)
+
+
+def _series_args(fields: Optional[str], method: str) -> Optional[Response]:
+    unknown = sorted(set(fields.split(",")) - SERIES_FIELDS) if fields else []
+    if unknown:
+        return Response(
+            status_code=422, content=f"unknown fields: {', '.join(unknown)}"
+        )
+    if method not in DOWNSAMPLE_METHODS:
+        return Response(
+            status_code=422,
+            content=f"method must be one of {DOWNSAMPLE_METHODS}",
+        )
+    return None
+
+
+@app.get("/timeseries")
+def get_timeseries(
+    request: Request,
+    asset_id: str = Query(DEFAULT_ASSET),
+    fields: Optional[str] = Query(None),
+    start: float = Query(0.0),
+    end: Optional[float] = Query(None),
+    points: int = Query(2000, ge=3, le=100_000),
+    method: str = Query("lttb"),
+):
+    # Reading fields or KPIs over a range (hourly averages beyond the raw
+    # window), downsampled for plotting
+    error = _series_args(fields, method)
+    if error is not None:
+        return error
+    names = fields.split(",") if fields else list(DASHBOARD_SERIES)
+    return cached_response(
+        request,
+        ("timeseries", asset_id, tuple(names), start, end, points, method),
+        asset_id,
+        lambda: {
+            "asset_id": asset_id,
+            **downsampled_series(asset_id, names, start, end, points, method),
+        },
+    )
+
+
+@app.get("/dashboard-bundle")
+def get_dashboard_bundle(
+    request: Request,
+    asset_id: str = Query(DEFAULT_ASSET),
+    fields: Optional[str] = Query(None),
+    start: Optional[float] = Query(None),
+    end: Optional[float] = Query(None),
+    points: int = Query(2000, ge=3, le=100_000),
+    method: str = Query("lttb"),
+):
+    # Every dashboard panel in one round trip; start defaults to 30 days back
+    error = _series_args(fields, method)
+    if error is not None:
+        return error
+    names = fields.split(",") if fields else list(DASHBOARD_SERIES)
+    data = ingest_reading(asset_id)
+
+    def compute():
+        since = (
+            (time.time() - 30 * 86400) // 60 * 60 if start is None else start
+        )
+        return {
+            "asset_id": asset_id,
+            "analytics": asset_analytics(asset_id, data),
+            "closed_loop": closed_loop_setpoints(asset_id, data),
+            "sop": sop_recommendation(asset_id),
+            "die_health": die_estimate(asset_id),
+            "timeseries": downsampled_series(
+                asset_id, names, since, end, points, method
+            ),
+        }
+    return cached_response(
+        request,
+        (
+            "dashboard-bundle",
+            asset_id,
+            tuple(names),
+            start,
+            end,
+            points,
+            method,
+        ),
+        asset_id,
+        compute,
+    )
+
+
+STREAM_HEARTBEAT_S = 15.0
+
+
+@app.get("/stream/kpis")
+async def stream_kpis(
+    request: Request, asset_id: Optional[List[str]] = Query(None)
+):
+    # Server-Sent Events: a "snapshot" event, then "kpi" deltas and "alert"
+    # raised/cleared events as data is ingested. Filter with ?asset_id=...
+    sub = broadcaster.subscribe(set(asset_id) if asset_id else None)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(
+                        sub.queue.get(), STREAM_HEARTBEAT_S
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keep-alive\n\n"
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/stream/metrics")
+def get_stream_metrics():
+    return {
+        "subscribers": broadcaster.subscribers,
+        "published": broadcaster.published,
+        "delivered": broadcaster.delivered,
+    }
+
+
+@app.get("/alerts")
+def get_alerts(limit: int = Query(100, ge=0, le=1000)):
+    # Currently active rule ids per asset and the latest raise/clear events
+    return {
+        "active": alert_engine.active(),
+        "events": [e._asdict() for e in list(alert_events)[-limit:]][::-1],
+    }
+
+
+@app.get("/ghg-report")
+def get_ghg_report(
+    asset_id: str = Query(DEFAULT_ASSET),
+    period: str = Query("month"),
+    start: float = Query(0.0),
+    end: Optional[float] = Query(None),
+    version: Optional[str] = Query(None),
+):
+    # Raw readings plus the hourly averages compaction folded older ones into
+    if period not in PERIODS:
+        return Response(
+            status_code=422, content=f"period must be one of {sorted(PERIODS)}"
+        )
+    try:
+        factors = get_registry().get(version)
+    except KeyError as exc:
+        return Response(status_code=404, content=str(exc))
+    with metrics.stage("emissions_report"):
+        usage, weights = usage_history(asset_id, start, end)
+        report = emissions_report(
+            usage, period=period, version=factors.version, weights=weights
+        )
+    report.index = report.index.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {
+        "asset_id": asset_id,
+        "period": period,
+        "factor_version": factors.version,
+        "report": report.reset_index().to_dict("records"),
+    }
+
+
+@app.get("/sustainability-scorecard")
+def get_sustainability_scorecard(
+    asset_id: str = Query(DEFAULT_ASSET),
+    plant_id: Optional[str] = Query(None),
+    period: str = Query("month"),
+    start: Optional[float] = Query(None),
+    end: Optional[float] = Query(None),
+):
+    # Totals per period read from the rollups (one row per period, whatever the
+    # range); plant_id for a plant
+    if period not in ROLLUP_PERIODS:
+        return Response(
+            status_code=422,
+            content=f"period must be one of {list(ROLLUP_PERIODS)}",
+        )
+    if plant_id is not None and plant_id not in registry.plants:
+        return Response(status_code=404, content=f"Unknown plant {plant_id!r}")
+    scope, key = (
+        ("asset", asset_id) if plant_id is None else ("plant", plant_id)
+    )
+    warm_rollups()
+    with metrics.stage("sustainability_scorecard"):
+        rows = rollups.scorecard(
+            key, scope=scope, period=period, start=start, end=end
+        )
+        totals = rows.sum().to_frame().T.astype({"intervals": int})
+        for frame in (rows, totals):
+            output = frame["production_output"]
+            frame["ghg_per_unit"] = frame["total_ghg"] / output.where(
+                output > 0
+            )
+        rows.index = rows.index.strftime("%Y-%m-%dT%H:%M:%SZ")
+    records = rows.reset_index().astype(object)
+    totals = totals.astype(object)
+    return {
+        "scope": scope,
+        "key": key,
+        "period": period,
+        "factor_version": get_registry().get().version,
+        "rows": records.where(records.notna(), None).to_dict("records"),
+        "totals": totals.where(totals.notna(), None).to_dict("records")[0],
+    }
+
+
+@app.get("/cache-metrics")
+def get_cache_metrics():
+    return {**cache.metrics(), "series": series_cache.metrics()}
+
+
+SWEEP_KPIS = (
+    "oee",
+    "scrap_rate",
+    "furnace_thermal_efficiency",
+    "gas_per_unit",
+    "water_per_unit",
+    "ghg_scope_1",
+    "ghg_scope_2",
+    "ghg_total_ghg",
+)
+
+
+def _json_columns(frame) -> dict:
+    return frame.astype(object).where(frame.notna(), None).to_dict("list")
+
+
+# Scenarios per sweep (LHS samples, or grid points:
+# steps ** parameters) and worker processes
+SWEEP_MAX_SCENARIOS = int(os.environ.get("DT_SWEEP_MAX_SCENARIOS", 1_000_000))
+SWEEP_MAX_PROCESSES = int(
+    os.environ.get("DT_SWEEP_MAX_PROCESSES", os.cpu_count() or 1)
+)
+
+
+def _sweep_args(req: dict) -> dict:
+    # Checked up front: a bad or oversized request
+    # is a 422, not a 500 or a runaway sweep
+    method = req.get("method", "lhs")
+    if method not in SWEEP_METHODS:
+        raise ValueError(f"method must be one of {SWEEP_METHODS}")
+    bounds = {}
+    for name, pair in (req.get("bounds") or {}).items():
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(
+                f"bounds: {name!r} is not one of {SWEEP_PARAMETERS}"
+            )
+        lo, hi = (float(v) for v in pair)
+        if not np.isfinite([lo, hi]).all() or lo > hi:
+            raise ValueError(
+                f"bounds: {name!r} needs finite [low, high] with low <= high"
+            )
+        bounds[name] = (lo, hi)
+    objectives = req.get("objectives") or DEFAULT_OBJECTIVES
+    for name, sense in objectives.items():
+        if name not in SWEEP_KPIS or sense not in ("min", "max"):
+            raise ValueError(
+                f"objectives: {name!r} must be one of {SWEEP_KPIS} "
+                f"with 'min' or 'max'"
+            )
+    samples, steps = int(req.get("samples", 10_000)), int(req.get("steps", 10))
+    processes = None if req.get("processes") is None else int(req["processes"])
+    scenarios = (
+        samples
+        if method == "lhs"
+        else steps ** len(bounds or SWEEP_PARAMETERS)
+    )
+    if samples < 1 or steps < 2 or not scenarios <= SWEEP_MAX_SCENARIOS:
+        raise ValueError(
+            f"samples >= 1 and steps >= 2, "
+            f"for at most {SWEEP_MAX_SCENARIOS} scenarios"
+        )
+    if processes is not None and not 1 <= processes <= SWEEP_MAX_PROCESSES:
+        raise ValueError(
+            f"processes must be between 1 and {SWEEP_MAX_PROCESSES}"
+        )
+    seed = None if req.get("seed") is None else int(req["seed"])
+    return {
+        "bounds": bounds,
+        "method": method,
+        "samples": samples,
+        "steps": steps,
+        "seed": seed,
+        "objectives": objectives,
+        "processes": processes,
+    }
+
+
+@app.post("/scenario-sweep")
+async def scenario_sweep_api(request: Request):
+    req = await request.json()
+    asset_id = req.get("asset_id", DEFAULT_ASSET)
+    try:
+        args = _sweep_args(req)
+    except (TypeError, ValueError, AttributeError) as exc:
+        return Response(status_code=422, content=str(exc))
+    objectives = args["objectives"]
+    data = await run_in_threadpool(ingest_reading, asset_id)
+    # Large sweeps are CPU-bound; keep them off the event loop
+    with metrics.stage("scenario_sweep"):
+        sweep = await run_in_threadpool(scenario_sweep, data, **args)
+    results = sweep["results"]
+    columns = [c for c in results.columns if c.startswith("scenario.")]
+    results = results[
+        list(dict.fromkeys([*columns, *SWEEP_KPIS, *objectives]))
+    ]
+    response = {
+        "n_scenarios": len(results),
+        "bounds": sweep["bounds"],
+        "objectives": objectives,
+        "pareto_front": _json_columns(results[sweep["pareto_mask"]]),
+    }
+    if req.get("include_results", False):
+        response["results"] = _json_columns(results)
+    return response
+
+
+@app.get("/plant-analytics")
+def get_plant_analytics(
+    plant_id: Optional[str] = Query(None),
+    mode: str = Query("vectorized"),
+    workers: int = Query(4, ge=1, le=64),
+    timeout_s: Optional[float] = Query(None, gt=0),
+):
+    if mode not in PLANT_MODES:
+        return Response(
+            status_code=422, content=f"mode must be one of {PLANT_MODES}"
+        )
+    plant_ids = [plant_id] if plant_id else list(registry.plants)
+    asset_ids = [a for p in plant_ids for a in registry.assets_in(p)]
+    # One batch through the sinks for every asset due a new reading
+    readings = ingest_readings(asset_ids)
+    with metrics.stage("plant_analytics"):
+        return plant_analytics(
+            readings, registry, mode=mode, workers=workers, timeout_s=timeout_s
+        )
+
+
+@metrics.timed("optimizer")
+def _optimize(frame, min_saving_pct: float) -> dict:
+    # Newest trained surrogate, or the fixed limits until one has been trained
+    model = get_surrogate(MODEL_DIR)
+    recs = recommend_batch(frame, model, min_saving_pct)
+    optimized = simulate_optimized_batch(frame, recs)
+    return {
+        "model_version": (
+            None if model is None else model.metadata.get("version")
+        ),
+        "recommendations": recs.to_dict("records"),
+        "optimized": _json_columns(
+            optimized[[c for c in OPTIMIZED_COLUMNS if c in optimized.columns]]
+        ),
+    }
+
+
+OPTIMIZED_COLUMNS = (
+    "power_usage",
+    "gas_consumption",
+    "water_usage",
+    "material_input",
+    "production_output",
+)
+
+
+@app.get("/optimization-recommendations")
+def get_optimization_recommendations(asset_id: str = Query(DEFAULT_ASSET),
+                                     min_saving_pct: float = Query(1.0, ge=0)):
+    return _optimize(
+        pd.json_normalize([ingest_reading(asset_id)]), min_saving_pct
+    )
+
+
+@app.post("/optimization-recommendations")
+async def batch_optimization_recommendations(request: Request):
+    # {"records": [reading, ...], "min_saving_pct":
+    # 1.0}; "row" refers to the record position
+    req = await request.json()
+    frame = pd.json_normalize(req.get("records") or [])
+    return await run_in_threadpool(
+        _optimize, frame, float(req.get("min_saving_pct", 1.0))
+    )
+
+
+@app.post("/ml/train")
+async def train_surrogate(request: Request):
+    req = await request.json()
+    since = (
+        time.time() - float(req["days"]) * 86400 if req.get("days") else 0.0
+    )
+    try:
+        with metrics.stage("train"):
+            model = await run_in_threadpool(
+                train_from_store, store, req.get("asset_ids"), since, MODEL_DIR
+            )
+    except ValueError as exc:
+        return Response(status_code=409, content=str(exc))
+    return model.metadata
+
+
+@app.get("/ingestion-metrics")
+def get_ingestion_metrics():
+    pipeline = get_pipeline()
+    if pipeline is None:
+        return {"running": False, "sampled_sink_errors": sampled_sink_errors}
+    return {
+        "running": pipeline.running,
+        **pipeline.metrics.snapshot(),
+        "sampled_sink_errors": sampled_sink_errors,
+    }
+
+
+@metrics.timed("assistant_context")
+def assistant_context(asset_id: str) -> dict:
+    # Built from stored readings, not a new one: the store is written before
+    # the cache version moves, so the context is at least as new as its version
+    latest = kpi_history(asset_id, 1)
+    kpis = latest[-1] if latest else ingest_kpis(ingest_reading(asset_id))
+    windows = rolling.asset(asset_id)
+    history = (
+        [] if len(windows.get("scrap_rate", ())) else kpi_history(asset_id, 10)
+    )
+    return {"kpis": kpis, "alerts": alert_engine.active_messages(asset_id),
+            "trend": scrap_trend_answer(kpis, history, windows),
+            "sop": sop_recommendation(asset_id)["recommendation"]}
+
+
+# Contexts follow the asset's cache version, which every ingested reading bumps
+assistant_contexts = AssistantContexts(
+    assistant_context,
+    cache.version,
+    max_age_s=float(os.environ.get("DT_ASSISTANT_MAX_AGE_S", 1.0)),
+)
+
 
 @app.post("/digital-worker-assistant")
 async def digital_worker_assistant_api(request: Request):
     req = await request.json()
     query = req.get("query", "")
-    data = generate_sample_data()
-    history = [generate_sample_data() for _ in range(12)]
-    kpis = full_analytics(data)["kpis"]
-    resp = digital_worker_assistant(query, kpis, history)
-    return {"response": resp}
+    asset_id = req.get("asset_id", DEFAULT_ASSET)
+    # Sampling and context builds block; keep them off the event loop
+    await run_in_threadpool(ingest_reading, asset_id)
+    with metrics.stage("assistant"):
+        return await run_in_threadpool(assistant_contexts.ask, asset_id, query)
+
+
+@app.get("/metrics")
+def get_metrics():
+    # Prometheus text exposition of request and stage histograms
+    return Response(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,3 +1,150 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# One entry per optimization lever. ``limit`` is the fixed
+# target used when no trained surrogate is available;
+# "yield" is production_output / material_input.
+LEVERS = {
+    "power_usage": {
+        "action": "Reduce idle running of furnace",
+        "direction": "decrease",
+        "limit": 130.0,
+        "unit": "kWh",
+        "label": "power usage",
+        "savings": "electricity",
+    },
+    "gas_consumption": {
+        "action": "Check furnace insulation and burner tuning",
+        "direction": "decrease",
+        "limit": 70.0,
+        "unit": "Nm3/hr",
+        "label": "gas",
+        "savings": "natural gas",
+    },
+    "water_usage": {
+        "action": "Inspect water leaks or cooling optimization",
+        "direction": "decrease",
+        "limit": 1.0,
+        "unit": "m3/hr",
+        "label": "water",
+        "savings": "water",
+    },
+    "yield": {
+        "action": "Reduce scrap/rework",
+        "direction": "increase",
+        "limit": 0.95,
+        "unit": "",
+        "label": "yield",
+        "savings": "material",
+    },
+}
+RECOMMENDATION_COLUMNS = [
+    "row",
+    "resource",
+    "action",
+    "current",
+    "target",
+    "unit",
+    "expected_saving",
+    "expected_saving_pct",
+]
+
+
+def _column(frame: pd.DataFrame, name: str) -> np.ndarray:
+    # Missing columns are NaN and never produce a recommendation
+    if name not in frame.columns:
+        return np.full(len(frame), np.nan)
+    return frame[name].to_numpy(dtype=float)
+
+
+def _current(frame: pd.DataFrame, resource: str) -> np.ndarray:
+    if resource == "yield":
+        material = _column(frame, "material_input")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                material > 0,
+                _column(frame, "production_output") / material,
+                np.nan,
+            )
+    return _column(frame, resource)
+
+
+def recommend_batch(
+    frame: pd.DataFrame, model=None, min_saving_pct: float = 0.0
+) -> pd.DataFrame:
+    """Recommendations for every row of a reading frame in one pass.
+
+    Targets come from ``model`` (an ``ml.surrogate.ResourceSurrogate``)
+    when given, otherwise from the fixed ``LEVERS`` limits. Returns one row
+    per (reading, lever) with room for improvement; ``row`` is the frame
+    index label, ``expected_saving`` is in the lever's unit (for yield: kg
+    of material saved at the same output).
+    """
+    predicted = model.predict(frame) if model is not None else None
+    parts = {c: [] for c in RECOMMENDATION_COLUMNS}
+    for resource, lever in LEVERS.items():
+        current = _current(frame, resource)
+        if predicted is not None and resource in predicted.columns:
+            target = predicted[resource].to_numpy()
+        else:
+            target = np.full(len(frame), lever["limit"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if lever["direction"] == "decrease":
+                saving = current - target
+                saving_pct = (
+                    saving / np.where(current > 0, current, np.nan) * 100
+                )
+            else:
+                target = np.minimum(target, 1.0)
+                # Material no longer needed for the
+                # same output at the target yield
+                output = _column(frame, "production_output")
+                saving = output / current - output / target
+                saving_pct = (1 - current / target) * 100
+            hit = np.flatnonzero((saving > 0) & (saving_pct >= min_saving_pct))
+        parts["row"].append(hit)
+        parts["resource"].append(np.full(len(hit), resource, dtype=object))
+        parts["action"].append(
+            np.full(len(hit), lever["action"], dtype=object)
+        )
+        parts["current"].append(current[hit])
+        parts["target"].append(target[hit])
+        parts["unit"].append(np.full(len(hit), lever["unit"], dtype=object))
+        parts["expected_saving"].append(saving[hit])
+        parts["expected_saving_pct"].append(saving_pct[hit])
+    columns = {c: np.concatenate(v) for c, v in parts.items()}
+    # Grouped by reading, levers in LEVERS order
+    order = np.argsort(columns["row"], kind="stable")
+    columns = {c: v[order] for c, v in columns.items()}
+    columns["row"] = frame.index[columns["row"]]
+    return pd.DataFrame(columns)
+
+
+def _describe(rec: Dict[str, Any]) -> Dict[str, Any]:
+    lever = LEVERS[rec["resource"]]
+    if lever["direction"] == "decrease":
+        suggested = (
+            f"Lower {lever['label']} to <{rec['target']:.4g} {lever['unit']}"
+        )
+    else:
+        suggested = f"Increase {lever['label']} to >{rec['target'] * 100:.1f}%"
+    rec["suggested_value"] = suggested
+    rec["expected_savings"] = (
+        f"Up to {rec['expected_saving_pct']:.0f}% {lever['savings']}"
+    )
+    return rec
+
+
+def recommend_reading(
+    data: Dict[str, Any], model=None
+) -> List[Dict[str, Any]]:
+    """``recommend_batch`` for one reading, as dicts with display texts."""
+    recs = recommend_batch(pd.DataFrame([data]), model).drop(columns="row")
+    return [_describe(rec) for rec in recs.to_dict("records")]
+
+
 def recommend_optimizations(data):
     recommendations = []
     if data["power_usage"] > 130:
@@ -26,18 +173,84 @@ def recommend_optimizations(data):
         })
     return recommendations
 
+
+def simulate_optimized_batch(
+    frame: pd.DataFrame, recommendations: pd.DataFrame
+) -> pd.DataFrame:
+    """Apply ``recommend_batch`` output, capping each lever at its target."""
+    optimized = frame.copy()
+    positions = frame.index.get_indexer(recommendations["row"])
+    resources = recommendations["resource"].to_numpy()
+    targets = recommendations["target"].to_numpy(dtype=float)
+    for resource in LEVERS:
+        hit = resources == resource
+        if not hit.any():
+            continue
+        rows, target = positions[hit], targets[hit]
+        if resource == "yield":
+            values = optimized["production_output"].to_numpy(
+                dtype=float, copy=True
+            )
+            values[rows] = (
+                optimized["material_input"].to_numpy(dtype=float)[rows]
+                * target
+            )
+            optimized["production_output"] = values
+        else:
+            values = optimized[resource].to_numpy(dtype=float, copy=True)
+            values[rows] = np.minimum(values[rows], target)
+            optimized[resource] = values
+    return optimized
+
+
+def simulate_optimized_reading(
+    data: Dict[str, Any], recommendations: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Apply ``recommend_reading`` output to one reading."""
+    optimized = data.copy()
+    for rec in recommendations:
+        if rec["resource"] == "yield":
+            optimized["production_output"] = (
+                optimized["material_input"] * rec["target"]
+            )
+        else:
+            optimized[rec["resource"]] = min(
+                optimized[rec["resource"]], rec["target"]
+            )
+    return optimized
+
+
 def simulate_optimized_usage(data, recommendations):
     optimized = data.copy()
     for rec in recommendations:
-        if "power" in rec["action"].lower():
-            val = float(rec["suggested_value"].split("<")[-1].replace("kWh", "").strip())
+        # The suggested value names the resource; most actions do not
+        text = rec["suggested_value"].lower()
+        if "power" in text:
+            val = float(
+                rec["suggested_value"]
+                .split("<")[-1]
+                .replace("kWh", "")
+                .strip()
+            )
             optimized["power_usage"] = min(optimized["power_usage"], val)
-        if "gas" in rec["action"].lower():
-            val = float(rec["suggested_value"].split("<")[-1].replace("Nm3/hr", "").strip())
-            optimized["gas_consumption"] = min(optimized["gas_consumption"], val)
-        if "water" in rec["action"].lower():
-            val = float(rec["suggested_value"].split("<")[-1].replace("m3/hr", "").strip())
+        if "gas" in text:
+            val = float(
+                rec["suggested_value"]
+                .split("<")[-1]
+                .replace("Nm3/hr", "")
+                .strip()
+            )
+            optimized["gas_consumption"] = min(
+                optimized["gas_consumption"], val
+            )
+        if "water" in text:
+            val = float(
+                rec["suggested_value"]
+                .split("<")[-1]
+                .replace("m3/hr", "")
+                .strip()
+            )
             optimized["water_usage"] = min(optimized["water_usage"], val)
-        if "yield" in rec["action"].lower():
+        if "yield" in text:
             optimized["production_output"] = optimized["material_input"] * 0.95
     return optimized
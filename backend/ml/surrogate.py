@@ -0,0 +1,245 @@
+import glob
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+DEFAULT_MODEL_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "models"
+)
+
+# What each target is learned from. Resource targets are a low quantile of
+# the usage seen under comparable operating conditions ("what good shifts
+# achieve"); yield is a high quantile of production_output / material_input.
+TARGETS = {
+    "power_usage": {
+        "features": (
+            "production_output",
+            "target_output",
+            "furnace_temp",
+            "ambient_temp",
+            "runtime",
+            "downtime",
+            "cycle_time",
+            "idle_power_usage",
+        ),
+        "quantile": 0.25,
+    },
+    "gas_consumption": {
+        "features": (
+            "production_output",
+            "target_output",
+            "furnace_temp",
+            "ambient_temp",
+            "runtime",
+            "downtime",
+            "flue_gas_temp",
+        ),
+        "quantile": 0.25,
+    },
+    "water_usage": {
+        "features": (
+            "production_output",
+            "runtime",
+            "cooling_water_in",
+            "cooling_water_out",
+            "ambient_temp",
+            "die_temp",
+        ),
+        "quantile": 0.25,
+    },
+    "yield": {
+        "features": (
+            "material_input",
+            "target_output",
+            "furnace_temp",
+            "cycle_time",
+            "die_temp",
+            "die_wear_rate",
+        ),
+        "quantile": 0.75,
+    },
+}
+
+
+def target_values(frame: pd.DataFrame, target: str) -> np.ndarray:
+    if target == "yield":
+        return (
+            frame["production_output"]
+            / frame["material_input"].where(frame["material_input"] > 0)
+        ).to_numpy()
+    return frame[target].to_numpy(dtype=float)
+
+
+class ResourceSurrogate:
+    """Quantile models of achievable resource usage and yield.
+
+    One gradient-boosted regressor per entry of ``TARGETS``; ``predict``
+    returns the achievable value for every row of a reading frame at once.
+    """
+
+    def __init__(self, max_iter: int = 150, random_state: int = 0):
+        self.max_iter = max_iter
+        self.random_state = random_state
+        self.models: Dict[str, Any] = {}
+        self.metadata: Dict[str, Any] = {}
+
+    def fit(self, frame: pd.DataFrame) -> "ResourceSurrogate":
+        scores = {}
+        for target, spec in TARGETS.items():
+            y = target_values(frame, target)
+            keep = ~np.isnan(y)
+            if keep.sum() < 10:
+                raise ValueError(
+                    f"Not enough history to train {target!r} "
+                    f"({int(keep.sum())} rows)"
+                )
+            X = self._features(frame, target)[keep]
+            # Early stopping keeps the ensemble small, and per-call predict
+            # cost scales with its size
+            model = HistGradientBoostingRegressor(
+                loss="quantile",
+                quantile=spec["quantile"],
+                max_iter=self.max_iter,
+                early_stopping=len(X) >= 200,
+                random_state=self.random_state,
+            )
+            model.fit(X, y[keep])
+            # Share of rows at or below the fitted
+            # quantile, as a calibration check
+            scores[target] = float(np.mean(y[keep] <= model.predict(X)))
+            self.models[target] = model
+        self.metadata = {
+            "trained_at": time.time(),
+            "rows": len(frame),
+            "coverage": scores,
+            "sklearn": sklearn.__version__,
+        }
+        return self
+
+    def predict(self, frame: pd.DataFrame) -> pd.DataFrame:
+        if not self.models:
+            raise RuntimeError("ResourceSurrogate is not trained")
+        if not len(frame):
+            return pd.DataFrame(
+                {target: np.empty(0) for target in self.models},
+                index=frame.index,
+            )
+        # Build the union of feature columns once and slice it per model
+        names = list(
+            dict.fromkeys(
+                f
+                for target in self.models
+                for f in TARGETS[target]["features"]
+            )
+        )
+        X = frame.reindex(columns=names).to_numpy(dtype=float)
+        position = {name: i for i, name in enumerate(names)}
+        return pd.DataFrame(
+            {
+                target: model.predict(
+                    X[:, [position[f] for f in TARGETS[target]["features"]]]
+                )
+                for target, model in self.models.items()
+            },
+            index=frame.index,
+        )
+
+    @staticmethod
+    def _features(frame: pd.DataFrame, target: str) -> np.ndarray:
+        # Missing feature columns become NaN,
+        # which the boosted trees handle natively
+        return frame.reindex(
+            columns=list(TARGETS[target]["features"])
+        ).to_numpy(dtype=float)
+
+    # --------- Persistence ---------
+
+    def save(
+        self, model_dir: str = DEFAULT_MODEL_DIR, version: Optional[str] = None
+    ) -> str:
+        now = time.time()
+        version = (
+            version
+            or time.strftime("%Y%m%dT%H%M%S", time.gmtime(now))
+            + f"{int(now * 1000) % 1000:03d}"
+        )
+        self.metadata["version"] = version
+        os.makedirs(model_dir, exist_ok=True)
+        path = os.path.join(model_dir, f"surrogate-{version}.joblib")
+        # Write then rename, so a concurrent loader never sees a partial file
+        joblib.dump(self, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        _saved(model_dir, version)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "ResourceSurrogate":
+        model = joblib.load(path)
+        if not isinstance(model, cls):
+            raise TypeError(f"{path} does not contain a {cls.__name__}")
+        return model
+
+
+def model_versions(model_dir: str = DEFAULT_MODEL_DIR) -> list:
+    paths = glob.glob(os.path.join(model_dir, "surrogate-*.joblib"))
+    return sorted(
+        os.path.basename(p)[len("surrogate-"):-len(".joblib")] for p in paths
+    )
+
+
+_loaded: Dict[tuple, ResourceSurrogate] = {}
+# model_dir -> newest saved version, listed once per process
+_newest: Dict[str, Optional[str]] = {}
+_load_lock = threading.Lock()
+
+
+def _saved(model_dir: str, version: str) -> None:
+    # A directory not listed yet is listed on
+    # first use, which finds this version too
+    with _load_lock:
+        if model_dir in _newest and (
+            _newest[model_dir] is None or version > _newest[model_dir]
+        ):
+            _newest[model_dir] = version
+
+
+def newest_version(
+    model_dir: str = DEFAULT_MODEL_DIR, refresh: bool = False
+) -> Optional[str]:
+    """Newest saved version; the directory is listed once, then tracked.
+
+    ``refresh`` lists it again (models saved by another process).
+    """
+    if refresh or model_dir not in _newest:
+        versions = model_versions(model_dir)
+        with _load_lock:
+            _newest[model_dir] = versions[-1] if versions else None
+    return _newest[model_dir]
+
+
+def get_surrogate(
+    model_dir: str = DEFAULT_MODEL_DIR, version: Optional[str] = None
+) -> Optional[ResourceSurrogate]:
+    """The requested (default: newest) saved model, loaded once; or None."""
+    if version is None:
+        version = newest_version(model_dir)
+        if version is None:
+            return None
+    key = (model_dir, version)
+    model = _loaded.get(key)
+    if model is None:
+        with _load_lock:
+            model = _loaded.get(key)
+            if model is None:
+                model = ResourceSurrogate.load(
+                    os.path.join(model_dir, f"surrogate-{version}.joblib")
+                )
+                _loaded[key] = model
+    return model
@@ -0,0 +1,73 @@
+"""Train the resource surrogate on stored history and save a new version.
+
+    python -m ml.train --db history.db [--asset press-1 ...] [--days 90]
+"""
+import argparse
+import os
+import time
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from history_store import HistoryStore
+from ml.surrogate import DEFAULT_MODEL_DIR, ResourceSurrogate
+
+
+def history_frame(
+    store: HistoryStore,
+    asset_ids: Optional[Sequence[str]] = None,
+    since: float = 0.0,
+) -> pd.DataFrame:
+    frames = [
+        store.window_frame(a, since).assign(asset_id=a)
+        for a in (asset_ids or store.assets())
+    ]
+    frames = [f for f in frames if len(f)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def train_from_store(
+    store: HistoryStore,
+    asset_ids: Optional[Sequence[str]] = None,
+    since: float = 0.0,
+    model_dir: str = DEFAULT_MODEL_DIR,
+    max_iter: int = 150,
+) -> ResourceSurrogate:
+    frame = history_frame(store, asset_ids, since)
+    if frame.empty:
+        raise ValueError("No stored history to train on")
+    model = ResourceSurrogate(max_iter=max_iter).fit(frame)
+    model.metadata["assets"] = sorted(frame["asset_id"].unique().tolist())
+    model.save(model_dir)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--db", default=os.environ.get("DT_HISTORY_DB", "history.db")
+    )
+    parser.add_argument("--asset", action="append")
+    parser.add_argument(
+        "--days",
+        type=float,
+        default=None,
+        help="only train on the last N days",
+    )
+    parser.add_argument(
+        "--model-dir",
+        default=os.environ.get("DT_MODEL_DIR", DEFAULT_MODEL_DIR),
+    )
+    args = parser.parse_args()
+    since = 0.0 if args.days is None else time.time() - args.days * 86400
+    model = train_from_store(
+        HistoryStore(args.db), args.asset, since, args.model_dir
+    )
+    print(
+        f"saved surrogate {model.metadata['version']} "
+        f"({model.metadata['rows']} rows) to {args.model_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
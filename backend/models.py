@@ -1,2 +1,422 @@
-# Placeholder for asset/process models.
-# Expand as needed for simulation, data schemas, etc.
+# Asset/process models: the plant hierarchy and compact reading containers.
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+)
+
+import numpy as np
+import pandas as pd
+
+# Numeric reading fields. The nested flue gas dict of generate_sample_data is
+# flattened into "flue_gas_comp.<species>" columns.
+FLUE_PREFIX = "flue_gas_comp."
+FLUE_GAS_SPECIES = ("CO2", "NOx", "SOx", "O2")
+READING_FIELDS = (
+    "furnace_temp", "power_usage", "idle_power_usage", "peak_power",
+    "gas_consumption", "water_usage", "material_input", "production_output",
+    "ambient_temp", "downtime", "runtime", "target_output", "cycle_time",
+    "die_temp", "die_wear_rate", "maintenance_count", "mtbf",
+    "cooling_water_in", "cooling_water_out", "water_discharge_temp",
+    "water_discharge_pH", "flue_gas_temp",
+    *(FLUE_PREFIX + s for s in FLUE_GAS_SPECIES),
+)
+# Text labels of what a reading was taken
+# on (the part being forged and its steel)
+LABEL_FIELDS = ("part_number", "alloy")
+# One reading as a NumPy record: asset/time keys plus float64 fields
+READING_DTYPE = np.dtype(
+    [("asset_id", "U32"), ("ts", "f8")] + [(f, "f8") for f in READING_FIELDS]
+)
+
+
+# --------- Asset hierarchy ---------
+
+@dataclass(frozen=True, slots=True)
+class Plant:
+    plant_id: str
+    name: str = ""
+    site: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class Line:
+    line_id: str
+    plant_id: str
+    name: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class Press:
+    press_id: str
+    line_id: str
+    tonnage: Optional[float] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Furnace:
+    furnace_id: str
+    line_id: str
+    press_id: Optional[str] = None  # press this furnace feeds
+    fuel: str = "natural_gas"
+
+
+@dataclass(frozen=True, slots=True)
+class Die:
+    die_id: str
+    press_id: str
+    part_number: str = ""
+    wear_limit: float = 1.0
+
+
+@dataclass
+class AssetRegistry:
+    """Plants, lines and the presses/furnaces/dies on them.
+
+    Readings are keyed by the id of a press or furnace; ``locate`` maps that
+    id back to its line and plant for roll-ups, and ``die_for`` to the die
+    mounted in a press (the first die registered for it until ``mount``).
+    """
+    plants: Dict[str, Plant] = field(default_factory=dict)
+    lines: Dict[str, Line] = field(default_factory=dict)
+    presses: Dict[str, Press] = field(default_factory=dict)
+    furnaces: Dict[str, Furnace] = field(default_factory=dict)
+    dies: Dict[str, Die] = field(default_factory=dict)
+    mounted: Dict[str, str] = field(default_factory=dict)  # press_id -> die_id
+
+    def add(self, asset) -> None:
+        if isinstance(asset, Plant):
+            self.plants[asset.plant_id] = asset
+        elif isinstance(asset, Line):
+            self.lines[asset.line_id] = asset
+        elif isinstance(asset, Press):
+            self.presses[asset.press_id] = asset
+        elif isinstance(asset, Furnace):
+            self.furnaces[asset.furnace_id] = asset
+        elif isinstance(asset, Die):
+            self.dies[asset.die_id] = asset
+            self.mounted.setdefault(asset.press_id, asset.die_id)
+        else:
+            raise TypeError(f"Unknown asset type: {type(asset).__name__}")
+
+    def mount(self, die_id: str) -> None:
+        self.mounted[self.dies[die_id].press_id] = die_id
+
+    def die_for(self, asset_id: str) -> Optional[str]:
+        """The die whose wear ``asset_id`` measures; None for furnaces.
+
+        Ids the registry does not know are taken as presses tracked under
+        their own id (the single-press demo asset).
+        """
+        if asset_id in self.presses:
+            return self.mounted.get(asset_id)
+        if asset_id in self.dies:
+            return asset_id
+        if asset_id in self.furnaces:
+            return None
+        return asset_id
+
+    def line_of(self, asset_id: str) -> Optional[Line]:
+        asset = self.presses.get(asset_id) or self.furnaces.get(asset_id)
+        if asset is None and asset_id in self.dies:
+            asset = self.presses.get(self.dies[asset_id].press_id)
+        return None if asset is None else self.lines.get(asset.line_id)
+
+    def locate(self, asset_id: str) -> Dict[str, Optional[str]]:
+        line = self.line_of(asset_id)
+        plant = None if line is None else self.plants.get(line.plant_id)
+        return {
+            "asset_id": asset_id,
+            "line_id": None if line is None else line.line_id,
+            "plant_id": None if plant is None else plant.plant_id,
+            "site": None if plant is None else plant.site,
+        }
+
+    def assets_in(self, plant_id: str) -> List[str]:
+        line_ids = {
+            lid
+            for lid, line in self.lines.items()
+            if line.plant_id == plant_id
+        }
+        return [
+            p for p, press in self.presses.items() if press.line_id in line_ids
+        ] + [
+            f
+            for f, furnace in self.furnaces.items()
+            if furnace.line_id in line_ids
+        ]
+
+    def hierarchy_frame(self, asset_ids: Iterable[str]) -> pd.DataFrame:
+        return pd.DataFrame([self.locate(a) for a in asset_ids])
+
+    @classmethod
+    def synthetic(
+        cls,
+        plants: int = 1,
+        lines_per_plant: int = 4,
+        presses_per_line: int = 5,
+        dies_per_press: int = 2,
+    ) -> "AssetRegistry":
+        registry = cls()
+        for p in range(plants):
+            plant_id = f"plant-{p + 1}"
+            registry.add(
+                Plant(
+                    plant_id, name=f"Plant {p + 1}", site=f"site-{p // 2 + 1}"
+                )
+            )
+            for ln in range(lines_per_plant):
+                line_id = f"{plant_id}/line-{ln + 1}"
+                registry.add(Line(line_id, plant_id))
+                for pr in range(presses_per_line):
+                    press_id = f"{line_id}/press-{pr + 1}"
+                    registry.add(Press(press_id, line_id))
+                    registry.add(
+                        Furnace(
+                            f"{line_id}/furnace-{pr + 1}",
+                            line_id,
+                            press_id=press_id,
+                        )
+                    )
+                    for d in range(dies_per_press):
+                        registry.add(Die(f"{press_id}/die-{d + 1}", press_id))
+        return registry
+
+
+# --------- Readings ---------
+
+_SLOT_NAMES = tuple(f.replace(FLUE_PREFIX, "flue_") for f in READING_FIELDS)
+
+
+class Reading:
+    """One reading with fixed slots instead of a per-reading dict.
+
+    Supports ``get``/``[]`` with the same keys and nested ``flue_gas_comp``
+    dict as generate_sample_data, so the scalar analytics accept it as is.
+    """
+    __slots__ = ("asset_id", "ts") + _SLOT_NAMES
+
+    def __init__(
+        self, asset_id: str = "", ts: float = float("nan"), **values: float
+    ):
+        self.asset_id = asset_id
+        self.ts = ts
+        for slot in _SLOT_NAMES:
+            setattr(self, slot, values.get(slot))
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Mapping[str, Any],
+        asset_id: str = "",
+        ts: float = float("nan"),
+    ) -> "Reading":
+        flue = data.get("flue_gas_comp") or {}
+        values = {}
+        for name, slot in zip(READING_FIELDS, _SLOT_NAMES):
+            if name.startswith(FLUE_PREFIX):
+                values[slot] = flue.get(
+                    name[len(FLUE_PREFIX):], data.get(name)
+                )
+            else:
+                values[slot] = data.get(name)
+        return cls(
+            data.get("asset_id", asset_id), data.get("ts", ts), **values
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in ("asset_id", "ts"):
+            # Unset keys are "" and NaN; report them
+            # as missing, like a dict without the key
+            value = getattr(self, key)
+            return default if value == "" or value != value else value
+        if key == "flue_gas_comp":
+            return {
+                s: getattr(self, "flue_" + s)
+                for s in FLUE_GAS_SPECIES
+                if getattr(self, "flue_" + s) is not None
+            }
+        value = (
+            getattr(self, key.replace(FLUE_PREFIX, "flue_"), None)
+            if key in READING_FIELDS
+            else None
+        )
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            name: getattr(self, slot)
+            for name, slot in zip(READING_FIELDS, _SLOT_NAMES)
+            if not name.startswith(FLUE_PREFIX)
+            and getattr(self, slot) is not None
+        }
+        data["flue_gas_comp"] = self.get("flue_gas_comp")
+        for key in ("asset_id", "ts"):
+            if self.get(key) is not None:
+                data[key] = self.get(key)
+        return data
+
+
+class ReadingBatch:
+    """Column-oriented readings: one contiguous float64 array per field.
+
+    ``to_pandas``/``to_arrow`` wrap the existing column buffers without
+    copying; ``from_pandas``/``from_arrow`` do the same where the source
+    layout allows it. Missing values are NaN.
+    """
+    __slots__ = ("asset_id", "ts", "columns")
+
+    def __init__(
+        self,
+        asset_id: np.ndarray,
+        ts: np.ndarray,
+        columns: Dict[str, np.ndarray],
+    ):
+        self.asset_id = np.asarray(asset_id)
+        self.ts = np.asarray(ts, dtype=float)
+        self.columns = {
+            name: np.asarray(columns[name], dtype=float)
+            for name in READING_FIELDS
+            if name in columns
+        }
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __iter__(self) -> Iterator[Reading]:
+        for i in range(len(self)):
+            yield self.reading(i)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.asset_id.nbytes
+            + self.ts.nbytes
+            + sum(c.nbytes for c in self.columns.values())
+        )
+
+    def reading(self, i: int) -> Reading:
+        values = {}
+        for name, slot in zip(READING_FIELDS, _SLOT_NAMES):
+            col = self.columns.get(name)
+            if col is not None and not np.isnan(col[i]):
+                values[slot] = float(col[i])
+        return Reading(str(self.asset_id[i]), float(self.ts[i]), **values)
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Sequence[Mapping[str, Any]],
+        asset_id: str = "",
+        ts: Optional[Sequence[float]] = None,
+    ) -> "ReadingBatch":
+        flues = [data.get("flue_gas_comp") or {} for data in records]
+        columns = {}
+        for name in READING_FIELDS:
+            # One pass per field, converted in one go (None becomes NaN)
+            if name.startswith(FLUE_PREFIX):
+                species = name[len(FLUE_PREFIX):]
+                columns[name] = np.array(
+                    [flue.get(species) for flue in flues], dtype=float
+                )
+            else:
+                columns[name] = np.array(
+                    [data.get(name) for data in records], dtype=float
+                )
+        ids = np.array([data.get("asset_id", asset_id) for data in records])
+        stamps = (
+            np.array([data.get("ts", np.nan) for data in records], dtype=float)
+            if ts is None
+            else ts
+        )
+        return cls(ids, stamps, columns)
+
+    @classmethod
+    def from_pandas(cls, frame: pd.DataFrame) -> "ReadingBatch":
+        n = len(frame)
+        columns = {
+            name: frame[name].to_numpy(dtype=float, copy=False)
+            for name in READING_FIELDS
+            if name in frame.columns
+        }
+        ids = (
+            frame["asset_id"].to_numpy()
+            if "asset_id" in frame.columns
+            else np.full(n, "")
+        )
+        ts = (
+            frame["ts"].to_numpy(dtype=float)
+            if "ts" in frame.columns
+            else np.full(n, np.nan)
+        )
+        return cls(ids, ts, columns)
+
+    @classmethod
+    def from_structured(cls, records: np.ndarray) -> "ReadingBatch":
+        # Field views into the record array (strided, not copied)
+        return cls(
+            records["asset_id"],
+            records["ts"],
+            {
+                name: records[name]
+                for name in READING_FIELDS
+                if name in records.dtype.names
+            },
+        )
+
+    def to_structured(self) -> np.ndarray:
+        records = np.zeros(len(self), dtype=READING_DTYPE)
+        records["asset_id"] = self.asset_id
+        records["ts"] = self.ts
+        for name in READING_FIELDS:
+            records[name] = self.columns.get(name, np.nan)
+        return records
+
+    def to_pandas(self) -> pd.DataFrame:
+        data = {"asset_id": self.asset_id, "ts": self.ts, **self.columns}
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        try:
+            import pyarrow as pa
+        except ImportError as exc:
+            raise ImportError(
+                "ReadingBatch.to_arrow requires pyarrow"
+            ) from exc
+        arrays = {
+            "asset_id": pa.array(self.asset_id.astype(str)),
+            "ts": pa.array(self.ts),
+        }
+        # Float columns are wrapped without a copy (missing values stay NaN)
+        arrays.update(
+            {name: pa.array(col) for name, col in self.columns.items()}
+        )
+        return pa.table(arrays)
+
+    @classmethod
+    def from_arrow(cls, table) -> "ReadingBatch":
+        columns = {
+            name: table.column(name).to_numpy()
+            for name in READING_FIELDS
+            if name in table.column_names
+        }
+        return cls(
+            table.column("asset_id").to_numpy(zero_copy_only=False),
+            table.column("ts").to_numpy(),
+            columns,
+        )
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [r.to_dict() for r in self]
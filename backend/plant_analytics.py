@@ -0,0 +1,233 @@
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from kpis_and_analytics import (
+    analytic_alerts_batch,
+    full_analytics,
+    ingest_kpis_batch,
+)
+from models import AssetRegistry, Reading, ReadingBatch
+
+MODES = ("vectorized", "thread", "process")
+# One pool per mode for the whole process,
+# grown to the largest worker count asked for
+_pools: Dict[str, Executor] = {}
+_pools_lock = threading.Lock()
+
+
+def _summary(
+    data: Mapping[str, Any], result: Dict[str, Any]
+) -> Dict[str, Any]:
+    kpis = result["kpis"]
+    return {
+        "oee": kpis["oee"],
+        "scrap_rate": kpis["scrap_rate"],
+        "first_pass_yield": kpis["first_pass_yield"],
+        "total_ghg": result["emissions"]["total_ghg"],
+        "production_output": data.get("production_output", 0),
+        "material_input": data.get("material_input", 0),
+        "target_output": data.get("target_output", 1),
+        "alerts": len(result["alerts"]),
+    }
+
+
+def _analyse_partition(
+    items: Sequence[Tuple[str, Mapping[str, Any]]],
+) -> Dict[str, Dict[str, Any]]:
+    # Runs in a worker thread or process: the full scalar pipeline per asset
+    return {
+        asset_id: _summary(data, full_analytics(data))
+        for asset_id, data in items
+    }
+
+
+def _analyse_vectorized(
+    readings: Mapping[str, Any],
+) -> Dict[str, Dict[str, Any]]:
+    ids = list(readings)
+    records = [
+        r.to_dict() if isinstance(r, Reading) else r for r in readings.values()
+    ]
+    batch = ReadingBatch.from_records(records)
+    kpis = ingest_kpis_batch(batch)
+    columns = {
+        "oee": kpis["oee"].to_numpy(),
+        "scrap_rate": kpis["scrap_rate"].to_numpy(),
+        "first_pass_yield": kpis["first_pass_yield"].to_numpy(),
+        "total_ghg": kpis["ghg_total_ghg"].to_numpy(),
+        "production_output": np.nan_to_num(
+            batch.columns["production_output"], nan=0.0
+        ),
+        "material_input": np.nan_to_num(
+            batch.columns["material_input"], nan=0.0
+        ),
+        "target_output": np.nan_to_num(
+            batch.columns["target_output"], nan=1.0
+        ),
+        "alerts": analytic_alerts_batch(kpis),
+    }
+    names = list(columns)
+    # Row dicts straight from Python lists;
+    # DataFrame.to_dict("index") costs more than the KPIs
+    rows = zip(*(values.tolist() for values in columns.values()))
+    return {
+        asset_id: dict(zip(names, row)) for asset_id, row in zip(ids, rows)
+    }
+
+
+_SUMMED = (
+    "total_ghg",
+    "production_output",
+    "material_input",
+    "target_output",
+    "oee_weighted",
+)
+
+
+def rollup(
+    per_asset: Dict[str, Dict[str, Any]], registry: AssetRegistry
+) -> Dict[str, Any]:
+    """Plant/line/site totals: GHG and output summed, scrap rate from the
+    summed material balance, OEE weighted by each asset's target output."""
+    if not per_asset:
+        return {"lines": {}, "plants": {}, "sites": {}}
+    summaries = list(per_asset.values())
+    values = {
+        k: np.array([s[k] for s in summaries], dtype=float)
+        for k in ("oee", *_SUMMED[:-1])
+    }
+    values["oee_weighted"] = values["oee"] * values["target_output"]
+    # Missing values count as zero in the sums, as in a pandas groupby sum
+    values = {k: np.nan_to_num(v) for k, v in values.items()}
+    located = [registry.locate(asset_id) for asset_id in per_asset]
+    rollups = {}
+    for level, key in (
+        ("lines", "line_id"),
+        ("plants", "plant_id"),
+        ("sites", "site"),
+    ):
+        keep = np.array([loc[key] is not None for loc in located])
+        groups, codes = np.unique(
+            np.array(
+                [loc[key] for loc in located if loc[key] is not None],
+                dtype=object,
+            ),
+            return_inverse=True,
+        )
+        totals = {
+            k: np.bincount(codes, weights=v[keep], minlength=len(groups))
+            for k, v in values.items()
+        }
+        target, material, output = (
+            totals["target_output"],
+            totals["material_input"],
+            totals["production_output"],
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = {
+                "assets": np.bincount(codes, minlength=len(groups)).tolist(),
+                "oee": np.where(
+                    target > 0, totals["oee_weighted"] / target, np.nan
+                ).tolist(),
+                "total_ghg": totals["total_ghg"].tolist(),
+                "production_output": output.tolist(),
+                "scrap_rate": np.where(
+                    material > 0,
+                    np.maximum(material - output, 0) / material * 100,
+                    np.nan,
+                ).tolist(),
+            }
+        rollups[level] = {
+            group: {k: None if v != v else v for k, v in zip(out, row)}
+            for group, row in zip(groups.tolist(), zip(*out.values()))
+        }
+    return rollups
+
+
+def _pool(mode: str, workers: int) -> Executor:
+    with _pools_lock:
+        pool = _pools.get(mode)
+        if (
+            pool is None
+            or pool._max_workers < workers
+            or getattr(pool, "_broken", False)
+        ):
+            if pool is not None:
+                # Partitions still running there finish; the pool then exits
+                pool.shutdown(wait=False)
+            pool = (
+                ThreadPoolExecutor if mode == "thread" else ProcessPoolExecutor
+            )(max_workers=workers)
+            _pools[mode] = pool
+        return pool
+
+
+def shutdown_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def plant_analytics(
+    readings: Mapping[str, Any],
+    registry: AssetRegistry,
+    mode: str = "vectorized",
+    workers: Optional[int] = None,
+    timeout_s: Optional[float] = None,
+    executor=None,
+) -> Dict[str, Any]:
+    """Per-asset analytics merged into line/plant/site roll-ups.
+
+    ``vectorized`` computes the KPIs for all assets in one batch, with the
+    same per-asset keys as the other modes. ``thread``
+    and ``process`` split the assets into one partition per worker and run
+    the full scalar pipeline on a pool shared across calls (or
+    ``executor``); partitions not finished within ``timeout_s`` are
+    reported in ``missing_assets`` and the roll-ups cover the rest.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    start = time.perf_counter()
+    missing: List[str] = []
+    if mode == "vectorized" or not readings:
+        per_asset = _analyse_vectorized(readings) if readings else {}
+    else:
+        items = list(readings.items())
+        workers = workers or 4
+        partitions = [
+            items[i::workers] for i in range(workers) if items[i::workers]
+        ]
+        pool = executor or _pool(mode, workers)
+        futures = {
+            pool.submit(_analyse_partition, part): part for part in partitions
+        }
+        done, _ = wait(futures, timeout=timeout_s)
+        per_asset = {}
+        for future, part in futures.items():
+            if future in done:
+                # Worker errors propagate rather than
+                # becoming a silent partial result
+                per_asset.update(future.result())
+            else:
+                # Not started yet: dropped; already
+                # running: finishes unobserved
+                future.cancel()
+                missing.extend(asset_id for asset_id, _ in part)
+    return {
+        "assets": per_asset,
+        **rollup(per_asset, registry),
+        "partial": bool(missing),
+        "missing_assets": sorted(missing),
+        "mode": mode,
+        "elapsed_s": time.perf_counter() - start,
+    }
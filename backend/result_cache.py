@@ -0,0 +1,124 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    etag: str
+    version: int
+    expires: float
+
+
+class ResultCache:
+    """TTL + LRU cache of serialized endpoint results.
+
+    Entries are keyed by ``(endpoint, asset_id, window...)`` and stamped with
+    the asset's data version; ``invalidate(asset_id)`` (called when new data
+    is ingested) bumps the version so older entries are treated as misses.
+    Bodies are stored already serialized, so a hit skips both the analytics
+    and the JSON encoding.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_s: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        # key -> [lock, callers using it]
+        self._inflight: Dict[Hashable, list] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def version(self, asset_id: str) -> int:
+        return self._versions.get(asset_id, 0)
+
+    def invalidate(self, asset_id: Optional[str] = None) -> None:
+        with self._lock:
+            self.invalidations += 1
+            if asset_id is None:
+                self._entries.clear()
+            else:
+                self._versions[asset_id] = self._versions.get(asset_id, 0) + 1
+
+    def _lookup(self, key: Hashable, asset_id: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if (
+            entry.version != self.version(asset_id)
+            or entry.expires < time.monotonic()
+        ):
+            self.expirations += 1
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_or_compute(
+        self, key: Hashable, asset_id: str, compute: Callable[[], Any]
+    ) -> CacheEntry:
+        with self._lock:
+            entry = self._lookup(key, asset_id)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            # One computation per key at a time; concurrent
+            # callers wait for it. The lock stays registered
+            # while anyone holds or waits on it, so a late caller
+            # queues behind them instead of computing alongside.
+            inflight = self._inflight.setdefault(key, [threading.Lock(), 0])
+            inflight[1] += 1
+        try:
+            with inflight[0]:
+                with self._lock:
+                    entry = self._lookup(key, asset_id)
+                    if entry is not None:
+                        self.hits += 1
+                        return entry
+                    self.misses += 1
+                    version = self.version(asset_id)
+                body = json.dumps(
+                    jsonable_encoder(compute()), separators=(",", ":")
+                ).encode()
+                entry = CacheEntry(
+                    body,
+                    '"' + hashlib.sha1(body).hexdigest() + '"',
+                    version,
+                    time.monotonic() + self.ttl_s,
+                )
+                with self._lock:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+                return entry
+        finally:
+            with self._lock:
+                inflight[1] -= 1
+                if not inflight[1]:
+                    del self._inflight[key]
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
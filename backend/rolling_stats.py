@@ -0,0 +1,210 @@
+import bisect
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+# Window lengths used by the analytics (energy forecast over the last 5
+# readings, scrap trend over the last 10); other KPIs get DEFAULT_WINDOW.
+DEFAULT_WINDOWS = {
+    "electricity_per_unit": 5,
+    "scrap_rate": 10,
+}
+DEFAULT_WINDOW = 60
+TRACKED_KPIS = (
+    "electricity_per_unit",
+    "furnace_thermal_efficiency",
+    "water_per_unit",
+    "gas_per_unit",
+    "scrap_rate",
+    "first_pass_yield",
+    "oee",
+    "throughput_rate",
+    "cooling_water_deltaT",
+    "flue_gas_temperature",
+    "die_temp",
+    "die_wear_rate",
+)
+
+
+class RollingWindow:
+    """Fixed-size ring buffer with incrementally maintained statistics.
+
+    ``push`` is O(1) for sum/sum-of-squares, amortised O(1) for min/max
+    (monotonic deques) and O(log n) search plus a memmove for the sorted
+    copy that backs percentiles. The EWMA covers the whole stream, not just
+    the window.
+    """
+
+    def __init__(self, size: int, ewma_alpha: float = 0.2):
+        if size < 1:
+            raise ValueError("window size must be >= 1")
+        self.size = size
+        self.ewma_alpha = ewma_alpha
+        self._buf = np.zeros(size)
+        self._sorted = []
+        self._min = deque()
+        self._max = deque()
+        self._seq = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._ewma = None
+
+    def __len__(self) -> int:
+        return min(self._seq, self.size)
+
+    def push(self, value: float) -> None:
+        value = float(value)
+        if math.isnan(value):
+            return
+        slot = self._seq % self.size
+        if self._seq >= self.size:
+            old = self._buf[slot]
+            self._sum -= old
+            self._sumsq -= old * old
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+        self._buf[slot] = value
+        self._sum += value
+        self._sumsq += value * value
+        bisect.insort(self._sorted, value)
+
+        expired = self._seq - self.size
+        while self._min and self._min[0][0] <= expired:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= expired:
+            self._max.popleft()
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._min.append((self._seq, value))
+        self._max.append((self._seq, value))
+
+        self._ewma = value if self._ewma is None else (
+            self.ewma_alpha * value + (1 - self.ewma_alpha) * self._ewma)
+        self._seq += 1
+        # Re-sum once per wrap so floating-point drift cannot accumulate
+        if self._seq % self.size == 0:
+            self._sum = float(self._buf.sum())
+            self._sumsq = float(np.dot(self._buf, self._buf))
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.push(value)
+
+    def mean(self) -> Optional[float]:
+        n = len(self)
+        return self._sum / n if n else None
+
+    def var(self) -> Optional[float]:
+        n = len(self)
+        if not n:
+            return None
+        mean = self._sum / n
+        return max(self._sumsq / n - mean * mean, 0.0)
+
+    def std(self) -> Optional[float]:
+        var = self.var()
+        return None if var is None else math.sqrt(var)
+
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    def ewma(self) -> Optional[float]:
+        return self._ewma
+
+    def last(self) -> Optional[float]:
+        return (
+            float(self._buf[(self._seq - 1) % self.size])
+            if self._seq
+            else None
+        )
+
+    def percentile(self, q: float) -> Optional[float]:
+        # Linear interpolation, matching np.percentile's default
+        n = len(self._sorted)
+        if not n:
+            return None
+        pos = (n - 1) * q / 100.0
+        lo = int(pos)
+        hi = min(lo + 1, n - 1)
+        return self._sorted[lo] + (self._sorted[hi] - self._sorted[lo]) * (
+            pos - lo
+        )
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "n": len(self),
+            "mean": self.mean(),
+            "std": self.std(),
+            "min": self.min(),
+            "max": self.max(),
+            "ewma": self.ewma(),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+class RollingStats:
+    """Per-asset, per-KPI rolling windows fed one KPI snapshot at a time."""
+
+    def __init__(
+        self,
+        windows: Optional[Dict[str, int]] = None,
+        default_window: int = DEFAULT_WINDOW,
+        kpis: Iterable[str] = TRACKED_KPIS,
+        ewma_alpha: float = 0.2,
+    ):
+        self.windows = dict(DEFAULT_WINDOWS if windows is None else windows)
+        self.default_window = default_window
+        self.kpis = tuple(kpis)
+        self.ewma_alpha = ewma_alpha
+        self._assets: Dict[str, Dict[str, RollingWindow]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, asset_id: str) -> bool:
+        return asset_id in self._assets
+
+    def asset(self, asset_id: str) -> Dict[str, RollingWindow]:
+        windows = self._assets.get(asset_id)
+        if windows is None:
+            # Sinks on executor threads may create the
+            # same asset at once; one set of windows wins
+            with self._lock:
+                windows = self._assets.get(asset_id)
+                if windows is None:
+                    windows = {
+                        kpi: RollingWindow(
+                            self.windows.get(kpi, self.default_window),
+                            self.ewma_alpha,
+                        )
+                        for kpi in self.kpis
+                    }
+                    self._assets[asset_id] = windows
+        return windows
+
+    def update(self, asset_id: str, kpis: Dict[str, Any]) -> None:
+        windows = self.asset(asset_id)
+        with self._lock:
+            for kpi, window in windows.items():
+                value = kpis.get(kpi)
+                if value is not None:
+                    window.push(value)
+
+    def update_frame(self, asset_id: str, frame) -> None:
+        """Push every row of a KPI frame (from ingest_kpis_batch), in order."""
+        windows = self.asset(asset_id)
+        with self._lock:
+            for kpi, window in windows.items():
+                if kpi in frame:
+                    # Only the trailing window survives;
+                    # the EWMA is seeded from it too
+                    window.extend(frame[kpi].to_numpy()[-window.size:])
+
+    def summary(self, asset_id: str) -> Dict[str, Dict[str, Optional[float]]]:
+        return {kpi: w.summary() for kpi, w in self.asset(asset_id).items()}
@@ -0,0 +1,331 @@
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from emission_factors import (
+    CATEGORIES,
+    TOTAL_GHG,
+    EmissionFactorRegistry,
+    get_registry,
+)
+from ghg_projection import (
+    DEFAULT_INTERVAL_S,
+    MAX_INTERVAL_S,
+    PERIODS,
+    emissions_frame,
+    interval_usage,
+)
+
+# Resource totals kept per bucket, followed
+# by emissions per category and in total
+RESOURCES = (
+    "power_usage",
+    "gas_consumption",
+    "water_usage",
+    "material_input",
+    "production_output",
+)
+EMISSIONS = (*dict.fromkeys(CATEGORIES.values()), "total_ghg")
+ROLLUP_PERIODS = ("hour", "day", "month")
+SCOPES = ("asset", "plant")
+
+_SUMS = (*RESOURCES, *EMISSIONS)
+_SUM_SQL = ", ".join(f'"{c}"' for c in _SUMS)
+_SUM_DDL = ", ".join(f'"{c}" REAL' for c in _SUMS)
+_UPSERT_SQL = (
+    f"INSERT INTO rollups (period, scope, key, bucket, intervals, {_SUM_SQL}) "
+    f"VALUES ({', '.join('?' * (len(_SUMS) + 5))}) "
+    f"ON CONFLICT (period, scope, key, bucket) DO UPDATE SET "
+    f"intervals = intervals + excluded.intervals, "
+    + ", ".join(f'"{c}" = "{c}" + excluded."{c}"' for c in _SUMS)
+)
+
+
+def _buckets(ts: np.ndarray, period: str) -> np.ndarray:
+    # Start of the calendar period (UTC) of each timestamp, in epoch seconds
+    stamps = (ts * 1e3).astype("datetime64[ms]")
+    return (
+        stamps.astype(f"datetime64[{PERIODS[period]}]")
+        .astype("datetime64[s]")
+        .astype(np.int64)
+    )
+
+
+class RollupStore:
+    """Resource and emission totals per hour, day and month.
+
+    Every ingested reading is added to the bucket its timestamp falls in, so
+    a reading that arrives late corrects the closed hour/day/month it
+    belongs to. Readings carry per-hour rates; each adds its rate times
+    the time it stands for (``ghg_projection.interval_usage``: its
+    ``interval_s``, else the gap since the asset's previous reading, else
+    ``default_interval_s``), so totals do not grow with the sampling rate.
+    Sums are stored rather than recomputed from readings, so a scorecard
+    query reads one row per period whatever the size of the history.
+    Emissions use the factors active when the reading is added;
+    ``group_of`` maps an asset to its plant (None: no plant rollup).
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        group_of: Optional[Callable[[str], Optional[str]]] = None,
+        registry: Optional[EmissionFactorRegistry] = None,
+        default_interval_s: float = DEFAULT_INTERVAL_S,
+        max_interval_s: float = MAX_INTERVAL_S,
+    ):
+        self.path = path
+        self.group_of = group_of or (lambda asset_id: None)
+        self.registry = registry
+        self.default_interval_s = default_interval_s
+        self.max_interval_s = max_interval_s
+        self.version = 0
+        self._groups: Dict[str, Optional[str]] = {}
+        self._last_ts: Dict[str, float] = {}  # newest reading added per asset
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS rollups "
+            f"(period TEXT NOT NULL, scope TEXT NOT NULL, key TEXT NOT NULL, "
+            f"bucket INTEGER NOT NULL, intervals INTEGER NOT NULL, "
+            f"{_SUM_DDL}, "
+            f"PRIMARY KEY (period, scope, key, bucket)) WITHOUT ROWID"
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def empty(self) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute("SELECT 1 FROM rollups LIMIT 1").fetchone()
+                is None
+            )
+
+    # --------- Writes ---------
+
+    def add(self, asset_id: str, reading: Dict, ts: float) -> None:
+        """One reading, without building a frame."""
+        factors = (self.registry or get_registry()).factors(ts=ts)
+        with self._lock:
+            last = self._last_ts.get(asset_id)
+            self._last_ts[asset_id] = ts if last is None else max(ts, last)
+        interval = reading.get("interval_s")
+        if interval is None or not interval > 0:
+            interval = (
+                ts - last
+                if last is not None and last < ts
+                else self.default_interval_s
+            )
+        hours = min(interval, self.max_interval_s) / 3600.0
+        usage = {r: float(reading.get(r) or 0.0) * hours for r in RESOURCES}
+        ghg = dict.fromkeys(EMISSIONS, 0.0)
+        for resource, category in CATEGORIES.items():
+            amount = usage.get(resource, 0.0) * float(factors[resource])
+            ghg[category] += amount
+            if category in TOTAL_GHG:
+                ghg["total_ghg"] += amount
+        sums = [*usage.values(), *ghg.values()]
+        keys = [("asset", asset_id)]
+        plant = self._group(asset_id)
+        if plant is not None:
+            keys.append(("plant", plant))
+        ts_arr = np.array([ts], dtype=float)
+        self._upsert(
+            [
+                (
+                    period,
+                    scope,
+                    key,
+                    int(_buckets(ts_arr, period)[0]),
+                    1,
+                    *sums,
+                )
+                for period in ROLLUP_PERIODS
+                for scope, key in keys
+            ]
+        )
+
+    def add_frame(
+        self, readings: pd.DataFrame, weights: Optional[np.ndarray] = None
+    ) -> int:
+        """Add a flat frame of ``asset_id``, ``ts`` and resource rates.
+
+        ``weights`` counts each row as that many readings of ``interval_s``
+        each (hourly averages from the store's compacted history);
+        resources are multiplied by it.
+        """
+        if readings.empty:
+            return 0
+        columns = ["asset_id", "ts", *RESOURCES] + (
+            ["interval_s"] if "interval_s" in readings.columns else []
+        )
+        with self._lock:
+            usage = interval_usage(
+                readings.reindex(columns=columns),
+                RESOURCES,
+                self.default_interval_s,
+                self.max_interval_s,
+                self._last_ts,
+            )
+            newest = usage.groupby("asset_id", sort=False)["ts"].max()
+            for asset_id, ts in zip(newest.index.tolist(), newest.tolist()):
+                self._last_ts[asset_id] = max(
+                    ts, self._last_ts.get(asset_id, ts)
+                )
+        weights = (
+            np.ones(len(usage))
+            if weights is None
+            else np.asarray(weights, dtype=float)
+        )
+        values = (
+            np.nan_to_num(usage[list(RESOURCES)].to_numpy(dtype=float))
+            * weights[:, None]
+        )
+        emissions = emissions_frame(
+            usage, registry=self.registry or get_registry()
+        )
+        values = np.column_stack(
+            [
+                weights,
+                values,
+                emissions[list(EMISSIONS)].to_numpy() * weights[:, None],
+            ]
+        )
+
+        assets, asset_codes = np.unique(
+            readings["asset_id"].to_numpy().astype(str), return_inverse=True
+        )
+        plants = [self._group(a) for a in assets]
+        plant_names = sorted({p for p in plants if p is not None})
+        plant_of = np.array(
+            [-1 if p is None else plant_names.index(p) for p in plants]
+        )
+        plant_codes = plant_of[asset_codes]
+        has_plant = plant_codes >= 0
+        ts = usage["ts"].to_numpy(dtype=float)
+        rows = []
+        for period in ROLLUP_PERIODS:
+            buckets = _buckets(ts, period)
+            for scope, names, codes, mask in (
+                ("asset", assets, asset_codes, slice(None)),
+                ("plant", plant_names, plant_codes, has_plant),
+            ):
+                if not len(names):
+                    continue
+                rows += self._grouped(
+                    period,
+                    scope,
+                    names,
+                    codes[mask],
+                    buckets[mask],
+                    values[mask],
+                )
+        self._upsert(rows)
+        return len(readings)
+
+    @staticmethod
+    def _grouped(
+        period: str,
+        scope: str,
+        names,
+        codes: np.ndarray,
+        buckets: np.ndarray,
+        values: np.ndarray,
+    ) -> List[tuple]:
+        keys, bucket_codes = np.unique(buckets, return_inverse=True)
+        groups, inverse = np.unique(
+            codes * len(keys) + bucket_codes, return_inverse=True
+        )
+        sums = np.column_stack(
+            [
+                np.bincount(
+                    inverse, weights=values[:, j], minlength=len(groups)
+                )
+                for j in range(values.shape[1])
+            ]
+        )
+        names = [str(n) for n in names]
+        keys = keys.tolist()
+        return [
+            (
+                period,
+                scope,
+                names[g // len(keys)],
+                keys[g % len(keys)],
+                round(s[0]),
+                *s[1:],
+            )
+            for g, s in zip(groups.tolist(), sums.tolist())
+        ]
+
+    def _group(self, asset_id: str) -> Optional[str]:
+        if asset_id not in self._groups:
+            self._groups[asset_id] = self.group_of(asset_id)
+        return self._groups[asset_id]
+
+    def _upsert(self, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(_UPSERT_SQL, rows)
+            self._conn.execute("COMMIT")
+            self.version += 1
+
+    # --------- Reads ---------
+
+    def scorecard(
+        self,
+        key: str,
+        scope: str = "asset",
+        period: str = "month",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """Totals per period starting in [start, end), by start time (UTC)."""
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"period must be one of {list(ROLLUP_PERIODS)}")
+        if scope not in SCOPES:
+            raise ValueError(f"scope must be one of {list(SCOPES)}")
+        lo, hi = _bounds(start, end, period)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT bucket, intervals, {_SUM_SQL} FROM rollups "
+                f"WHERE period = ? AND scope = ? AND key = ? "
+                f"AND bucket >= ? AND bucket < ? ORDER BY bucket",
+                (period, scope, key, lo, hi),
+            ).fetchall()
+        frame = pd.DataFrame.from_records(
+            rows, columns=["bucket", "intervals", *_SUMS], coerce_float=True
+        )
+        frame.index = pd.DatetimeIndex(
+            pd.to_datetime(
+                frame.pop("bucket").to_numpy(dtype=np.int64), unit="s"
+            ),
+            name="period",
+        )
+        return frame
+
+
+def _bounds(
+    start: Optional[float], end: Optional[float], period: str
+) -> Tuple[int, int]:
+    # Buckets are keyed by their start, so a range
+    # starting mid-period includes that period
+    lo = (
+        -(2**62)
+        if start is None
+        else int(_buckets(np.array([start], dtype=float), period)[0])
+    )
+    hi = 2 ** 62 if end is None else int(np.ceil(end))
+    return lo, hi
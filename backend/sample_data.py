@@ -1,10 +1,18 @@
+import argparse
 import random
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from models import AssetRegistry
+
 
 def generate_sample_data():
     # Synthetic data for all relevant KPIs
     output = random.uniform(480, 590)
     input_ = random.uniform(500, 600)
-    scrap = input_ - output
     elec = random.uniform(100, 150)
     gas = random.uniform(50, 80)
     water = random.uniform(0.8, 1.2)
@@ -46,3 +54,412 @@ def generate_sample_data():
         "flue_gas_temp": flue_gas_temp,
         "flue_gas_comp": flue_gas_comp
     }
+
+
+# --------- Vectorized plant simulator ---------
+
+# Shift start hour and planned utilization; the first CHANGEOVER_S of each
+# shift runs at reduced rate.
+SHIFTS = ((6, 1.0), (14, 0.95), (22, 0.8))
+CHANGEOVER_S = 900
+# Utilization multiplier by weekday (0 = Monday): reduced Saturday, idle Sunday
+WEEKDAY_UTILIZATION = (1.0, 1.0, 1.0, 1.0, 1.0, 0.5, 0.0)
+MAINTENANCE_PERIOD_S = 7 * 86400  # burner cleaning resets gas-efficiency drift
+# Fault kind -> mean duration in seconds
+FAULTS = {
+    "furnace_overheat": 1800,
+    "cooling_loss": 3600,
+    "power_spike": 600,
+    "die_crack": 7200,
+    "sensor_stuck": 5400,
+}
+DEFAULT_START_TS = 1704067200.0  # 2024-01-01T00:00:00Z
+# Part number -> alloy; each press changes
+# over to the next part at every shift start
+PARTS = {
+    "CR-4410": "42CrMo4",
+    "CR-4420": "42CrMo4",
+    "SH-1045": "C45",
+    "GR-1620": "16MnCr5",
+    "AR-6082": "AA6082",
+}
+
+
+class SyntheticPlant:
+    """Reproducible, correlated readings for many assets as DataFrame chunks.
+
+    Each asset gets its own furnace setpoint, cycle time, capacity and die
+    life. Utilization follows the shift and weekday pattern; furnace
+    temperature and cycle time wander as AR(1) processes; die wear ramps
+    with cycles run and resets at each die change; gas efficiency drifts
+    until weekly maintenance and furnace thermocouples drift slowly.
+    Faults start at random (``faults_per_day`` per asset) and are labelled
+    in the ``fault`` column; ``part_number`` and ``alloy`` say what each
+    press is forging in the current shift. Resource rates are per hour, as in
+    ``generate_sample_data``, and flue gas species are flattened into
+    ``flue_gas_comp.<species>`` columns as ReplaySource expects.
+
+    State carries over between ``chunk`` calls, so the same seed and chunk
+    size always give the same stream.
+    """
+
+    def __init__(
+        self,
+        assets: Sequence[str],
+        interval_s: float = 60.0,
+        start_ts: float = DEFAULT_START_TS,
+        seed: Optional[int] = 0,
+        faults_per_day: float = 0.2,
+        drift: bool = True,
+    ):
+        self.assets = np.asarray(list(assets))
+        self.interval_s = interval_s
+        self.faults_per_day = faults_per_day
+        self.drift = drift
+        self.rng = np.random.default_rng(seed)
+        n = len(self.assets)
+        rng = self.rng
+        self.setpoint = rng.uniform(1180, 1230, n)
+        self.base_cycle = rng.uniform(1.5, 3.5, n)
+        self.capacity = rng.uniform(530, 580, n)
+        self.idle_power = rng.uniform(3, 8, n)
+        self.die_life = rng.uniform(8_000, 20_000, n)  # cycles
+        self.fouling_rate = (
+            rng.uniform(0.02, 0.10, n) if drift else np.zeros(n)
+        )
+        self.mtbf = rng.uniform(300, 1000, n)
+        self._step = 0
+        self._ts0 = start_ts
+        self._ar = {name: np.zeros((1, n)) for name in ("temp", "cycle", "ph")}
+        # dies start part-worn
+        self._cycles = rng.uniform(0, 1, n) * self.die_life
+        self._tc_drift = np.zeros(n)
+        # Active faults: asset index -> [kind, steps left, held value]
+        self._active: Dict[int, list] = {}
+
+    def _ar1(self, name: str, phi: float, sd: float, shape) -> np.ndarray:
+        noise = self.rng.normal(0, sd * np.sqrt(1 - phi * phi), shape)
+        out, self._ar[name] = lfilter(
+            [1.0], [1.0, -phi], noise, axis=0, zi=phi * self._ar[name]
+        )
+        self._ar[name] = out[-1:]
+        return out
+
+    def chunk(self, steps: int) -> pd.DataFrame:
+        """The next ``steps`` time steps for every asset, sorted by ts."""
+        rng = self.rng
+        n = len(self.assets)
+        shape = (steps, n)
+        ts = self._ts0 + (self._step + np.arange(steps)) * self.interval_s
+        self._step += steps
+        t = ts[:, None]
+
+        # Shift pattern
+        hour = (ts % 86400) / 3600
+        # 1970-01-01 was a Thursday
+        weekday = ((ts // 86400).astype(np.int64) + 3) % 7
+        starts = np.array([s for s, _ in SHIFTS])
+        # -1 = before the first shift: night
+        shift = np.searchsorted(starts, hour, side="right") - 1
+        util = (
+            np.array([u for _, u in SHIFTS])[shift]
+            * np.asarray(WEEKDAY_UTILIZATION)[weekday]
+        )
+        since_start = ((hour - starts[shift]) % 24) * 3600
+        util = np.where(since_start < CHANGEOVER_S, util * 0.3, util)
+        runtime = np.clip(util[:, None] * rng.uniform(0.85, 1.0, shape), 0, 1)
+        downtime = 1 - runtime
+
+        temp = self.setpoint + self._ar1("temp", 0.98, 6.0, shape)
+        cycle_time = np.clip(
+            self.base_cycle * (1 + self._ar1("cycle", 0.99, 0.05, shape)), 1, 4
+        )
+        ambient = (
+            35
+            + 3 * np.sin(2 * np.pi * (t % 86400 / 86400 - 0.375))
+            + 3 * np.sin(2 * np.pi * (t / (365.25 * 86400) - 0.3))
+            + rng.normal(0, 0.5, shape)
+        )
+
+        # Die wear: cycles run per step, resetting at each die change
+        run_cycles = runtime * self.interval_s / 60 / cycle_time
+        cycles = self._cycles + np.cumsum(run_cycles, axis=0)
+        self._cycles = cycles[-1]
+        die_wear = np.clip(
+            (cycles % self.die_life) / self.die_life
+            + rng.normal(0, 0.01, shape),
+            0,
+            1,
+        )
+
+        if self.drift:
+            fouling = (
+                self.fouling_rate
+                * ((t - self._ts0) % MAINTENANCE_PERIOD_S)
+                / MAINTENANCE_PERIOD_S
+            )
+            tc = self._tc_drift + np.cumsum(rng.normal(0, 0.02, shape), axis=0)
+            self._tc_drift = tc[-1]
+        else:
+            fouling = tc = 0.0
+        measured_temp = temp + tc
+
+        material = (
+            self.capacity * runtime / 0.9 * (1 + rng.normal(0, 0.02, shape))
+        )
+        scrap = (
+            2.0
+            + 0.0008 * (temp - 1215) ** 2
+            + 6 * die_wear**3
+            + rng.normal(0, 0.3, shape)
+        )
+        die_temp = (
+            220
+            + 60 / cycle_time
+            + 0.4 * (temp - 1150)
+            + rng.normal(0, 5, shape)
+        )
+        power = self.idle_power + np.clip(
+            0.18 * material
+            + 8 * runtime / cycle_time
+            + rng.normal(0, 2, shape),
+            0,
+            None,
+        )
+        peak = power * 1.25 + rng.uniform(0, 10, shape)
+        # Furnaces hold temperature through
+        # idle time, so gas has a standing load
+        gas = np.clip(
+            (0.08 * material + 0.15 * (temp - 1150)) * (1 + fouling)
+            - 0.3 * (ambient - 35)
+            + rng.normal(0, 1.0, shape),
+            0,
+            None,
+        )
+        cooling_in = ambient - 7 + rng.normal(0, 0.5, shape)
+        cooling_out = cooling_in + 6 + 5 * runtime + rng.normal(0, 0.5, shape)
+        o2 = np.clip(4.5 + rng.normal(0, 0.8, shape), 2, 7)
+
+        fault = np.zeros(shape, dtype=np.int8)
+        self._inject_faults(
+            steps,
+            fault,
+            temp=temp,
+            measured_temp=measured_temp,
+            scrap=scrap,
+            cooling_out=cooling_out,
+            peak=peak,
+        )
+        output = material * (1 - np.clip(scrap, 0, 100) / 100)
+
+        columns = {
+            "furnace_temp": measured_temp,
+            "power_usage": power,
+            "idle_power_usage": self.idle_power + rng.normal(0, 0.3, shape),
+            "peak_power": peak,
+            "gas_consumption": gas,
+            "water_usage": (
+                0.6 + 0.0007 * material + rng.normal(0, 0.02, shape)
+            ),
+            "material_input": material,
+            "production_output": output,
+            "ambient_temp": ambient,
+            "downtime": downtime,
+            "runtime": runtime,
+            "target_output": np.full(shape, 575.0),
+            "cycle_time": cycle_time,
+            "die_temp": die_temp,
+            "die_wear_rate": die_wear,
+            "cycles": run_cycles,  # since the previous reading, for die_health
+            # time each reading's rates apply for, for rollups
+            "interval_s": np.full(shape, float(self.interval_s)),
+            "maintenance_count": rng.poisson(0.01, shape).astype(float),
+            "mtbf": np.broadcast_to(self.mtbf, shape),
+            "cooling_water_in": cooling_in,
+            "cooling_water_out": cooling_out,
+            "water_discharge_temp": (
+                cooling_out - 2 + rng.normal(0, 0.3, shape)
+            ),
+            "water_discharge_pH": 7.5 + self._ar1("ph", 0.995, 0.3, shape),
+            "flue_gas_temp": (
+                300 + 0.6 * (temp - 1150) + 100 * fouling
+                + rng.normal(0, 4, shape)
+            ),
+            "flue_gas_comp.CO2": 11.5 - 0.5 * o2 + rng.normal(0, 0.1, shape),
+            "flue_gas_comp.NOx": (
+                0.02 + 0.0004 * np.clip(temp - 1150, 0, None)
+                + rng.normal(0, 0.003, shape)
+            ),
+            "flue_gas_comp.SOx": rng.uniform(0.01, 0.03, shape),
+            "flue_gas_comp.O2": o2,
+        }
+        frame = pd.DataFrame(
+            {name: values.ravel() for name, values in columns.items()}
+        )
+        frame.insert(0, "asset_id", np.tile(self.assets, steps))
+        frame.insert(1, "ts", np.repeat(ts, n))
+        frame["fault"] = pd.Categorical.from_codes(
+            fault.ravel(), ["", *FAULTS]
+        )
+        shift_no = (ts // 86400).astype(np.int64) * len(SHIFTS) + shift
+        part = (shift_no[:, None] + np.arange(n)) % len(PARTS)
+        frame["part_number"] = pd.Categorical.from_codes(
+            part.ravel(), list(PARTS)
+        )
+        alloys = list(dict.fromkeys(PARTS.values()))
+        frame["alloy"] = pd.Categorical.from_codes(
+            np.array([alloys.index(a) for a in PARTS.values()])[part.ravel()],
+            alloys,
+        )
+        return frame
+
+    def _inject_faults(
+        self,
+        steps: int,
+        fault: np.ndarray,
+        temp,
+        measured_temp,
+        scrap,
+        cooling_out,
+        peak,
+    ) -> None:
+        kinds = list(FAULTS)
+        p = self.faults_per_day * self.interval_s / 86400
+        onsets = np.argwhere(self.rng.random(fault.shape) < p)
+        events = [(0, a, *state) for a, state in self._active.items()]
+        for step, a in onsets:
+            kind = kinds[self.rng.integers(len(kinds))]
+            duration = max(
+                int(self.rng.exponential(FAULTS[kind]) / self.interval_s), 1
+            )
+            events.append(
+                (int(step), int(a), kind, duration, measured_temp[step, a])
+            )
+        self._active = {}
+        for start, a, kind, left, held in events:
+            end = min(start + left, steps)
+            span = slice(start, end)
+            fault[span, a] = kinds.index(kind) + 1
+            if kind == "furnace_overheat":
+                temp[span, a] += 60
+                measured_temp[span, a] += 60
+                scrap[span, a] += 4
+            elif kind == "cooling_loss":
+                cooling_out[span, a] += 10
+            elif kind == "power_spike":
+                peak[span, a] += 60
+            elif kind == "die_crack":
+                scrap[span, a] += 15
+            elif kind == "sensor_stuck":
+                measured_temp[span, a] = held
+            if start + left > steps:
+                self._active[a] = [kind, start + left - steps, held]
+
+    def frames(
+        self, periods: Optional[int], chunk_steps: int = 1440
+    ) -> Iterator[pd.DataFrame]:
+        """``periods`` steps (None = endless) in ``chunk_steps`` chunks."""
+        done = 0
+        while periods is None or done < periods:
+            steps = (
+                chunk_steps
+                if periods is None
+                else min(chunk_steps, periods - done)
+            )
+            yield self.chunk(steps)
+            done += steps
+
+
+def write_readings(path: str, frames: Iterable[pd.DataFrame]) -> int:
+    """Stream chunks to one Parquet or CSV file; returns rows written."""
+    rows = 0
+    if path.endswith((".parquet", ".pq")):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Parquet output requires pyarrow") from exc
+        writer = None
+        try:
+            for frame in frames:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    # Dictionary-encode only the id/label
+                    # columns; noisy floats do not repeat
+                    floats = [
+                        f.name
+                        for f in table.schema
+                        if pa.types.is_floating(f.type)
+                    ]
+                    labels = [
+                        f.name for f in table.schema if f.name not in floats
+                    ]
+                    writer = pq.ParquetWriter(
+                        path,
+                        table.schema,
+                        compression="zstd",
+                        use_dictionary=labels,
+                        use_byte_stream_split=floats,
+                    )
+                writer.write_table(table)
+                rows += len(frame)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+    for i, frame in enumerate(frames):
+        frame.to_csv(
+            path, mode="w" if i == 0 else "a", header=i == 0, index=False
+        )
+        rows += len(frame)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write synthetic multi-asset readings to Parquet or CSV"
+    )
+    parser.add_argument(
+        "--out", required=True, help="output .parquet or .csv path"
+    )
+    parser.add_argument(
+        "--assets",
+        type=int,
+        default=0,
+        help="number of assets (default: the presses of --plants)",
+    )
+    parser.add_argument("--plants", type=int, default=1)
+    parser.add_argument("--days", type=float, default=1.0)
+    parser.add_argument("--interval-s", type=float, default=60.0)
+    parser.add_argument(
+        "--start", default="2024-01-01", help="start date/time (UTC)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--faults-per-day", type=float, default=0.2)
+    parser.add_argument("--no-drift", action="store_true")
+    args = parser.parse_args()
+
+    if args.assets:
+        assets = [f"press-{i + 1}" for i in range(args.assets)]
+    else:
+        assets = list(AssetRegistry.synthetic(plants=args.plants).presses)
+    plant = SyntheticPlant(
+        assets,
+        interval_s=args.interval_s,
+        seed=args.seed,
+        start_ts=pd.Timestamp(args.start, tz="UTC").timestamp(),
+        faults_per_day=args.faults_per_day,
+        drift=not args.no_drift,
+    )
+    periods = int(args.days * 86400 / args.interval_s)
+    rows = write_readings(
+        args.out,
+        plant.frames(
+            periods, chunk_steps=max(int(86400 / args.interval_s), 1)
+        ),
+    )
+    print(f"wrote {rows} readings for {len(assets)} assets to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
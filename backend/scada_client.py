@@ -1,4 +1,400 @@
-# Simulated SCADA fetch; replace with actual OPC-UA, Modbus, etc. as needed.
-def fetch_scada_data():
-    # Raise error to demonstrate fallback or return real data in production.
-    raise NotImplementedError("No SCADA implemented. Use sample data or add SCADA integration.")
+# SCADA ingestion: pluggable reading sources feeding an asyncio micro-batching
+# pipeline. Replace SimulatedPLCSource with a real OPC-UA/Modbus client as
+# needed.
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+
+from sample_data import SyntheticPlant, generate_sample_data
+from kpis_and_analytics import ingest_kpis_batch
+from models import FLUE_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# (asset_id, acquisition timestamp, tag values)
+Reading = Tuple[str, float, Dict[str, Any]]
+# sink(readings, kpis): both frames share a row order and carry asset_id/ts
+Sink = Callable[[pd.DataFrame, pd.DataFrame], None]
+
+
+class ReadingSource:
+    """Async iterator of readings. Subclasses implement ``readings``."""
+
+    async def readings(self) -> AsyncIterator[Reading]:
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+
+class SimulatedPLCSource(ReadingSource):
+    """Local stand-in for an OPC-UA/Modbus poller.
+
+    Polls every asset once per ``1 / rate_hz`` seconds. ``extra_tags`` pads
+    each reading with additional analogue tags to model wide tag lists.
+    """
+
+    def __init__(
+        self,
+        assets: Sequence[str],
+        rate_hz: float = 1.0,
+        extra_tags: int = 0,
+        max_polls: Optional[int] = None,
+    ):
+        self.assets = list(assets)
+        self.rate_hz = rate_hz
+        self.extra_tags = extra_tags
+        self.max_polls = max_polls
+
+    def _poll(self, asset_id: str) -> Dict[str, Any]:
+        reading = generate_sample_data()
+        for i in range(self.extra_tags):
+            reading[f"tag_{i:03d}"] = random.random()
+        return reading
+
+    async def readings(self) -> AsyncIterator[Reading]:
+        period = 1.0 / self.rate_hz if self.rate_hz > 0 else 0.0
+        polls = 0
+        next_tick = time.monotonic()
+        while self.max_polls is None or polls < self.max_polls:
+            for asset_id in self.assets:
+                yield asset_id, time.time(), self._poll(asset_id)
+            polls += 1
+            next_tick += period
+            await asyncio.sleep(max(next_tick - time.monotonic(), 0))
+
+
+class ReplaySource(ReadingSource):
+    """Replays a CSV or Parquet file of flat readings.
+
+    The file needs ``asset_id`` and ``ts`` columns; flue gas species may be
+    given as ``flue_gas_comp.<species>`` columns. ``speed`` scales the
+    recorded inter-reading gaps (2.0 replays twice as fast); ``speed=None``
+    replays as fast as the pipeline accepts.
+    """
+
+    def __init__(
+        self, path: str, speed: Optional[float] = 1.0, chunk_rows: int = 50_000
+    ):
+        self.path = path
+        self.speed = speed
+        self.chunk_rows = chunk_rows
+
+    def _chunks(self):
+        if self.path.endswith((".parquet", ".pq")):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as exc:
+                raise ImportError("Parquet replay requires pyarrow") from exc
+            for batch in pq.ParquetFile(self.path).iter_batches(
+                batch_size=self.chunk_rows
+            ):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(self.path, chunksize=self.chunk_rows)
+
+    async def readings(self) -> AsyncIterator[Reading]:
+        first_ts = None
+        started = time.monotonic()
+        for chunk in self._chunks():
+            flue = [c for c in chunk.columns if c.startswith(FLUE_PREFIX)]
+            columns = [
+                c
+                for c in chunk.columns
+                if c not in ("asset_id", "ts") and c not in flue
+            ]
+            assets = chunk["asset_id"].astype(str).to_numpy()
+            stamps = chunk["ts"].astype(float).to_numpy()
+            values = chunk[columns].to_dict("records")
+            flue_values = (
+                chunk[flue]
+                .rename(columns=lambda c: c[len(FLUE_PREFIX):])
+                .to_dict("records")
+            )
+            for asset_id, ts, reading, comp in zip(
+                assets, stamps, values, flue_values
+            ):
+                reading["flue_gas_comp"] = comp
+                if self.speed:
+                    first_ts = ts if first_ts is None else first_ts
+                    delay = (ts - first_ts) / self.speed - (
+                        time.monotonic() - started
+                    )
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                yield asset_id, float(ts), reading
+            # Let the consumer run between chunks even when replaying flat out
+            await asyncio.sleep(0)
+
+
+class SyntheticSource(ReplaySource):
+    """Streams a sample_data.SyntheticPlant through the replay path.
+
+    ``speed`` is simulated seconds per wall-clock second (60 replays a
+    1-minute plant at one step per second); ``speed=None`` runs flat out.
+    ``periods=None`` streams until the pipeline is stopped.
+    """
+
+    def __init__(
+        self,
+        plant: SyntheticPlant,
+        periods: Optional[int] = None,
+        speed: Optional[float] = 1.0,
+        chunk_steps: int = 60,
+    ):
+        super().__init__("", speed=speed)
+        self.plant = plant
+        self.periods = periods
+        self.chunk_steps = chunk_steps
+
+    def _chunks(self):
+        yield from self.plant.frames(self.periods, self.chunk_steps)
+
+
+class PipelineMetrics:
+    # Latency is measured from enqueue to
+    # the end of the sinks for each reading.
+
+    def __init__(self, latency_window: int = 10_000):
+        self.started = time.monotonic()
+        self.readings_in = 0
+        self.readings_out = 0
+        self.batches = 0
+        self.errors = 0
+        self.sink_errors: Dict[str, int] = {}
+        self.blocked_s = 0.0
+        self.queue_depth = 0
+        self.queue_capacity = 0
+        self._latencies = deque(maxlen=latency_window)
+        self._batch_sizes = deque(maxlen=1000)
+
+    def record_batch(self, size: int, latencies: np.ndarray) -> None:
+        self.batches += 1
+        self.readings_out += size
+        self._batch_sizes.append(size)
+        self._latencies.extend(latencies.tolist())
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        lat = np.asarray(self._latencies) * 1e3
+        p50, p99, pmax = (
+            np.percentile(lat, [50, 99, 100])
+            if lat.size
+            else (None, None, None)
+        )
+        return {
+            "uptime_s": elapsed,
+            "readings_in": self.readings_in,
+            "readings_out": self.readings_out,
+            "batches": self.batches,
+            "errors": self.errors,
+            "sink_errors": dict(self.sink_errors),
+            "throughput_per_s": self.readings_out / elapsed,
+            "mean_batch_size": (
+                float(np.mean(self._batch_sizes))
+                if self._batch_sizes
+                else None
+            ),
+            "latency_ms_p50": None if p50 is None else float(p50),
+            "latency_ms_p99": None if p99 is None else float(p99),
+            "latency_ms_max": None if pmax is None else float(pmax),
+            "queue_depth": self.queue_depth,
+            "queue_capacity": self.queue_capacity,
+            "producer_blocked_s": self.blocked_s,
+        }
+
+
+class IngestionPipeline:
+    """Bounded-queue micro-batcher from a ReadingSource into KPI sinks.
+
+    The producer awaits on a full queue (backpressure on the source). The
+    consumer flushes when ``batch_size`` readings are buffered or the oldest
+    buffered reading is ``max_delay_s`` old, then runs ``ingest_kpis_batch``
+    and the sinks in a worker thread so the event loop is never blocked.
+    A sink that raises is logged and counted per sink in the metrics; the
+    sinks after it still receive the batch.
+    """
+
+    def __init__(
+        self,
+        source: ReadingSource,
+        sinks: Sequence[Sink] = (),
+        batch_size: int = 500,
+        max_delay_s: float = 0.2,
+        queue_size: int = 20_000,
+        executor=None,
+    ):
+        self.source = source
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.max_delay_s = max_delay_s
+        self.executor = executor
+        self.metrics = PipelineMetrics()
+        self.metrics.queue_capacity = queue_size
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self.done = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def latest(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        return self._latest.get(asset_id)
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self.done.clear()
+        self._tasks = [
+            asyncio.create_task(self._produce()),
+            asyncio.create_task(self._consume()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.done.set()
+
+    async def _produce(self) -> None:
+        cancelled = False
+        try:
+            async for item in self.source.readings():
+                entry = (time.monotonic(), item)
+                try:
+                    self._queue.put_nowait(entry)
+                except asyncio.QueueFull:
+                    blocked = time.monotonic()
+                    await self._queue.put(entry)
+                    self.metrics.blocked_s += time.monotonic() - blocked
+                self.metrics.readings_in += 1
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # On stop() the consumer is cancelled too:
+            # waiting on a full queue would never return
+            if not cancelled:
+                await self._queue.put(None)
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = first[0] + self.max_delay_s
+            finished = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(
+                            self._queue.get(), timeout
+                        )
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    finished = True
+                    break
+                batch.append(item)
+            self.metrics.queue_depth = self._queue.qsize()
+            try:
+                await loop.run_in_executor(self.executor, self._process, batch)
+            except Exception:
+                logger.exception(
+                    "Ingestion batch of %d readings failed", len(batch)
+                )
+                self.metrics.errors += 1
+            if finished:
+                break
+        self.done.set()
+
+    def _process(self, batch: List[Tuple[float, Reading]]) -> None:
+        frame, kpis = readings_frame([item for _, item in batch])
+        run_sinks(self.sinks, frame, kpis, self.metrics.sink_errors)
+        for _, (asset_id, _, reading) in batch:
+            self._latest[asset_id] = reading
+        enqueued = np.fromiter(
+            (t for t, _ in batch), dtype=float, count=len(batch)
+        )
+        self.metrics.record_batch(len(batch), time.monotonic() - enqueued)
+
+
+def readings_frame(
+    readings: Sequence[Reading],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """The flat readings frame and its KPI frame, as sinks receive them."""
+    frame = pd.json_normalize([reading for _, _, reading in readings])
+    frame.insert(0, "asset_id", [asset_id for asset_id, _, _ in readings])
+    frame.insert(1, "ts", [ts for _, ts, _ in readings])
+    kpis = ingest_kpis_batch(frame)
+    kpis.insert(0, "asset_id", frame["asset_id"].to_numpy())
+    kpis.insert(1, "ts", frame["ts"].to_numpy())
+    return frame, kpis
+
+
+def run_sinks(
+    sinks: Sequence[Sink],
+    readings: pd.DataFrame,
+    kpis: pd.DataFrame,
+    errors: Optional[Dict[str, int]] = None,
+) -> None:
+    # Every sink sees every batch: a failing sink
+    # is logged and counted, and the rest still run
+    for sink in sinks:
+        try:
+            sink(readings, kpis)
+        except Exception:
+            name = getattr(sink, "__name__", repr(sink))
+            logger.exception(
+                "Ingestion sink %s failed on %d readings", name, len(readings)
+            )
+            if errors is not None:
+                errors[name] = errors.get(name, 0) + 1
+
+
+_pipeline: Optional[IngestionPipeline] = None
+
+
+def set_pipeline(pipeline: Optional[IngestionPipeline]) -> None:
+    global _pipeline
+    _pipeline = pipeline
+
+
+def get_pipeline() -> Optional[IngestionPipeline]:
+    return _pipeline
+
+
+def fetch_scada_data(asset_id: str) -> Dict[str, Any]:
+    # Latest reading the running pipeline has ingested for this asset.
+    # Raises so callers can fall back to sample data when nothing is wired in.
+    if _pipeline is None or not _pipeline.running:
+        raise NotImplementedError(
+            "No SCADA pipeline running. "
+            "Use sample data or set DT_SCADA_SOURCE."
+        )
+    reading = _pipeline.latest(asset_id)
+    if reading is None:
+        raise LookupError(f"No SCADA data ingested yet for asset {asset_id!r}")
+    return reading
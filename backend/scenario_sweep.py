@@ -0,0 +1,152 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from kpis_and_analytics import ingest_kpis_batch
+
+# Setpoints engineers sweep by default, and the +/- span around the current
+# value used when no explicit bounds are given. Only fields some KPI responds
+# to: cycle_time is passed through unchanged and OEE depends on none of them,
+# so neither is swept or optimized by default. The per-reading KPI formulas
+# have no trade-off between these objectives (less gas lowers GHG and raises
+# thermal efficiency), so the default front is a handful of points near the
+# corner of the bounds; it is a sensitivity sweep until a response model is
+# used.
+SWEEP_PARAMETERS = ("gas_consumption", "furnace_temp", "water_usage")
+DEFAULT_SPAN = 0.2
+DEFAULT_OBJECTIVES = {
+    "ghg_total_ghg": "min",
+    "furnace_thermal_efficiency": "max",
+}
+METHODS = ("lhs", "grid")
+
+
+def default_bounds(
+    data: Dict[str, Any],
+    parameters: Sequence[str] = SWEEP_PARAMETERS,
+    span: float = DEFAULT_SPAN,
+) -> Dict[str, Tuple[float, float]]:
+    return {
+        p: (data[p] * (1 - span), data[p] * (1 + span))
+        for p in parameters
+        if data.get(p) is not None
+    }
+
+
+def grid_scenarios(
+    bounds: Dict[str, Tuple[float, float]], steps: int = 10
+) -> pd.DataFrame:
+    axes = [np.linspace(lo, hi, steps) for lo, hi in bounds.values()]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return pd.DataFrame({name: m.ravel() for name, m in zip(bounds, mesh)})
+
+
+def latin_hypercube_scenarios(bounds: Dict[str, Tuple[float, float]], n: int,
+                              seed: Optional[int] = None) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (lo, hi) in bounds.items():
+        # One sample per stratum, strata shuffled independently per dimension
+        u = (rng.permutation(n) + rng.random(n)) / n
+        columns[name] = lo + u * (hi - lo)
+    return pd.DataFrame(columns)
+
+
+def _scenario_frame(
+    data: Dict[str, Any], scenarios: pd.DataFrame
+) -> pd.DataFrame:
+    base = pd.json_normalize([data])
+    frame = pd.DataFrame(
+        {
+            col: np.repeat(base[col].to_numpy(), len(scenarios))
+            for col in base.columns
+            if col not in scenarios.columns
+        }
+    )
+    for col in scenarios.columns:
+        frame[col] = scenarios[col].to_numpy()
+    return frame
+
+
+def _evaluate_chunk(args) -> pd.DataFrame:
+    data, scenarios = args
+    kpis = ingest_kpis_batch(_scenario_frame(data, scenarios))
+    kpis.index = scenarios.index
+    return kpis
+
+
+def evaluate_scenarios(
+    data: Dict[str, Any],
+    scenarios: pd.DataFrame,
+    processes: Optional[int] = None,
+    chunk_size: int = 100_000,
+) -> pd.DataFrame:
+    """KPIs for every scenario row, as one batched array computation.
+
+    Each row of ``scenarios`` overrides the matching fields of ``data``,
+    like analytic_process_simulation does for a single scenario dict. With
+    ``processes`` > 1, sweeps longer than ``chunk_size`` are split across a
+    process pool.
+    """
+    scenarios = scenarios.reset_index(drop=True)
+    if processes and processes > 1 and len(scenarios) > chunk_size:
+        chunks = [
+            (data, scenarios.iloc[i:i + chunk_size])
+            for i in range(0, len(scenarios), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            kpis = pd.concat(pool.map(_evaluate_chunk, chunks))
+    else:
+        kpis = _evaluate_chunk((data, scenarios))
+    kpis = kpis.drop(
+        columns=[c for c in scenarios.columns if c in kpis.columns]
+    )
+    return pd.concat([scenarios.add_prefix("scenario."), kpis], axis=1)
+
+
+def pareto_front(
+    results: pd.DataFrame, objectives: Dict[str, str] = None
+) -> np.ndarray:
+    """Mask of the non-dominated rows for ``{column: "min" | "max"}``."""
+    objectives = objectives or DEFAULT_OBJECTIVES
+    costs = np.column_stack(
+        [
+            results[col].to_numpy(dtype=float) * (-1 if sense == "max" else 1)
+            for col, sense in objectives.items()
+        ]
+    )
+    efficient = np.ones(len(costs), dtype=bool)
+    # Visit rows best-first on the first objective so dominated rows are
+    # discarded early; each pass only compares against surviving rows.
+    for i in np.argsort(costs[:, 0], kind="stable"):
+        if not efficient[i]:
+            continue
+        candidates = np.flatnonzero(efficient)
+        dominated = (np.all(costs[candidates] >= costs[i], axis=1)
+                     & np.any(costs[candidates] > costs[i], axis=1))
+        efficient[candidates[dominated]] = False
+    return efficient
+
+
+def scenario_sweep(
+    data: Dict[str, Any],
+    bounds: Dict[str, Tuple[float, float]] = None,
+    method: str = "lhs",
+    samples: int = 10_000,
+    steps: int = 10,
+    seed: Optional[int] = None,
+    objectives: Dict[str, str] = None,
+    processes: Optional[int] = None,
+) -> Dict[str, Any]:
+    bounds = bounds or default_bounds(data)
+    if method == "grid":
+        scenarios = grid_scenarios(bounds, steps)
+    elif method == "lhs":
+        scenarios = latin_hypercube_scenarios(bounds, samples, seed)
+    else:
+        raise ValueError(f"Unknown sweep method: {method!r}")
+    results = evaluate_scenarios(data, scenarios, processes=processes)
+    front = pareto_front(results, objectives)
+    return {"results": results, "pareto_mask": front, "bounds": bounds}
@@ -0,0 +1,314 @@
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from kpis_and_analytics import ingest_kpis_batch
+
+SETPOINTS = ("furnace_temp", "cycle_time")
+DEFAULT_BOUNDS = {"furnace_temp": (1150.0, 1250.0), "cycle_time": (1.0, 4.0)}
+# Largest move per control tick
+DEFAULT_MAX_STEP = {"furnace_temp": 15.0, "cycle_time": 0.25}
+RESPONSES = ("ghg_scope_1", "ghg_scope_2", "oee", "scrap_rate")
+# Objective in kg CO2e-equivalents: emissions, minus credit for OEE, plus a
+# cost per % of scrap
+DEFAULT_WEIGHTS = {
+    "ghg_scope_1": 1.0,
+    "ghg_scope_2": 1.0,
+    "oee": -500.0,
+    "scrap_rate": 5.0,
+}
+
+
+def _features(z: np.ndarray) -> np.ndarray:
+    # Full quadratic in the two standardized setpoints
+    z1, z2 = z[..., 0], z[..., 1]
+    return np.stack(
+        [np.ones_like(z1), z1, z2, z1 * z1, z2 * z2, z1 * z2], axis=-1
+    )
+
+
+def _grad_hess(b: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    grad = np.array(
+        [
+            b[1] + 2 * b[3] * z[0] + b[5] * z[1],
+            b[2] + 2 * b[4] * z[1] + b[5] * z[0],
+        ]
+    )
+    hess = np.array([[2 * b[3], b[5]], [b[5], 2 * b[4]]])
+    return grad, hess
+
+
+class ResponseModel:
+    """Quadratic response surface of each ``RESPONSES`` KPI.
+
+    Fitted by ridge least squares on standardized furnace temperature and
+    cycle time, so one model is a 6 x len(RESPONSES) coefficient matrix and
+    evaluating it (with exact gradients) costs microseconds.
+    """
+
+    def __init__(
+        self,
+        center: np.ndarray,
+        scale: np.ndarray,
+        coef: np.ndarray,
+        rows: int,
+        rmse: Dict[str, float],
+    ):
+        self.center = center
+        self.scale = scale
+        self.coef = coef
+        self.rows = rows
+        self.rmse = rmse
+        self.fitted_at = time.time()
+
+    @classmethod
+    def fit(
+        cls, readings: pd.DataFrame, ridge: float = 1e-3, min_rows: int = 30
+    ) -> "ResponseModel":
+        kpis = ingest_kpis_batch(readings)
+        data = kpis[list(SETPOINTS) + list(RESPONSES)].dropna()
+        if len(data) < min_rows:
+            raise ValueError(
+                f"Need at least {min_rows} readings with setpoints, "
+                f"got {len(data)}"
+            )
+        x = data[list(SETPOINTS)].to_numpy(dtype=float)
+        center, scale = x.mean(axis=0), x.std(axis=0)
+        if (scale <= 0).any():
+            raise ValueError(
+                "Setpoints did not vary in the history; "
+                "the response cannot be identified"
+            )
+        phi = _features((x - center) / scale)
+        y = data[list(RESPONSES)].to_numpy(dtype=float)
+        penalty = ridge * len(data) * np.eye(phi.shape[1])
+        penalty[0, 0] = 0.0  # intercept is not shrunk
+        coef = np.linalg.solve(phi.T @ phi + penalty, phi.T @ y)
+        rmse = np.sqrt(np.mean((phi @ coef - y) ** 2, axis=0))
+        return cls(
+            center, scale, coef, len(data), dict(zip(RESPONSES, rmse.tolist()))
+        )
+
+    def to_z(self, x: np.ndarray) -> np.ndarray:
+        return (np.asarray(x, dtype=float) - self.center) / self.scale
+
+    def to_x(self, z: np.ndarray) -> np.ndarray:
+        return np.asarray(z) * self.scale + self.center
+
+    def predict(self, x) -> Dict[str, Any]:
+        out = _features(self.to_z(x)) @ self.coef
+        return {
+            name: out[..., i] if out.ndim > 1 else float(out[i])
+            for i, name in enumerate(RESPONSES)
+        }
+
+
+class SetpointOptimizer:
+    """Closed-loop furnace temperature / cycle time optimizer.
+
+    Each ``step`` minimizes the weighted objective over the fitted response
+    model inside the global bounds and a per-tick move limit around the
+    current setpoints, with scrap above ``max_scrap`` penalized. The solver
+    is a projected Newton method warm-started from the asset's previous
+    solution; it stops at ``budget_s`` and returns the best point so far.
+    """
+
+    def __init__(
+        self,
+        bounds: Optional[Mapping[str, Tuple[float, float]]] = None,
+        max_step: Optional[Mapping[str, float]] = None,
+        weights: Optional[Mapping[str, float]] = None,
+        max_scrap: float = 3.0,
+        scrap_penalty: float = 1e3,
+        budget_s: float = 0.05,
+        max_iter: int = 50,
+        refit_s: float = 300.0,
+        min_rows: int = 30,
+    ):
+        bounds = {**DEFAULT_BOUNDS, **(bounds or {})}
+        max_step = {**DEFAULT_MAX_STEP, **(max_step or {})}
+        self.lower = np.array([bounds[s][0] for s in SETPOINTS])
+        self.upper = np.array([bounds[s][1] for s in SETPOINTS])
+        self.max_step = np.array([max_step[s] for s in SETPOINTS])
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self._w = np.array([self.weights.get(r, 0.0) for r in RESPONSES])
+        self.max_scrap = max_scrap
+        self.scrap_penalty = scrap_penalty
+        self.budget_s = budget_s
+        self.max_iter = max_iter
+        self.refit_s = refit_s
+        self.min_rows = min_rows
+        self._models: Dict[str, ResponseModel] = {}
+        # when the last fit failed, per asset
+        self._failed: Dict[str, float] = {}
+        self._previous: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def model(self, asset_id: str) -> Optional[ResponseModel]:
+        return self._models.get(asset_id)
+
+    def needs_fit(self, asset_id: str, now: Optional[float] = None) -> bool:
+        # Due every refit_s, counting from the
+        # last fit or the last failed attempt
+        now = now or time.time()
+        model = self._models.get(asset_id)
+        if model is not None and now - model.fitted_at < self.refit_s:
+            return False
+        failed = self._failed.get(asset_id)
+        return failed is None or now - failed >= self.refit_s
+
+    def fit(self, asset_id: str, readings: pd.DataFrame) -> ResponseModel:
+        """Fit an asset's model; a ValueError is kept until the next refit."""
+        try:
+            model = ResponseModel.fit(readings, min_rows=self.min_rows)
+        except ValueError:
+            with self._lock:
+                self._failed[asset_id] = time.time()
+            raise
+        with self._lock:
+            self._models[asset_id] = model
+            self._failed.pop(asset_id, None)
+        return model
+
+    def reset(self, asset_id: Optional[str] = None) -> None:
+        with self._lock:
+            if asset_id is None:
+                self._previous.clear()
+            else:
+                self._previous.pop(asset_id, None)
+
+    def step(
+        self, asset_id: str, reading: Mapping[str, Any]
+    ) -> Dict[str, Any]:
+        """One control tick; LookupError if the asset has no fitted model."""
+        start = time.perf_counter()
+        model = self._models.get(asset_id)
+        if model is None:
+            raise LookupError(f"No response model fitted for {asset_id!r}")
+        current = np.array(
+            [float(reading.get(s, c)) for s, c in zip(SETPOINTS, model.center)]
+        )
+        lo = np.maximum(self.lower, current - self.max_step)
+        hi = np.minimum(self.upper, current + self.max_step)
+        outside = lo > hi
+        if outside.any():
+            # Operating outside the global bounds: move
+            # back towards them by at most one step
+            toward = np.clip(
+                np.clip(current, self.lower, self.upper),
+                current - self.max_step,
+                current + self.max_step,
+            )
+            lo, hi = np.where(outside, toward, lo), np.where(
+                outside, toward, hi
+            )
+        previous = self._previous.get(asset_id)
+        warm = previous is not None
+        x0 = np.clip(previous if warm else current, lo, hi)
+        z, objective, iterations, converged = self._solve(
+            model,
+            model.to_z(x0),
+            model.to_z(lo),
+            model.to_z(hi),
+            start + self.budget_s,
+        )
+        x = model.to_x(z)
+        with self._lock:
+            self._previous[asset_id] = x
+        predicted = model.predict(x)
+        before = model.predict(current)
+        return {
+            "mode": "model",
+            "furnace_temp_setpoint": float(x[0]),
+            "cycle_time_setpoint": float(x[1]),
+            "current": dict(zip(SETPOINTS, current.tolist())),
+            "predicted": predicted,
+            "predicted_current": before,
+            "objective": objective,
+            "iterations": iterations,
+            "converged": converged,
+            "warm_start": warm,
+            "solve_ms": (time.perf_counter() - start) * 1e3,
+            "model_rows": model.rows,
+            "reason": (
+                "Model-based optimum within step limits"
+                if converged
+                else "Best point within time budget"
+            ),
+        }
+
+    def _objective(self, model: ResponseModel, z: np.ndarray):
+        # Weighted quadratic objective plus a
+        # quadratic penalty on scrap above max_scrap
+        b = model.coef @ self._w
+        phi = _features(z)
+        value = float(phi @ b)
+        grad, hess = _grad_hess(b, z)
+        scrap_b = model.coef[:, RESPONSES.index("scrap_rate")]
+        excess = float(phi @ scrap_b) - self.max_scrap
+        if excess > 0:
+            s_grad, s_hess = _grad_hess(scrap_b, z)
+            value += self.scrap_penalty * excess ** 2
+            grad = grad + 2 * self.scrap_penalty * excess * s_grad
+            hess = hess + 2 * self.scrap_penalty * (
+                np.outer(s_grad, s_grad) + excess * s_hess
+            )
+        return value, grad, hess
+
+    def _line_search(
+        self, model: ResponseModel, z, value, grad, direction, lo, hi
+    ):
+        # Backtracking along the projected path
+        # until the Armijo condition holds
+        step = 1.0
+        for _ in range(30):
+            candidate = np.clip(z + step * direction, lo, hi)
+            decrease = float(grad @ (candidate - z))
+            if decrease < 0:
+                cand_value, cand_grad, cand_hess = self._objective(
+                    model, candidate
+                )
+                if cand_value <= value + 1e-4 * decrease:
+                    return candidate, cand_value, cand_grad, cand_hess
+            step *= 0.5
+        return None
+
+    def _solve(
+        self,
+        model: ResponseModel,
+        z: np.ndarray,
+        lo: np.ndarray,
+        hi: np.ndarray,
+        deadline: float,
+    ):
+        value, grad, hess = self._objective(model, z)
+        converged = False
+        iterations = 0
+        while iterations < self.max_iter and time.perf_counter() < deadline:
+            iterations += 1
+            directions = [-grad]
+            # Newton direction first when the local model is convex
+            if np.all(np.linalg.eigvalsh(hess) > 1e-9):
+                directions.insert(0, -np.linalg.solve(hess, grad))
+            accepted = None
+            for direction in directions:
+                accepted = self._line_search(
+                    model, z, value, grad, direction, lo, hi
+                )
+                if accepted is not None:
+                    break
+            if accepted is None:
+                converged = True  # no descent direction left inside the box
+                break
+            moved = np.abs(accepted[0] - z).max()
+            z, value, grad, hess = accepted
+            if (
+                moved < 1e-7
+                or np.abs(np.clip(z - grad, lo, hi) - z).max() < 1e-6
+            ):
+                converged = True
+                break
+        return z, value, iterations, converged
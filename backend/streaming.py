@@ -0,0 +1,193 @@
+import asyncio
+import json
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from kpis_and_analytics import analytic_alerts
+
+# KPI columns pushed to subscribers, and the smallest change worth sending.
+STREAM_KPIS = (
+    "oee",
+    "scrap_rate",
+    "first_pass_yield",
+    "electricity_per_unit",
+    "gas_per_unit",
+    "water_per_unit",
+    "furnace_thermal_efficiency",
+    "throughput_rate",
+    "flue_gas_temperature",
+    "cooling_water_deltaT",
+    "furnace_temp",
+    "die_temp",
+    "die_wear_rate",
+    "unplanned_downtime",
+    "ghg_total_ghg",
+)
+DELTA_TOLERANCE = 1e-9
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(
+        "data: " + json.dumps(jsonable_encoder(data), separators=(",", ":"))
+    )
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def _changed(old: Optional[float], new: Optional[float]) -> bool:
+    if old is None or new is None:
+        return old is not new
+    return abs(new - old) > DELTA_TOLERANCE
+
+
+class Subscription:
+    def __init__(self, asset_ids: Optional[Set[str]], queue_size: int):
+        self.asset_ids = asset_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message: bytes) -> None:
+        # Slow consumers lose their oldest pending message rather than
+        # stalling the fan-out for everyone else.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class KpiBroadcaster:
+    """Shared fan-out of KPI deltas and newly raised alerts.
+
+    ``publish`` may be called from any thread (e.g. the ingestion pipeline's
+    worker). It computes the delta and alert events once per asset, encodes
+    each event once, and hands the same bytes to every subscriber on the
+    event loop, so N clients cost N queue puts, not N computations.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 256,
+        alerts_fn: Optional[Callable[[str, Dict[str, Any]], List[str]]] = None,
+    ):
+        self.queue_size = queue_size
+        self.alerts_fn = alerts_fn
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: List[Subscription] = []
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._alerts: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.published = 0
+        self.delivered = 0
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, asset_ids: Optional[Set[str]] = None) -> Subscription:
+        sub = Subscription(asset_ids, self.queue_size)
+        with self._lock:
+            snapshot = {
+                a: v
+                for a, v in self._last.items()
+                if asset_ids is None or a in asset_ids
+            }
+            alerts = {
+                a: sorted(v)
+                for a, v in self._alerts.items()
+                if asset_ids is None or a in asset_ids
+            }
+        sub.offer(format_sse("snapshot", {"kpis": snapshot, "alerts": alerts}))
+        self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+
+    def publish(self, asset_id: str, kpis: Dict[str, Any]) -> None:
+        messages = self._events(asset_id, kpis)
+        if messages and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._fan_out, asset_id, messages)
+
+    def publish_frame(self, kpis) -> None:
+        """Publish the latest row per asset of a KPI batch."""
+        latest = kpis.groupby("asset_id", sort=False).tail(1)
+        for row in latest.to_dict("records"):
+            self.publish(row["asset_id"], row)
+
+    def _events(self, asset_id: str, kpis: Dict[str, Any]) -> List[bytes]:
+        current = {}
+        for k in STREAM_KPIS:
+            v = kpis.get(k)
+            current[k] = (
+                None
+                if v is None or (isinstance(v, float) and math.isnan(v))
+                else float(v)
+            )
+        if self.alerts_fn is not None:
+            alerts = set(self.alerts_fn(asset_id, current))
+        else:
+            # analytic_alerts expects the scalar
+            # KPI shape, without missing values
+            alerts = set(
+                analytic_alerts(
+                    {k: v for k, v in current.items() if v is not None}
+                )
+            )
+        with self._lock:
+            previous = self._last.get(asset_id, {})
+            delta = {
+                k: v
+                for k, v in current.items()
+                if k not in previous or _changed(previous[k], v)
+            }
+            self._last[asset_id] = current
+            raised = alerts - self._alerts.get(asset_id, set())
+            cleared = self._alerts.get(asset_id, set()) - alerts
+            self._alerts[asset_id] = alerts
+            messages = []
+            if delta:
+                self._seq += 1
+                messages.append(
+                    format_sse(
+                        "kpi",
+                        {
+                            "asset_id": asset_id,
+                            "ts": kpis.get("ts"),
+                            "delta": delta,
+                        },
+                        self._seq,
+                    )
+                )
+            if raised or cleared:
+                self._seq += 1
+                messages.append(
+                    format_sse(
+                        "alert",
+                        {
+                            "asset_id": asset_id,
+                            "raised": sorted(raised),
+                            "cleared": sorted(cleared),
+                        },
+                        self._seq,
+                    )
+                )
+        return messages
+
+    def _fan_out(self, asset_id: str, messages: List[bytes]) -> None:
+        self.published += len(messages)
+        for sub in self._subscribers:
+            if sub.asset_ids is None or asset_id in sub.asset_ids:
+                for message in messages:
+                    sub.offer(message)
+                    self.delivered += 1
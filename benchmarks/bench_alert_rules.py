@@ -0,0 +1,62 @@
+"""Per-tick cost of AlertRuleEngine for many rules across many assets.
+
+    python benchmarks/bench_alert_rules.py --rules 10000 --assets 500 --ticks 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from alert_rules import AlertRuleEngine  # noqa: E402
+
+
+def synthetic_rules(n, n_kpis, rng):
+    rules = []
+    for i in range(n):
+        # KPIs are standard normal; thresholds sit 2-4 sigma out (rates: 0.5-1.5)
+        op = str(rng.choice([">", "<"]))
+        sign = 1 if op == ">" else -1
+        rule = {"id": f"rule-{i}", "kpi": f"kpi_{rng.integers(n_kpis)}", "op": op,
+                "threshold": sign * float(rng.uniform(2, 4)), "duration_s": float(rng.choice([0, 60, 300])),
+                "cooldown_s": float(rng.choice([0, 600]))}
+        if rng.random() < 0.2:
+            rule.update(type="rate", threshold=sign * float(rng.uniform(0.5, 1.5)))
+        rule["clear_threshold"] = rule["threshold"] - sign * 0.2
+        rules.append(rule)
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--assets", type=int, default=500)
+    parser.add_argument("--kpis", type=int, default=40)
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    engine = AlertRuleEngine(synthetic_rules(args.rules, args.kpis, rng))
+    assets = [f"press-{i}" for i in range(args.assets)]
+    values = rng.normal(size=(args.assets, len(engine.kpis)))
+
+    samples, events = [], 0
+    for t in range(args.ticks):
+        values = 0.9 * values + rng.normal(scale=0.45, size=values.shape)
+        start = time.perf_counter()
+        events += len(engine.evaluate(assets, values, ts=1_700_000_000 + t * 60.0))
+        samples.append(time.perf_counter() - start)
+
+    ms = np.array(samples[1:] or samples) * 1e3
+    print(f"rules x assets: {args.rules} x {args.assets} = {args.rules * args.assets:,} evaluations/tick")
+    print(f"tick latency:   p50 {np.percentile(ms, 50):.1f} ms, p99 {np.percentile(ms, 99):.1f} ms, "
+          f"max {ms.max():.1f} ms (budget 1000 ms)")
+    print(f"throughput:     {args.rules * args.assets / (np.mean(ms) / 1e3):,.0f} rule evaluations/s")
+    print(f"events:         {events} raise/clear transitions over {args.ticks} ticks")
+
+
+if __name__ == "__main__":
+    main()
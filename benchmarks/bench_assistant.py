@@ -0,0 +1,89 @@
+"""Digital worker assistant under concurrent operator queries.
+
+``--operators`` simulated operators each send ``--queries`` typical
+questions to POST /digital-worker-assistant for one of ``--assets``
+presses, all at once through an in-process ASGI client, and the latency
+percentiles and throughput are reported for the context-snapshot path
+against the previous per-query path (fresh reading, KPI history, full
+analytics and intent matching on every request), mounted on a
+benchmark-only route.
+
+    python benchmarks/bench_assistant.py --operators 50 --queries 40 --assets 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("DT_HISTORY_DB", ":memory:")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import httpx  # noqa: E402
+from fastapi import Request  # noqa: E402
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+
+import main  # noqa: E402
+from kpis_and_analytics import digital_worker_assistant, full_analytics  # noqa: E402
+
+QUERIES = ("What is the current OEE?", "Any alerts on this press?", "How is the scrap trend?",
+           "Recommend an SOP for this batch", "What does the OEE look like now?", "hello")
+BASELINE_PATH = "/bench/digital-worker-assistant-per-query"
+
+
+def per_query_answer(query, asset_id):
+    data = main.ingest_reading(asset_id)
+    history = main.kpi_history(asset_id, 12)
+    kpis = full_analytics(data)["kpis"]
+    return {"response": digital_worker_assistant(query, kpis, history, rolling=main.rolling.asset(asset_id))}
+
+
+@main.app.post(BASELINE_PATH)
+async def per_query_assistant(request: Request):
+    req = await request.json()
+    # Off the event loop, like the real route, so only the context snapshot differs
+    return await run_in_threadpool(per_query_answer, req.get("query", ""), req.get("asset_id", main.DEFAULT_ASSET))
+
+
+async def operator(client, path, asset_id, queries, seed, latencies):
+    rng = np.random.default_rng(seed)
+    for query in rng.choice(QUERIES, size=queries):
+        t0 = time.perf_counter()
+        resp = await client.post(path, json={"query": str(query), "asset_id": asset_id})
+        latencies.append(time.perf_counter() - t0)
+        resp.raise_for_status()
+
+
+async def run(path, operators, queries, assets):
+    transport = httpx.ASGITransport(app=main.app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(operator(client, path, f"press-{i % assets + 1}", queries, i, latencies)
+                               for i in range(operators)))
+        elapsed = time.perf_counter() - t0
+    return np.array(latencies), elapsed
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--operators", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=40, help="queries per operator")
+    parser.add_argument("--assets", type=int, default=10)
+    args = parser.parse_args()
+
+    # Warm history, rolling windows and the batch index for every asset first
+    asyncio.run(run(BASELINE_PATH, args.assets, 1, args.assets))
+    print(f"{args.operators} operators x {args.queries} queries over {args.assets} assets")
+    print(f"{'path':<12}{'p50':>10}{'p99':>10}{'max':>10}{'req/s':>10}")
+    for name, path in (("per query", BASELINE_PATH), ("snapshot", "/digital-worker-assistant")):
+        latencies, elapsed = asyncio.run(run(path, args.operators, args.queries, args.assets))
+        print(f"{name:<12}{np.median(latencies) * 1e3:8.1f}ms{np.percentile(latencies, 99) * 1e3:8.1f}ms"
+              f"{latencies.max() * 1e3:8.1f}ms{len(latencies) / elapsed:10,.0f}")
+    print(f"contexts: {main.assistant_contexts.metrics()}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,116 @@
+"""Batch-history index: incremental load and SOP query latency.
+
+Loads ``--batches`` synthetic batches (hourly, ``--presses`` presses with
+rotating parts) into a BatchIndex in ingestion-sized chunks, then times
+filtered top-k queries ("best OEE batches for this part/press in the last
+90 days") and nearest-neighbour lookups against the same queries done on a
+pandas frame of all batches, and the old linear max over a list of dicts.
+
+    python benchmarks/bench_batch_index.py --batches 2000000 --presses 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from batch_index import PROCESS_PARAMS, BatchIndex  # noqa: E402
+from kpis_and_analytics import ingest_kpis_batch  # noqa: E402
+from sample_data import SyntheticPlant  # noqa: E402
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, default=2_000_000)
+    parser.add_argument("--presses", type=int, default=500)
+    parser.add_argument("--chunk", type=int, default=500, help="batches per add_frame call, as the pipeline sends")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    presses = [f"press-{i + 1}" for i in range(args.presses)]
+    steps = -(-args.batches // args.presses)
+    frames = []
+    for frame in SyntheticPlant(presses, interval_s=3600).frames(steps):
+        kpis = ingest_kpis_batch(frame)
+        frames.append(frame.assign(oee=kpis["oee"].to_numpy()))
+    batches = pd.concat(frames, ignore_index=True).head(args.batches)
+    print(f"batches:                {len(batches):,} over {(batches.ts.max() - batches.ts.min()) / 86400:,.0f} days")
+
+    index = BatchIndex()
+    t0 = time.perf_counter()
+    for start in range(0, len(batches), args.chunk):
+        index.add_frame(batches.iloc[start:start + args.chunk])
+    load_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    index.build()
+    print(f"incremental load:       {len(batches) / load_s:,.0f} batches/s ({args.chunk}-batch chunks), "
+          f"KD-tree build {time.perf_counter() - t0:.2f} s")
+
+    since = batches.ts.max() - 90 * 86400
+    press, part = presses[0], batches.part_number.iloc[0]
+    queries = {
+        "all presses, 90 days": {"since": since},
+        "one press, 90 days": {"asset_id": press, "since": since},
+        "one part, 90 days": {"part_number": part, "since": since},
+        "press + part, 90 days": {"asset_id": press, "part_number": part, "since": since},
+    }
+    print(f"\n{'top-%d query' % args.k:<24}{'index':>10}{'pandas':>12}{'first':>12}")
+    for name, filters in queries.items():
+        # The first query with a new combination of filters partitions the history by it
+        t0 = time.perf_counter()
+        index.top_k(args.k, **filters)
+        first_s = time.perf_counter() - t0
+        got, index_s = timed(lambda: index.top_k(args.k, **filters), args.repeat)
+
+        def scan():
+            mask = batches.ts.to_numpy() >= filters["since"]
+            for label in ("asset_id", "part_number"):
+                if label in filters:
+                    mask &= (batches[label] == filters[label]).to_numpy()
+            return batches[mask].nlargest(args.k, "oee")
+        expected, scan_s = timed(scan, max(3, args.repeat // 5))
+        assert np.allclose([b["oee"] for b in got], expected.oee.to_numpy()), name
+        print(f"{name:<24}{index_s * 1e3:8.2f} ms{scan_s * 1e3:10.1f} ms{first_s * 1e3:10.1f} ms")
+
+    x = batches[list(PROCESS_PARAMS)].to_numpy()
+    current = dict(zip(PROCESS_PARAMS, x[len(x) // 2]))
+    center, scale = np.nanmean(x, axis=0), np.nanstd(x, axis=0)
+    scaled = (x - center) / scale
+    query = (x[len(x) // 2] - center) / scale
+    print(f"\n{'nearest %d' % args.k:<24}{'index':>10}{'brute':>12}")
+    got, index_s = timed(lambda: index.nearest(current, args.k), args.repeat)
+    expected, brute_s = timed(lambda: np.sort(np.sqrt(((scaled - query) ** 2).sum(axis=1)))[:args.k],
+                              max(3, args.repeat // 5))
+    assert np.allclose([b["distance"] for b in got], expected)
+    print(f"{'all batches':<24}{index_s * 1e3:8.2f} ms{brute_s * 1e3:10.1f} ms")
+    got, index_s = timed(lambda: index.nearest(current, args.k, part_number=part), args.repeat)
+    print(f"{'same part':<24}{index_s * 1e3:8.2f} ms")
+    # Batches closed after the tree was built are searched by brute force until the next rebuild
+    extra = int(index.rebuild_fraction * len(index) * 0.9)
+    for start in range(0, extra, args.chunk):
+        index.add_frame(batches.iloc[start:start + args.chunk].assign(ts=batches.ts.max() + 1))
+    got, index_s = timed(lambda: index.nearest(current, args.k), args.repeat)
+    print(f"{'+%dk not in tree' % (extra // 1000):<24}{index_s * 1e3:8.2f} ms")
+
+    history = batches.head(200_000).to_dict("records")
+    _, list_s = timed(lambda: max(history, key=lambda h: h.get("oee", 0)), 3)
+    print(f"\nold linear max over a list of dicts: {list_s * 1e3:.1f} ms per 200k batches "
+          f"(~{list_s * len(batches) / 200_000 * 1e3:,.0f} ms for {len(batches):,}), unfiltered")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Closed-loop setpoint optimizer latency per control tick.
+
+Fits a response model per furnace on synthetic history, then times
+SetpointOptimizer.step cold (no previous solution) and warm-started, and
+the /closed-loop-optimization endpoint end to end for the same furnaces.
+
+    python benchmarks/bench_closed_loop.py --furnaces 50 --ticks 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("DT_HISTORY_DB", ":memory:")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from replay_closed_loop import plant_reading, synthetic_history  # noqa: E402
+from setpoint_optimizer import SetpointOptimizer  # noqa: E402
+
+
+def percentiles(times):
+    p50, p99 = np.percentile(times, [50, 99]) * 1e3
+    return f"p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {max(times) * 1e3:.2f} ms"
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--furnaces", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--history", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ids = [f"furnace-{i + 1}" for i in range(args.furnaces)]
+    histories = {a: synthetic_history(args.history, rng, a) for a in ids}
+
+    optimizer = SetpointOptimizer()
+    t0 = time.perf_counter()
+    for a in ids:
+        optimizer.fit(a, histories[a])
+    fit_s = (time.perf_counter() - t0) / len(ids)
+
+    cold, warm = [], []
+    for tick in range(args.ticks):
+        temps, cycles = rng.uniform(1160, 1240, len(ids)), rng.uniform(1.5, 3.5, len(ids))
+        for a, temp, cycle in zip(ids, temps, cycles):
+            reading = plant_reading(temp, cycle, rng, a).iloc[0].to_dict()
+            if tick == 0 or tick % 5 == 0:
+                optimizer.reset(a)
+            t0 = time.perf_counter()
+            decision = optimizer.step(a, reading)
+            (warm if decision["warm_start"] else cold).append(time.perf_counter() - t0)
+
+    # End to end through the API, with the history in the store
+    for a in ids:
+        main.store.append_frame(histories[a])
+    client = TestClient(main.app)
+    api = []
+    for tick in range(args.ticks):
+        for a in ids:
+            main._last_sample.clear()
+            t0 = time.perf_counter()
+            resp = client.get("/closed-loop-optimization", params={"asset_id": a})
+            api.append(time.perf_counter() - t0)
+            assert resp.status_code == 200
+    first = api[:len(ids)]
+
+    print(f"furnaces x ticks:   {args.furnaces} x {args.ticks}")
+    print(f"model fit:          {fit_s * 1e3:.2f} ms per furnace ({args.history} readings)")
+    print(f"step cold:          {percentiles(cold)}")
+    print(f"step warm:          {percentiles(warm)}")
+    print(f"API first tick:     {percentiles(first)} (includes model fit from the store)")
+    print(f"API later ticks:    {percentiles(api[len(ids):])}")
+
+
+if __name__ == "__main__":
+    main_()
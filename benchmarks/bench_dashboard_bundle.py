@@ -0,0 +1,89 @@
+"""Dashboard data transfer: separate panel requests vs /dashboard-bundle.
+
+Loads ``--days`` of 1-minute readings for one press into the history store
+(kept raw), then compares what a dashboard rerun costs: the three panel
+requests the dashboard used to make plus the full KPI series it would need
+for a chart over the whole range, against one /dashboard-bundle request with
+server-side LTTB downsampling.
+
+    python benchmarks/bench_dashboard_bundle.py --days 365 --points 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("DT_HISTORY_DB", ":memory:")
+os.environ.setdefault("DT_HISTORY_RAW_S", str(10 * 365 * 86400))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from kpis_and_analytics import ingest_kpis_batch  # noqa: E402
+from sample_data import SyntheticPlant  # noqa: E402
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        main.cache.invalidate()
+        main.series_cache.invalidate()
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, float(np.median(times))
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=float, default=365)
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    asset_id = main.DEFAULT_ASSET
+    start = time.time() - args.days * 86400
+    t0 = time.perf_counter()
+    for frame in SyntheticPlant([asset_id], start_ts=start).frames(int(args.days * 1440)):
+        main.store.append_frame(frame)
+    print(f"readings:            {main.store.count(asset_id):,} (loaded in {time.perf_counter() - t0:.1f} s)")
+
+    client = TestClient(main.app)
+    main._last_sample.clear()
+    fields = list(main.DASHBOARD_SERIES)
+
+    def separate():
+        sizes = [len(client.get(u, params={"asset_id": asset_id}).content)
+                 for u in ("/full-analytics", "/closed-loop-optimization", "/ai-sop-recommendation")]
+        # Unreduced series for the chart: every reading in the range
+        frame = main.store.series_frame(asset_id, start)
+        kpis = ingest_kpis_batch(frame)
+        body = json.dumps({"ts": frame["ts"].tolist(), **{f: kpis[f].tolist() for f in fields}})
+        return sum(sizes) + len(body)
+
+    def bundle():
+        resp = client.get("/dashboard-bundle", params={"asset_id": asset_id, "start": start, "points": args.points})
+        assert resp.status_code == 200
+        return len(resp.content)
+
+    raw_bytes, raw_s = timed(separate, args.repeat)
+    bundle_bytes, bundle_s = timed(bundle, args.repeat)
+    # Steady state: a new reading has invalidated the bundle but the range series is still cached
+    client.get("/dashboard-bundle", params={"asset_id": asset_id, "start": start, "points": args.points})
+    main._last_sample.clear()
+    t0 = time.perf_counter()
+    cached = client.get("/dashboard-bundle", params={"asset_id": asset_id, "start": start, "points": args.points})
+    cached_s = time.perf_counter() - t0
+    points = sum(len(s["ts"]) for s in cached.json()["timeseries"]["series"].values())
+
+    print(f"separate + full:     4 round trips, {raw_bytes / 1e6:,.1f} MB, {raw_s * 1e3:,.0f} ms")
+    print(f"/dashboard-bundle:   1 round trip, {bundle_bytes / 1e3:,.0f} kB ({points:,} points over "
+          f"{len(fields)} series), {bundle_s * 1e3:,.0f} ms cold, {cached_s * 1e3:.1f} ms after a new reading")
+
+
+if __name__ == "__main__":
+    main_()
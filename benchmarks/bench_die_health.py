@@ -0,0 +1,88 @@
+"""Die wear / RUL engine throughput and accuracy.
+
+Streams synthetic wear readings for N dies through DieHealthEngine,
+batched per tick and one reading at a time, and compares against
+refitting a line to each die's full history on every reading (the cost
+the incremental filter avoids). Then reports the RUL error against the
+synthetic dies' true remaining life and how often the conservative p05
+RUL stays below it.
+
+    python benchmarks/bench_die_health.py --dies 2000 --ticks 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from die_health import DieHealthEngine  # noqa: E402
+
+
+def synthetic_dies(n, ticks, rng, t_ref=300.0, t_scale=100.0):
+    # Wear per cycle rises with die temperature; readings are noisy
+    b0 = rng.uniform(2e-4, 8e-4, n)
+    b1 = rng.uniform(0.0, 3e-4, n)
+    temp = rng.uniform(250, 400, (ticks, n))
+    cycles = rng.uniform(5, 15, (ticks, n))
+    rate = b0 + b1 * (temp - t_ref) / t_scale
+    wear = np.cumsum(np.vstack([np.zeros(n), (rate * cycles)[1:]]), axis=0)
+    observed = wear + rng.normal(0, 0.01, wear.shape)
+    true_rul = np.maximum(1.0 - wear[-1], 0) / rate[-1]
+    return observed, temp, cycles, true_rul
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dies", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    wear, temp, cycles, true_rul = synthetic_dies(args.dies, args.ticks, rng)
+    ids = [f"die-{i}" for i in range(args.dies)]
+    updates = args.dies * args.ticks
+
+    engine = DieHealthEngine()
+    t0 = time.perf_counter()
+    for t in range(args.ticks):
+        engine.update(ids, wear[t], temp[t], cycles[t])
+    batched_s = time.perf_counter() - t0
+
+    single = DieHealthEngine()
+    sample = ids[:min(200, args.dies)]
+    t0 = time.perf_counter()
+    for t in range(args.ticks):
+        for i, d in enumerate(sample):
+            single.update_one(d, {"die_wear_rate": wear[t, i], "die_temp": temp[t, i], "cycles": cycles[t, i]})
+    single_s = (time.perf_counter() - t0) / (len(sample) * args.ticks)
+
+    # Refit on full history per reading: cost per update grows with history length
+    refit = {}
+    for length in (10, 100, 1000):
+        x = np.cumsum(rng.uniform(20, 40, length))
+        y = x * 5e-4 + rng.normal(0, 0.01, length)
+        t0 = time.perf_counter()
+        for _ in range(200):
+            np.polyfit(x, y, 1)
+        refit[length] = (time.perf_counter() - t0) / 200
+
+    est = engine.estimates(ids)
+    rul = est["rul_cycles"].to_numpy()
+    rel_err = np.abs(rul - true_rul) / true_rul
+    conservative = (est["rul_cycles_p05"].to_numpy() <= true_rul).mean()
+
+    print(f"dies x ticks:        {args.dies} x {args.ticks}")
+    print(f"batched update:      {updates / batched_s:,.0f} updates/s ({batched_s / args.ticks * 1e3:.2f} ms per tick)")
+    print(f"update_one:          {1 / single_s:,.0f} updates/s ({single_s * 1e6:.1f} us per reading)")
+    for length, cost in refit.items():
+        print(f"refit, {length:>4} points: {1 / cost:,.0f} updates/s ({cost * 1e6:.1f} us per reading)")
+    print(f"RUL relative error:  median {np.median(rel_err):.1%}, p90 {np.quantile(rel_err, 0.9):.1%}")
+    print(f"p05 RUL <= true RUL: {conservative:.1%} of dies")
+
+
+if __name__ == "__main__":
+    main()
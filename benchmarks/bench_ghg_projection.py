@@ -0,0 +1,80 @@
+"""Monthly GHG report over a year of per-minute readings with hourly grid intensity.
+
+Compares the vectorized emissions_report with a per-reading loop over
+project_ghg_emissions (on a sample, extrapolated), and times multi-horizon
+projections for many assets.
+
+    python benchmarks/bench_ghg_projection.py --assets 10 --days 365
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from emission_factors import EmissionFactorRegistry, DEFAULT_FACTORS_PATH  # noqa: E402
+from ghg_projection import emissions_report, project_ghg_emissions, project_horizons  # noqa: E402
+
+START = 1704067200.0  # 2024-01-01T00:00:00Z
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=10)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--loop-sample", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    registry = EmissionFactorRegistry.from_file(DEFAULT_FACTORS_PATH)
+    hours = START + np.arange(args.days * 24) * 3600.0
+    registry.set_series("power_usage", hours, 0.6 + 0.25 * np.sin(np.arange(len(hours)) * 2 * np.pi / 24)
+                        + rng.normal(0, 0.02, len(hours)))
+
+    per_asset = args.days * 1440
+    n = per_asset * args.assets
+    usage = pd.DataFrame({
+        "asset_id": np.repeat([f"press-{i + 1}" for i in range(args.assets)], per_asset),
+        "ts": np.tile(START + np.arange(per_asset) * 60.0, args.assets),
+        "power_usage": rng.uniform(0.5, 3.0, n),
+        "gas_consumption": rng.uniform(0.1, 1.0, n),
+        "water_usage": rng.uniform(0.0, 0.05, n),
+        "material_input": rng.uniform(5.0, 20.0, n),
+    })
+
+    t0 = time.perf_counter()
+    report = emissions_report(usage, period="month", registry=registry)
+    vectorized_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    emissions_report(usage, period="month", by="asset_id", registry=registry)
+    by_asset_s = time.perf_counter() - t0
+
+    sample = usage.head(min(args.loop_sample, n)).to_dict("records")
+    t0 = time.perf_counter()
+    loop_total = 0.0
+    resources = ("power_usage", "gas_consumption", "water_usage", "material_input")
+    for row in sample:
+        totals = {k: row[k] for k in resources}
+        loop_total += project_ghg_emissions(totals, ts=row["ts"], registry=registry)["total_ghg"]
+    loop_s = (time.perf_counter() - t0) * n / len(sample)
+    vec_sample = emissions_report(usage.head(len(sample)), period="year", registry=registry)["total_ghg"].sum()
+    assert np.isclose(loop_total, vec_sample, rtol=1e-9), (loop_total, vec_sample)
+
+    rates = usage.groupby("asset_id")[["power_usage", "gas_consumption", "water_usage", "material_input"]].mean() * 60
+    t0 = time.perf_counter()
+    projection = project_horizons(rates, [24, 24 * 7, 24 * 30, 24 * 365], start_ts=START, registry=registry)
+    horizons_s = time.perf_counter() - t0
+
+    print(f"readings:                    {n} ({args.assets} assets x {args.days} days per-minute)")
+    print(f"monthly report (plant):      {vectorized_s * 1e3:.0f} ms ({len(report)} months)")
+    print(f"monthly report (per asset):  {by_asset_s * 1e3:.0f} ms")
+    print(f"per-reading loop (est.):     {loop_s:.1f} s (x{loop_s / vectorized_s:.0f})")
+    print(f"horizon projection:          {horizons_s * 1e3:.1f} ms ({len(projection)} asset-horizons)")
+
+
+if __name__ == "__main__":
+    main()
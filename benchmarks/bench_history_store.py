@@ -0,0 +1,75 @@
+"""Query latency of HistoryStore as it grows.
+
+Bulk-inserts synthetic readings for ``--assets`` assets at 1-minute spacing
+and, at each checkpoint, times a trailing-window read (``latest``) and a
+one-hour time-range read (``window_frame``) for a random asset.
+
+    python benchmarks/bench_history_store.py --rows 1000000
+    python benchmarks/bench_history_store.py --rows 100000000 --db /data/history.db
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from history_store import HistoryStore  # noqa: E402
+from sample_data import generate_sample_data  # noqa: E402
+
+
+def _timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return np.percentile(samples, [50, 99]) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--assets", type=int, default=100)
+    parser.add_argument("--chunk", type=int, default=100_000)
+    parser.add_argument("--checkpoints", type=int, default=5)
+    parser.add_argument("--db", default=None, help="store path (default: a temp file)")
+    args = parser.parse_args()
+
+    random.seed(0)
+    path = args.db or os.path.join(tempfile.mkdtemp(), "history.db")
+    store = HistoryStore(path, compact_every=10**12)
+    template = pd.json_normalize([generate_sample_data() for _ in range(args.chunk)])
+    assets = [f"press-{i}" for i in range(args.assets)]
+    asset_col = np.array(assets)[np.arange(args.chunk) % args.assets]
+    t0 = 1_700_000_000.0
+    step = max(args.rows // args.checkpoints, 1)
+
+    print(f"{'rows':>12} {'insert rows/s':>14} {'latest(10) p50/p99 ms':>24} {'1h window p50/p99 ms':>22}")
+    inserted = 0
+    while inserted < args.rows:
+        target = min(inserted + step, args.rows)
+        start = time.perf_counter()
+        while inserted < target:
+            n = min(args.chunk, target - inserted)
+            frame = template.iloc[:n].copy()
+            frame["asset_id"] = asset_col[:n]
+            frame["ts"] = t0 + ((inserted + np.arange(n)) // args.assets) * 60.0
+            store.append_frame(frame)
+            inserted += n
+        rate = step / (time.perf_counter() - start)
+        t_end = t0 + (inserted // args.assets) * 60.0
+        latest = _timed(lambda: store.latest(random.choice(assets), 10), 200)
+        window = _timed(lambda: store.window_frame(random.choice(assets), t_end - 3600, t_end), 200)
+        print(f"{inserted:>12,} {rate:>14,.0f} {latest[0]:>11.3f} / {latest[1]:<10.3f} "
+              f"{window[0]:>9.3f} / {window[1]:<10.3f}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
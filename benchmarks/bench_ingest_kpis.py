@@ -0,0 +1,50 @@
+"""Records/sec of ingest_kpis_batch against the per-dict ingest_kpis loop.
+
+    python benchmarks/bench_ingest_kpis.py --records 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from kpis_and_analytics import ingest_kpis, ingest_kpis_batch  # noqa: E402
+from sample_data import generate_sample_data  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    records = [generate_sample_data() for _ in range(args.records)]
+    frame = pd.json_normalize(records)
+
+    start = time.perf_counter()
+    scalar = [ingest_kpis(r) for r in records]
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = ingest_kpis_batch(frame)
+    batch_s = time.perf_counter() - start
+
+    for kpi in ("oee", "scrap_rate", "electricity_per_unit", "furnace_thermal_efficiency"):
+        np.testing.assert_allclose(batch[kpi].to_numpy(), [k[kpi] for k in scalar], rtol=1e-12)
+    np.testing.assert_allclose(batch["ghg_total_ghg"].to_numpy(),
+                               [k["ghg_scope_1_2"]["total_ghg"] for k in scalar], rtol=1e-12)
+
+    print(f"records:           {args.records}")
+    print(f"ingest_kpis loop:  {args.records / loop_s:,.0f} records/s ({loop_s:.3f}s)")
+    print(f"ingest_kpis_batch: {args.records / batch_s:,.0f} records/s ({batch_s:.3f}s)")
+    print(f"speedup:           {loop_s / batch_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
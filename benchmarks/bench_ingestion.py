@@ -0,0 +1,49 @@
+"""Throughput and end-to-end latency of the SCADA ingestion pipeline.
+
+Simulates ``--presses`` presses with ``--tags`` extra analogue tags each,
+polled at ``--rate`` Hz (0 = as fast as possible), feeding the KPI engine
+and an in-memory history store.
+
+    python benchmarks/bench_ingestion.py --presses 50 --tags 200 --rate 1 --polls 30
+    python benchmarks/bench_ingestion.py --presses 50 --tags 200 --rate 0 --polls 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from history_store import HistoryStore  # noqa: E402
+from scada_client import IngestionPipeline, SimulatedPLCSource  # noqa: E402
+
+
+async def run(args):
+    store = HistoryStore(":memory:")
+    source = SimulatedPLCSource([f"press-{i}" for i in range(args.presses)], rate_hz=args.rate,
+                                extra_tags=args.tags, max_polls=args.polls)
+    pipeline = IngestionPipeline(source, sinks=[lambda readings, kpis: store.append_frame(readings)],
+                                 batch_size=args.batch, queue_size=args.queue)
+    await pipeline.start()
+    await pipeline.done.wait()
+    await pipeline.stop()
+    return pipeline.metrics.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--presses", type=int, default=50)
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=0.0)
+    parser.add_argument("--polls", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--queue", type=int, default=20_000)
+    args = parser.parse_args()
+    metrics = asyncio.run(run(args))
+    metrics["tag_values_per_s"] = metrics["throughput_per_s"] * (args.tags + 26)
+    print(json.dumps(metrics, indent=2))
+
+
+if __name__ == "__main__":
+    main()
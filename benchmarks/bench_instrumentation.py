@@ -0,0 +1,181 @@
+"""Overhead of request/stage metrics and the sampling profiler.
+
+Drives the app's ASGI stack directly (no HTTP client threads) with a mix of
+analytics requests; caches are cleared and a new reading forced before
+every request, so each one does the full work. The three middleware stacks
+(off, metrics, metrics + profiler) run the mix in a shuffled order every
+round, and the overhead of a stack is the median over rounds of its time
+relative to "off" in the same round, so slow drift of the machine cancels
+out. Exits non-zero if an overhead exceeds ``--max-overhead``. This
+end-to-end A/B includes what isolated timings miss, e.g. the profiler
+thread taking the GIL from the request threads; the isolated costs of the
+middleware, stage timers and sampling are printed as a breakdown.
+
+    python benchmarks/bench_instrumentation.py --rounds 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+
+os.environ.setdefault("DT_HISTORY_DB", ":memory:")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from starlette.middleware import Middleware  # noqa: E402
+
+import main  # noqa: E402
+from instrumentation import Metrics, MetricsMiddleware, SamplingProfiler  # noqa: E402
+from sample_data import SyntheticPlant  # noqa: E402
+
+REQUESTS = (
+    ("GET", "/full-analytics", {}, None),
+    ("GET", "/closed-loop-optimization", {}, None),
+    ("GET", "/ai-sop-recommendation", {}, None),
+    ("GET", "/die-health", {}, None),
+    ("GET", "/alerts", {}, None),
+    ("POST", "/digital-worker-assistant", {}, {"query": "What is the current OEE?"}),
+)
+
+
+async def call(app, method, path, params=None, body=None):
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": urlencode(params or {}).encode(), "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode())],
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        pass
+    await app(scope, receive, send)
+
+
+async def run_mix(app, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for method, path, params, body in REQUESTS:
+            main.cache.invalidate()
+            main._last_sample.clear()
+            await call(app, method, path, params, body)
+    return time.perf_counter() - t0
+
+
+def build_stacks(profiler):
+    app = main.app
+    base = [m for m in app.user_middleware if m.cls is not MetricsMiddleware]
+    stacks = {}
+    for name, extra in (("off", []),
+                        ("metrics", [Middleware(MetricsMiddleware, metrics=main.metrics)]),
+                        ("profiler", [Middleware(MetricsMiddleware, metrics=main.metrics, profiler=profiler)])):
+        app.user_middleware = base + extra
+        stacks[name] = app.build_middleware_stack()
+    return stacks
+
+
+async def middleware_cost(n):
+    # Seconds per request the middleware adds around an app that does nothing
+    async def noop(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+    wrapped = MetricsMiddleware(noop, Metrics())
+    times = {}
+    for name, app in (("off", noop), ("on", wrapped)) * 3:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            await call(app, "GET", "/noop")
+        times[name] = min(times.get(name, float("inf")), time.perf_counter() - t0)
+    return (times["on"] - times["off"]) / n
+
+
+def stage_cost(n):
+    metrics = Metrics()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with metrics.stage("bench"):
+            pass
+    return (time.perf_counter() - t0) / n
+
+
+async def run(args):
+    profiler = SamplingProfiler(tempfile.mkdtemp(), slow_s=float("inf"))
+    stacks = build_stacks(profiler)
+    n_mix = args.repeat * len(REQUESTS)
+    await run_mix(stacks["metrics"], args.repeat)  # warm up models and imports
+
+    times = {name: [] for name in stacks}
+    rng = random.Random(0)
+    stages_before = sum(s["count"] for s in main.metrics.stage_summary().values())
+    metric_requests = 0
+    profiled_s = 0.0
+    busy_before = profiler.busy_s
+    for _ in range(args.rounds):
+        order = list(stacks)
+        rng.shuffle(order)
+        for name in order:
+            main.metrics.enabled = name != "off"
+            elapsed = await run_mix(stacks[name], args.repeat)
+            times[name].append(elapsed)
+            metric_requests += n_mix if name != "off" else 0
+            profiled_s += elapsed if name == "profiler" else 0.0
+    stages_per_request = (sum(s["count"] for s in main.metrics.stage_summary().values())
+                          - stages_before) / metric_requests
+
+    request_s = float(np.median(times["off"])) / n_mix
+    middleware_s = await middleware_cost(args.calls)
+    stage_s = stage_cost(args.calls) * stages_per_request
+    sampling = (profiler.busy_s - busy_before) / profiled_s
+
+    print(f"uninstrumented request:  {request_s * 1e3:.3f} ms (median over {args.rounds * n_mix:,} requests)")
+    print(f"middleware:              {middleware_s * 1e6:6.1f} us/request")
+    print(f"stage timers:            {stage_s * 1e6:6.1f} us/request ({stages_per_request:.1f} stages)")
+    print(f"profiler sampling:       {sampling:.2%} of wall time at {profiler.interval_s * 1e3:.0f} ms "
+          f"({len(profiler._samples):,} samples)")
+    isolated = {"metrics": (middleware_s + stage_s) / request_s}
+    isolated["profiler"] = isolated["metrics"] + sampling
+    off = np.array(times["off"])
+    overheads = {}
+    for name, cost in isolated.items():
+        ratios = np.array(times[name]) / off - 1
+        overheads[name] = float(np.median(ratios))
+        q1, q3 = np.percentile(ratios, [25, 75])
+        print(f"{name + ' overhead:':<24} {overheads[name]:+6.2%}   (rounds IQR {q1:+.2%} .. {q3:+.2%}; "
+              f"isolated {cost:.2%})")
+    return max(overheads.values())
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5, help="request mixes per round and configuration")
+    parser.add_argument("--history", type=int, default=2000, help="readings preloaded for the asset")
+    parser.add_argument("--calls", type=int, default=20_000, help="iterations of the isolated cost loops")
+    parser.add_argument("--max-overhead", type=float, default=0.02)
+    args = parser.parse_args()
+
+    for frame in SyntheticPlant([main.DEFAULT_ASSET], start_ts=time.time() - args.history * 60).frames(args.history):
+        main.store.append_frame(frame)
+    overhead = asyncio.run(run(args))
+    if overhead > args.max_overhead:
+        print(f"overhead above {args.max_overhead:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,70 @@
+"""Surrogate training, cold load and batched recommendation latency.
+
+Trains the resource surrogate on synthetic history, saves and reloads it,
+then times recommend_batch + simulate_optimized_batch per call for several
+batch sizes (p50/p99), against calling recommend_reading per record.
+
+    python benchmarks/bench_ml_inference.py --history 50000 --batches 1,100,1000,5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from ml.optimizer import recommend_batch, recommend_reading, simulate_optimized_batch  # noqa: E402
+from ml.surrogate import ResourceSurrogate, get_surrogate  # noqa: E402
+from sample_data import generate_sample_data  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=50_000)
+    parser.add_argument("--batches", default="1,100,1000,5000")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(0)
+    history = pd.json_normalize([generate_sample_data() for _ in range(args.history)])
+    t0 = time.perf_counter()
+    model = ResourceSurrogate().fit(history)
+    fit_s = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        model.save(model_dir)
+        t0 = time.perf_counter()
+        loaded = get_surrogate(model_dir)
+        load_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        assert get_surrogate(model_dir) is loaded
+        cached_s = time.perf_counter() - t0
+
+    print(f"training rows:     {args.history} (fit {fit_s:.2f} s)")
+    print(f"cold load:         {load_s * 1e3:.1f} ms, cached lookup {cached_s * 1e6:.0f} us")
+    print(f"{'batch':>7} {'p50 ms':>9} {'p99 ms':>9} {'records/s':>12}")
+    for size in (int(b) for b in args.batches.split(",")):
+        frame = history.sample(size, replace=True, random_state=1).reset_index(drop=True)
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            simulate_optimized_batch(frame, recommend_batch(frame, loaded))
+            times.append(time.perf_counter() - t0)
+        p50, p99 = np.percentile(times, [50, 99])
+        print(f"{size:>7} {p50 * 1e3:>9.2f} {p99 * 1e3:>9.2f} {size / p50:>12,.0f}")
+
+    records = history.head(200).to_dict("records")
+    t0 = time.perf_counter()
+    for record in records:
+        recommend_reading(record, loaded)
+    per_record = (time.perf_counter() - t0) / len(records)
+    print(f"per-record calls:  {per_record * 1e3:.2f} ms/record ({1 / per_record:,.0f} records/s)")
+
+
+if __name__ == "__main__":
+    main()
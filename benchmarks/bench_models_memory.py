@@ -0,0 +1,49 @@
+"""Bytes per reading: generate_sample_data dicts vs Reading / ReadingBatch.
+
+    python benchmarks/bench_models_memory.py --readings 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from models import Reading, ReadingBatch  # noqa: E402
+from sample_data import generate_sample_data  # noqa: E402
+
+
+def traced(build):
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readings", type=int, default=100_000)
+    args = parser.parse_args()
+    n = args.readings
+
+    random.seed(0)
+    dicts, dict_bytes = traced(lambda: [dict(generate_sample_data(), asset_id="press-1", ts=float(i))
+                                        for i in range(n)])
+    # Built from fresh dicts so the float objects are counted, not shared
+    readings, slot_bytes = traced(lambda: [Reading.from_dict(generate_sample_data(), "press-1", float(i))
+                                           for i in range(n)])
+    batch, batch_bytes = traced(lambda: ReadingBatch.from_records(dicts))
+    records, rec_bytes = traced(batch.to_structured)
+
+    print(f"readings:                  {n}")
+    print(f"dict (generate_sample_data): {dict_bytes / n:8.0f} B/reading")
+    print(f"Reading (__slots__):         {slot_bytes / n:8.0f} B/reading")
+    print(f"ReadingBatch (columns):      {batch_bytes / n:8.0f} B/reading ({batch.nbytes / n:.0f} B of array data)")
+    print(f"NumPy records (READING_DTYPE): {rec_bytes / n:6.0f} B/reading")
+    del readings, records
+
+
+if __name__ == "__main__":
+    main()
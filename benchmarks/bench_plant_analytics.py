@@ -0,0 +1,64 @@
+"""Scaling of plant_analytics on a synthetic site of registered presses and furnaces.
+
+Reports wall time and parallel efficiency (T1 / (N * TN)) for the thread
+and process pools at 1..N workers, and the vectorized path for reference.
+Every asset id comes from the registry, so the line/plant/site roll-ups
+run in every mode and are checked to agree with the vectorized ones.
+
+    python benchmarks/bench_plant_analytics.py --max-workers 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from models import AssetRegistry  # noqa: E402
+from plant_analytics import plant_analytics  # noqa: E402
+from sample_data import generate_sample_data  # noqa: E402
+
+
+def timed(fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--plants", type=int, default=20, help="plants of 5 lines x 10 presses (+ furnaces)")
+    args = parser.parse_args()
+
+    random.seed(0)
+    # 20 plants x 5 lines x 10 presses (+ one furnace each) = 2,000 assets
+    registry = AssetRegistry.synthetic(plants=args.plants, lines_per_plant=5, presses_per_line=10)
+    asset_ids = list(registry.presses) + list(registry.furnaces)
+    readings = {a: generate_sample_data() for a in asset_ids}
+    reference = plant_analytics(readings, registry)
+    print(f"assets: {len(asset_ids)} in {len(reference['lines'])} lines, {len(reference['plants'])} plants, "
+          f"{len(reference['sites'])} sites")
+
+    vec = timed(lambda: plant_analytics(readings, registry))
+    print(f"vectorized:           {vec * 1e3:8.1f} ms")
+    workers = sorted({1, 2, 4, args.max_workers} & set(range(1, args.max_workers + 1)))
+    for mode in ("thread", "process"):
+        base = None
+        for n in workers:
+            t = timed(lambda: plant_analytics(readings, registry, mode=mode, workers=n))
+            result = plant_analytics(readings, registry, mode=mode, workers=n)
+            assert result["assets"].keys() == reference["assets"].keys()
+            assert all(result["assets"][a]["alerts"] == reference["assets"][a]["alerts"] for a in asset_ids)
+            assert result["plants"].keys() == reference["plants"].keys()
+            base = base or t
+            print(f"{mode:8s} x{n:<3d}         {t * 1e3:8.1f} ms  speedup {base / t:4.2f}  "
+                  f"efficiency {base / (n * t):5.1%}")
+
+
+if __name__ == "__main__":
+    main()
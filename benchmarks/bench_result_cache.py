@@ -0,0 +1,55 @@
+"""Dashboard-style request load against the cached analytics endpoints.
+
+Each simulated rerun hits /full-analytics, /closed-loop-optimization and
+/ai-sop-recommendation (revalidating with If-None-Match) through an
+in-process client, first with the cache disabled and then enabled.
+
+    python benchmarks/bench_result_cache.py --reruns 500
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("DT_HISTORY_DB", ":memory:")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+ENDPOINTS = ("/full-analytics", "/closed-loop-optimization", "/ai-sop-recommendation")
+
+
+def run(client, reruns):
+    etags = {}
+    start = time.perf_counter()
+    for _ in range(reruns):
+        for path in ENDPOINTS:
+            headers = {"If-None-Match": etags[path]} if path in etags else {}
+            resp = client.get(path, headers=headers)
+            etags[path] = resp.headers.get("etag", etags.get(path))
+    return time.perf_counter() - start
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reruns", type=int, default=500)
+    args = parser.parse_args()
+    client = TestClient(main.app)
+    requests = args.reruns * len(ENDPOINTS)
+
+    main.cache.ttl_s = 0.0
+    off_s = run(client, args.reruns)
+    main.cache.ttl_s = 5.0
+    main.cache.hits = main.cache.misses = 0
+    on_s = run(client, args.reruns)
+
+    print(f"requests:      {requests}")
+    print(f"cache off:     {requests / off_s:,.0f} req/s")
+    print(f"cache on:      {requests / on_s:,.0f} req/s")
+    print(f"cache metrics: {main.cache.metrics()}")
+
+
+if __name__ == "__main__":
+    main_()
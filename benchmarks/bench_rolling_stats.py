@@ -0,0 +1,56 @@
+"""Update and read cost of RollingStats against re-scanning a history list.
+
+    python benchmarks/bench_rolling_stats.py --points 200000 --assets 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from kpis_and_analytics import ingest_kpis  # noqa: E402
+from rolling_stats import RollingStats  # noqa: E402
+from sample_data import generate_sample_data  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--assets", type=int, default=50)
+    parser.add_argument("--history", type=int, default=1000,
+                        help="history length the list-based path re-scans per call")
+    args = parser.parse_args()
+
+    random.seed(0)
+    snapshots = [ingest_kpis(generate_sample_data()) for _ in range(1000)]
+    assets = [f"press-{i}" for i in range(args.assets)]
+
+    stats = RollingStats()
+    start = time.perf_counter()
+    for i in range(args.points):
+        asset = assets[i % args.assets]
+        stats.update(asset, snapshots[i % len(snapshots)])
+        stats.asset(asset)["electricity_per_unit"].mean()
+    rolling_s = time.perf_counter() - start
+
+    history = snapshots[:args.history]
+    n = max(args.points // 100, 1)
+    start = time.perf_counter()
+    for _ in range(n):
+        y = np.array([h["electricity_per_unit"] for h in history])
+        float(np.mean(y[-5:]))
+    rescan_s = (time.perf_counter() - start) * args.points / n
+
+    print(f"points:                  {args.points} over {args.assets} assets")
+    print(f"RollingStats update+read: {args.points / rolling_s:,.0f} points/s "
+          f"({rolling_s / args.points * 1e6:.2f} us/point, {len(stats.kpis)} KPIs each)")
+    print(f"history re-scan (n={args.history}): {args.points / rescan_s:,.0f} points/s "
+          f"({rescan_s / args.points * 1e6:.2f} us/point, one KPI)")
+
+
+if __name__ == "__main__":
+    main()
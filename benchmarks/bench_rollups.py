@@ -0,0 +1,114 @@
+"""Sustainability rollups: incremental ingestion and scorecard query latency.
+
+Feeds ``--years`` of synthetic readings for ``--assets`` presses of one
+plant into a RollupStore in ingestion-sized chunks, with ``--late`` of the
+chunks held back and delivered out of order, then times monthly and daily
+scorecard queries (one asset, the whole plant) after the first year and at
+the end, against recomputing the same totals with emissions_report from
+the raw readings in the history store. The monthly totals are checked
+against a recomputation over all readings.
+
+    python benchmarks/bench_rollups.py --assets 20 --years 3 --interval 600
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from ghg_projection import emissions_report, interval_usage  # noqa: E402
+from history_store import HistoryStore  # noqa: E402
+from rollups import RESOURCES, RollupStore  # noqa: E402
+from sample_data import SyntheticPlant  # noqa: E402
+
+START = 1672531200.0  # 2023-01-01T00:00:00Z
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--interval", type=float, default=600, help="seconds between readings per asset")
+    parser.add_argument("--chunk", type=int, default=500, help="readings per add_frame call, as the pipeline sends")
+    parser.add_argument("--late", type=float, default=0.05, help="share of chunks delivered out of order")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    assets = [f"press-{i + 1}" for i in range(args.assets)]
+    steps_per_year = int(365 * 86400 / args.interval)
+    plant = SyntheticPlant(assets, interval_s=args.interval, start_ts=START)
+    rollups = RollupStore(group_of=lambda asset_id: "plant-1", default_interval_s=args.interval)
+
+    def report(frame, period):
+        # Per-hour rates in the store -> usage per reading, as the rollups count it
+        return emissions_report(interval_usage(frame, default_interval_s=args.interval), period=period)
+
+    store = HistoryStore(compact_every=10 ** 12)
+    rng = np.random.default_rng(0)
+    held, readings = [], []
+    ingest_s = 0.0
+    print(f"{'history':<12}{'query':<22}{'rollups':>10}{'recompute':>12}")
+    for year in range(args.years):
+        for frame in plant.frames(steps_per_year, chunk_steps=max(1, args.chunk // args.assets)):
+            frame = frame[["asset_id", "ts", *RESOURCES, "interval_s"]]
+            readings.append(frame)
+            store.append_frame(frame)
+            if rng.random() < args.late:
+                held.append(frame)
+                continue
+            t0 = time.perf_counter()
+            rollups.add_frame(frame)
+            if held and rng.random() < 0.01:
+                # Late chunks turn up hours to weeks after their period closed
+                for late in held:
+                    rollups.add_frame(late)
+                held = []
+            ingest_s += time.perf_counter() - t0
+
+        since = START + year * 365 * 86400
+        asset, end = assets[0], START + (year + 1) * 365 * 86400
+        queries = {
+            "asset, months": (lambda: rollups.scorecard(asset, period="month"),
+                              lambda: report(store.window_frame(asset, 0.0, columns=RESOURCES), "month")),
+            "plant, months": (lambda: rollups.scorecard("plant-1", scope="plant", period="month"),
+                              lambda: report(pd.concat([store.window_frame(a, 0.0, columns=RESOURCES)
+                                                        .assign(asset_id=a) for a in assets]), "month")),
+            "asset, days of year": (lambda: rollups.scorecard(asset, period="day", start=since, end=end),
+                                    lambda: report(store.window_frame(asset, since, end, columns=RESOURCES),
+                                                   "day")),
+        }
+        for name, (query, recompute) in queries.items():
+            _, query_s = timed(query, args.repeat)
+            _, recompute_s = timed(recompute, 1 if "plant" in name else 3)
+            print(f"{f'{year + 1} year(s)':<12}{name:<22}{query_s * 1e3:8.2f} ms{recompute_s * 1e3:10.0f} ms")
+
+    t0 = time.perf_counter()
+    for late in held:
+        rollups.add_frame(late)
+    ingest_s += time.perf_counter() - t0
+    n = sum(len(f) for f in readings)
+    print(f"\nincremental ingest:     {n / ingest_s:,.0f} readings/s ({n:,} readings, {args.chunk}-reading chunks, "
+          f"{args.late:.0%} of chunks late)")
+
+    expected = emissions_report(interval_usage(pd.concat(readings, ignore_index=True)), period="month")
+    got = rollups.scorecard("plant-1", scope="plant", period="month")
+    assert np.array_equal(got["intervals"].to_numpy(), expected["intervals"].to_numpy())
+    assert np.allclose(got["total_ghg"].to_numpy(), expected["total_ghg"].to_numpy())
+    print("monthly plant totals match a recomputation over all readings")
+
+
+if __name__ == "__main__":
+    main()
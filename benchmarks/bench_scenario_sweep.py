@@ -0,0 +1,57 @@
+"""Scenario sweep throughput: batched evaluation vs the per-scenario loop.
+
+    python benchmarks/bench_scenario_sweep.py --samples 50000 --processes 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from kpis_and_analytics import analytic_process_simulation  # noqa: E402
+from sample_data import generate_sample_data  # noqa: E402
+from scenario_sweep import (  # noqa: E402
+    default_bounds, evaluate_scenarios, latin_hypercube_scenarios, pareto_front
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=50_000)
+    parser.add_argument("--processes", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=25_000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    data = generate_sample_data()
+    scenarios = latin_hypercube_scenarios(default_bounds(data), args.samples, seed=0)
+
+    n_loop = min(args.samples, 5_000)
+    start = time.perf_counter()
+    for row in scenarios.iloc[:n_loop].to_dict("records"):
+        analytic_process_simulation(data, row)
+    loop_rate = n_loop / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    results = evaluate_scenarios(data, scenarios)
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    front = pareto_front(results)
+    pareto_s = time.perf_counter() - start
+
+    print(f"scenarios:               {args.samples}")
+    print(f"per-scenario loop:       {loop_rate:,.0f} scenarios/s")
+    print(f"batched:                 {args.samples / batch_s:,.0f} scenarios/s ({batch_s:.3f}s)")
+    print(f"pareto front:            {front.sum()} points in {pareto_s:.3f}s")
+    if args.processes > 1:
+        start = time.perf_counter()
+        evaluate_scenarios(data, scenarios, processes=args.processes, chunk_size=args.chunk)
+        pool_s = time.perf_counter() - start
+        print(f"process pool ({args.processes}):        {args.samples / pool_s:,.0f} scenarios/s ({pool_s:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
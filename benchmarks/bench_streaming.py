@@ -0,0 +1,75 @@
+"""Sustained SSE subscribers and messages/sec on one uvicorn worker.
+
+Starts ``uvicorn main:app`` with the simulated SCADA source, opens
+``--subscribers`` concurrent /stream/kpis connections and counts the
+events each one receives over ``--seconds``.
+
+    python benchmarks/bench_streaming.py --subscribers 200 --assets 50 --rate 2
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+async def subscriber(client, url, deadline, counts, index):
+    async with client.stream("GET", url) as resp:
+        async for line in resp.aiter_lines():
+            if line.startswith("event:"):
+                counts[index] += 1
+            if time.monotonic() > deadline:
+                break
+
+
+async def run(args):
+    url = f"http://127.0.0.1:{args.port}/stream/kpis"
+    limits = httpx.Limits(max_connections=args.subscribers + 10)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        for _ in range(100):
+            try:
+                await client.get(f"http://127.0.0.1:{args.port}/stream/metrics")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+        counts = [0] * args.subscribers
+        deadline = time.monotonic() + args.seconds
+        started = time.monotonic()
+        await asyncio.gather(*(subscriber(client, url, deadline, counts, i) for i in range(args.subscribers)))
+        elapsed = time.monotonic() - started
+        server = (await client.get(f"http://127.0.0.1:{args.port}/stream/metrics")).json()
+    total = sum(counts)
+    print(f"subscribers:           {args.subscribers}")
+    print(f"source:                {args.assets} assets at {args.rate} Hz")
+    print(f"events delivered:      {total} in {elapsed:.1f}s ({total / elapsed:,.0f} msg/s)")
+    print(f"per subscriber:        min {min(counts)} / max {max(counts)}")
+    print(f"server published:      {server['published']} (computed once, shared by all subscribers)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--assets", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=1.0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    env = dict(os.environ, DT_HISTORY_DB=":memory:", DT_SCADA_SOURCE="simulated",
+               DT_SCADA_ASSETS=",".join(f"press-{i}" for i in range(args.assets)),
+               DT_SCADA_RATE_HZ=str(args.rate))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+                               "--workers", "1", "--log-level", "warning"], cwd=BACKEND, env=env)
+    try:
+        asyncio.run(run(args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Replay harness for the closed-loop setpoint optimizer.
+
+Feeds readings tick by tick through SetpointOptimizer (refitting the
+response model on the trailing window, as the API does) and checks every
+decision against the controller's contract:
+
+- setpoints stay inside the configured bounds
+- each move stays within the per-tick step limit of the current setpoint
+- every tick returns within the latency budget
+
+With ``--readings`` a recorded CSV/Parquet (as written for ReplaySource) is
+replayed open loop. Without it a synthetic furnace with a known response
+is run closed loop (the plant follows each recommendation), and the
+harness also reports the true objective reached against the exhaustive
+optimum and the rule-based controller. Exits non-zero on any violation.
+tests/test_closed_loop.py runs the same harness under pytest.
+
+    python benchmarks/replay_closed_loop.py --ticks 300
+    python benchmarks/replay_closed_loop.py --readings recorded.parquet
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from kpis_and_analytics import closed_loop_optimization, ingest_kpis, ingest_kpis_batch  # noqa: E402
+from setpoint_optimizer import RESPONSES, SETPOINTS, SetpointOptimizer  # noqa: E402
+
+
+# --------- Synthetic furnace with a known response ---------
+
+def plant_reading(temp, cycle, rng, asset_id="furnace-1", ts=0.0):
+    temp, cycle = np.asarray(temp, dtype=float), np.asarray(cycle, dtype=float)
+    noise = (lambda scale: rng.normal(0, scale, np.shape(temp))) if rng is not None else (lambda scale: 0.0)
+    scrap = 1.2 + 0.0009 * (temp - 1215) ** 2 + 0.5 * (cycle - 2.4) ** 2 + noise(0.15)
+    material = 1500.0 / cycle
+    return pd.DataFrame({
+        "asset_id": asset_id, "ts": ts, "furnace_temp": temp, "cycle_time": cycle,
+        "gas_consumption": 35 + 0.3 * (temp - 1150) + 12 / cycle + noise(1.0),
+        "power_usage": 80 + 0.15 * (temp - 1150) + 40 / cycle + noise(1.0),
+        "water_usage": 1.0, "material_input": material,
+        "production_output": material * (1 - np.clip(scrap, 0, 100) / 100),
+        "target_output": 575.0, "runtime": 1.0, "downtime": 0.05,
+    }, index=np.arange(np.size(temp)))
+
+
+def synthetic_history(n, rng, asset_id="furnace-1"):
+    # Exploratory operation spread over the operating envelope
+    return plant_reading(rng.uniform(1150, 1250, n), rng.uniform(1.0, 4.0, n), rng, asset_id,
+                         ts=np.arange(n, dtype=float))
+
+
+def true_objective(optimizer, temp, cycle):
+    kpis = ingest_kpis_batch(plant_reading(temp, cycle, None))
+    scrap = kpis["scrap_rate"].to_numpy()
+    value = sum(optimizer.weights.get(r, 0.0) * kpis[r].to_numpy() for r in RESPONSES)
+    return value + optimizer.scrap_penalty * np.clip(scrap - optimizer.max_scrap, 0, None) ** 2
+
+
+# --------- Harness ---------
+
+def check(decision, current, optimizer):
+    setpoints = np.array([decision["furnace_temp_setpoint"], decision["cycle_time_setpoint"]])
+    violations = []
+    if (setpoints < optimizer.lower - 1e-9).any() or (setpoints > optimizer.upper + 1e-9).any():
+        violations.append("outside bounds")
+    inside = (current >= optimizer.lower) & (current <= optimizer.upper)
+    if (np.abs(setpoints - current)[inside] > optimizer.max_step[inside] + 1e-9).any():
+        violations.append("step limit exceeded")
+    if decision["solve_ms"] > optimizer.budget_s * 1e3:
+        violations.append(f"over budget ({decision['solve_ms']:.1f} ms)")
+    return violations
+
+
+def replay(optimizer, readings, history=None, window=500, refit_every=50, closed_loop=False, rng=None):
+    """Run the optimizer over readings; returns one row per tick with the decision and any violations."""
+    rows = []
+    history = readings.iloc[:0] if history is None else history
+    asset_id = readings["asset_id"].iloc[0] if "asset_id" in readings.columns else "furnace-1"
+    reading = readings.iloc[0].to_dict()
+    for tick in range(len(readings) if not closed_loop else closed_loop):
+        if not closed_loop:
+            reading = readings.iloc[tick].to_dict()
+        history = pd.concat([history, pd.DataFrame([reading])], ignore_index=True).tail(window)
+        if optimizer.model(asset_id) is None or tick % refit_every == 0:
+            try:
+                optimizer.fit(asset_id, history)
+            except ValueError:
+                # Not enough varied history yet: keep the previous model, if any
+                if optimizer.model(asset_id) is None:
+                    continue
+        current = np.array([float(reading[s]) for s in SETPOINTS])
+        decision = optimizer.step(asset_id, reading)
+        rows.append({"tick": tick, **{f"current.{s}": v for s, v in zip(SETPOINTS, current)},
+                     "furnace_temp_setpoint": decision["furnace_temp_setpoint"],
+                     "cycle_time_setpoint": decision["cycle_time_setpoint"],
+                     "iterations": decision["iterations"], "warm_start": decision["warm_start"],
+                     "solve_ms": decision["solve_ms"], "violations": "; ".join(check(decision, current, optimizer))})
+        if closed_loop:
+            # The plant runs at the recommended setpoints for the next tick
+            reading = plant_reading(decision["furnace_temp_setpoint"], decision["cycle_time_setpoint"], rng,
+                                    asset_id, ts=float(tick + 1)).iloc[0].to_dict()
+    return pd.DataFrame(rows)
+
+
+def rule_controller(ticks, start, rng):
+    temp, cycle = start
+    for tick in range(ticks):
+        kpis = ingest_kpis(plant_reading(temp, cycle, rng).iloc[0].to_dict())
+        temp = float(np.clip(closed_loop_optimization(kpis)["furnace_temp_setpoint"], 1150, 1250))
+    return temp, cycle
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readings", help="recorded CSV/Parquet to replay open loop")
+    parser.add_argument("--ticks", type=int, default=300, help="closed-loop ticks for the synthetic plant")
+    parser.add_argument("--history", type=int, default=200, help="synthetic exploration readings before control")
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    optimizer = SetpointOptimizer(budget_s=args.budget_ms / 1e3)
+    rng = np.random.default_rng(args.seed)
+    if args.readings:
+        readings = (pd.read_parquet(args.readings) if args.readings.endswith(".parquet")
+                    else pd.read_csv(args.readings))
+        decisions = replay(optimizer, readings)
+    else:
+        history = synthetic_history(args.history, rng)
+        start = (1160.0, 3.6)
+        decisions = replay(optimizer, plant_reading(*start, rng, ts=float(args.history)), history=history,
+                           closed_loop=args.ticks, rng=rng)
+
+    bad = decisions[decisions["violations"] != ""]
+    warm = decisions[decisions["warm_start"]]
+    print(f"ticks:              {len(decisions)}")
+    print(f"solve p50/p99/max:  {decisions['solve_ms'].median():.2f} / "
+          f"{decisions['solve_ms'].quantile(0.99):.2f} / {decisions['solve_ms'].max():.2f} ms")
+    print(f"iterations (warm):  mean {warm['iterations'].mean():.1f}, "
+          f"cold {decisions.loc[~decisions['warm_start'], 'iterations'].mean():.1f}")
+    print(f"violations:         {len(bad)}")
+    if not args.readings:
+        final = decisions.iloc[-1][["furnace_temp_setpoint", "cycle_time_setpoint"]].to_numpy(dtype=float)
+        grid_t, grid_c = np.meshgrid(np.linspace(1150, 1250, 201), np.linspace(1.0, 4.0, 121))
+        values = true_objective(optimizer, grid_t.ravel(), grid_c.ravel())
+        best = values.argmin()
+        rule = rule_controller(args.ticks, start, rng)
+        print(f"model controller:   T={final[0]:.1f} C, cycle={final[1]:.2f} min, "
+              f"objective {true_objective(optimizer, final[0], final[1])[0]:.1f}")
+        print(f"rule controller:    T={rule[0]:.1f} C, cycle={rule[1]:.2f} min, "
+              f"objective {true_objective(optimizer, *rule)[0]:.1f}")
+        print(f"exhaustive optimum: T={grid_t.ravel()[best]:.1f} C, cycle={grid_c.ravel()[best]:.2f} min, "
+              f"objective {values[best]:.1f}")
+    if len(bad):
+        print(bad.head(20).to_string())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Analytics hot paths on fixed-seed readings, at several sizes.
+
+Each benchmark records ``items`` (readings per call) in extra_info, so
+check_regression.py compares throughput in readings/s.
+"""
+import pytest
+
+from conftest import BATCH_SIZES, SCALAR_SIZES
+
+
+def per_record(benchmark, fn, records, n):
+    batch = records[:n]
+    benchmark.extra_info["items"] = n
+
+    def run():
+        for record in batch:
+            fn(record)
+    benchmark(run)
+
+
+@pytest.mark.parametrize("n", SCALAR_SIZES)
+def bench_ingest_kpis(benchmark, records, n):
+    from kpis_and_analytics import ingest_kpis
+    per_record(benchmark, ingest_kpis, records, n)
+
+
+@pytest.mark.parametrize("n", SCALAR_SIZES)
+def bench_full_analytics(benchmark, records, n):
+    from kpis_and_analytics import full_analytics
+    per_record(benchmark, lambda r: full_analytics(r, scenario={"gas_consumption": r["gas_consumption"] * 0.9}),
+               records, n)
+
+
+@pytest.mark.parametrize("n", SCALAR_SIZES)
+def bench_emissions_calc(benchmark, records, n):
+    from kpis_and_analytics import emissions_calc
+    per_record(benchmark, emissions_calc, records, n)
+
+
+@pytest.mark.parametrize("n", SCALAR_SIZES)
+def bench_project_ghg_emissions(benchmark, records, n):
+    from ghg_projection import project_ghg_emissions
+    usage = [{k: r[k] for k in ("power_usage", "gas_consumption", "water_usage")} for r in records]
+    per_record(benchmark, project_ghg_emissions, usage, n)
+
+
+@pytest.mark.parametrize("n", SCALAR_SIZES[:2])
+def bench_recommend_optimizations(benchmark, records, n):
+    from ml.optimizer import recommend_optimizations
+    per_record(benchmark, recommend_optimizations, records, n)
+
+
+@pytest.mark.parametrize("n", BATCH_SIZES)
+def bench_ingest_kpis_batch(benchmark, frames, n):
+    from kpis_and_analytics import ingest_kpis_batch
+    benchmark.extra_info["items"] = n
+    benchmark(ingest_kpis_batch, frames[n])
+
+
+@pytest.mark.parametrize("n", BATCH_SIZES)
+def bench_emissions_report(benchmark, frames, n):
+    from ghg_projection import emissions_report
+    benchmark.extra_info["items"] = n
+    benchmark(emissions_report, frames[n], "day")
+
+
+@pytest.mark.parametrize("n", BATCH_SIZES)
+def bench_recommend_batch(benchmark, frames, n):
+    from ml.optimizer import recommend_batch, simulate_optimized_batch
+    frame = frames[n]
+    benchmark.extra_info["items"] = n
+    benchmark(lambda: simulate_optimized_batch(frame, recommend_batch(frame)))
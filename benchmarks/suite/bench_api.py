@@ -0,0 +1,67 @@
+"""Every FastAPI endpoint through an in-process ASGI client (fastapi TestClient).
+
+The result caches are cleared before each round, so the numbers are the
+cost of computing a response, not of a cache hit. A route added to main.py
+without an entry here fails bench_every_endpoint_is_covered.
+"""
+import pytest
+
+from conftest import SEED, sample_records
+
+# (method, path) -> request kwargs and rounds
+ENDPOINTS = {
+    ("GET", "/full-analytics"): {},
+    ("GET", "/die-health"): {},
+    ("GET", "/anomalies"): {},
+    ("GET", "/closed-loop-optimization"): {},
+    ("GET", "/ai-sop-recommendation"): {"params": {"any_press": True}},
+    ("GET", "/timeseries"): {"params": {"points": 500}},
+    ("GET", "/dashboard-bundle"): {"params": {"points": 500}},
+    ("GET", "/stream/metrics"): {},
+    ("GET", "/alerts"): {},
+    ("GET", "/ghg-report"): {"params": {"period": "hour"}},
+    ("GET", "/sustainability-scorecard"): {"params": {"period": "day"}},
+    ("GET", "/cache-metrics"): {},
+    ("POST", "/scenario-sweep"): {"json": {"samples": 2000, "seed": SEED}, "rounds": 5},
+    ("GET", "/plant-analytics"): {"rounds": 5},
+    ("GET", "/optimization-recommendations"): {},
+    ("POST", "/optimization-recommendations"): {"json": {"records": sample_records(500)}, "items": 500},
+    ("POST", "/ml/train"): {"json": {"days": 1}, "rounds": 3},
+    ("GET", "/ingestion-metrics"): {},
+    ("POST", "/digital-worker-assistant"): {"json": {"query": "What is the current OEE?"}},
+    ("GET", "/metrics"): {},
+}
+# Server-sent event streams never complete a response
+EXCLUDED = {("GET", "/stream/kpis")}
+
+
+@pytest.fixture(scope="module")
+def client(app):
+    from fastapi.testclient import TestClient
+    return TestClient(app.app)
+
+
+def _clear_caches(app):
+    app.cache.invalidate()
+    if hasattr(app, "series_cache"):
+        app.series_cache.invalidate()
+
+
+@pytest.mark.parametrize("method,path", list(ENDPOINTS), ids=[f"{m} {p}" for m, p in ENDPOINTS])
+def bench_endpoint(benchmark, app, client, method, path):
+    spec = dict(ENDPOINTS[(method, path)])
+    rounds = spec.pop("rounds", 20)
+    benchmark.extra_info["items"] = spec.pop("items", 1)
+    client.request(method, path, **spec).raise_for_status()  # warm up imports and models
+
+    def call():
+        resp = client.request(method, path, **spec)
+        assert resp.status_code == 200, resp.text
+    benchmark.pedantic(call, setup=lambda: _clear_caches(app), rounds=rounds)
+
+
+def bench_every_endpoint_is_covered(app):
+    from fastapi.routing import APIRoute
+    routes = {(m, r.path) for r in app.app.routes if isinstance(r, APIRoute) for m in r.methods}
+    missing = routes - set(ENDPOINTS) - EXCLUDED
+    assert not missing, f"endpoints without a benchmark: {sorted(missing)}"
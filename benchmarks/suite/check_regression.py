@@ -0,0 +1,68 @@
+"""Fail when benchmark throughput regresses against a baseline.
+
+Compares two ``pytest --benchmark-json`` files by throughput (``items`` in
+extra_info per second of the chosen statistic) and exits non-zero when any
+benchmark present in both is slower than the baseline by more than
+``--threshold``. Benchmarks only in one file are listed but never fail;
+no benchmark in common (e.g. the baseline run failed) fails the check.
+The default statistic is the fastest round: on shared CI runners the median
+of the microbenchmarks moves by tens of percent between identical runs,
+the minimum by a few.
+
+    python -m pytest benchmarks/suite --benchmark-json=baseline.json   # on main
+    python -m pytest benchmarks/suite --benchmark-json=current.json    # with the change
+    python benchmarks/suite/check_regression.py baseline.json current.json --threshold 0.25
+"""
+import argparse
+import json
+import sys
+
+
+def throughput(path, stat):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot read benchmark results {path}: {e}")
+    return {b["fullname"]: b["extra_info"].get("items", 1) / b["stats"][stat] for b in data["benchmarks"]}
+
+
+def compare(baseline, current, threshold):
+    """Rows of (name, baseline/s, current/s, change) and the names that regressed."""
+    rows, regressed = [], []
+    for name in sorted(baseline.keys() | current.keys()):
+        before, after = baseline.get(name), current.get(name)
+        change = None if before is None or after is None else after / before - 1
+        rows.append((name, before, after, change))
+        if change is not None and change < -threshold:
+            regressed.append(name)
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed throughput drop, 0.25 = 25%%")
+    parser.add_argument("--stat", default="min", choices=("min", "median", "mean"))
+    args = parser.parse_args()
+
+    rows, regressed = compare(throughput(args.baseline, args.stat), throughput(args.current, args.stat),
+                              args.threshold)
+    width = max(len(r[0]) for r in rows) if rows else 10
+    print(f"{'benchmark':<{width}} {'baseline/s':>14} {'current/s':>14} {'change':>8}")
+    for name, before, after, change in rows:
+        fmt = (lambda v: f"{v:>14,.1f}" if v is not None else f"{'-':>14}")
+        flag = "  REGRESSED" if name in regressed else ""
+        print(f"{name:<{width}} {fmt(before)} {fmt(after)} "
+              f"{'new' if before is None else 'gone' if after is None else f'{change:+.1%}':>8}{flag}")
+    if not any(change is not None for _, _, _, change in rows):
+        print("\nNo benchmark ran in both the baseline and the current run: nothing was compared")
+        sys.exit(1)
+    if regressed:
+        print(f"\n{len(regressed)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Shared fixed-seed workloads for the benchmark suite.
+
+The backend under test is ``backend/`` next to this tree, or the directory
+in ``DT_BENCH_BACKEND`` (CI points it at a checkout of the base commit to
+measure the baseline with the same suite).
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pytest
+
+BACKEND = os.environ.get("DT_BENCH_BACKEND") or os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND))
+os.environ.update({
+    "DT_HISTORY_DB": ":memory:",
+    "DT_MODEL_DIR": tempfile.mkdtemp(prefix="dt-bench-models-"),
+    # One fixed sample per asset for the whole run, so every round computes on the same reading
+    "DT_SAMPLE_INTERVAL_S": "1e9",
+})
+
+SEED = 0
+# Records per call for the scalar (one reading at a time) functions
+SCALAR_SIZES = (1, 100, 1000)
+# Rows per call for the batch functions
+BATCH_SIZES = (1_000, 100_000)
+HISTORY_DAYS = 3
+
+
+def sample_records(n):
+    from sample_data import generate_sample_data
+    random.seed(SEED)
+    return [generate_sample_data() for _ in range(n)]
+
+
+def sample_frame(n):
+    from sample_data import SyntheticPlant
+    assets = [f"press-{i + 1}" for i in range(10)]
+    plant = SyntheticPlant(assets, seed=SEED)
+    return plant.chunk(-(-n // len(assets))).head(n)
+
+
+@pytest.fixture(scope="session")
+def records():
+    return sample_records(max(SCALAR_SIZES))
+
+
+@pytest.fixture(scope="session")
+def frames():
+    return {n: sample_frame(n) for n in BATCH_SIZES}
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The FastAPI app with HISTORY_DAYS of seeded 1-minute history for the default asset."""
+    import main
+    from sample_data import SyntheticPlant
+    random.seed(SEED)
+    plant = SyntheticPlant([main.DEFAULT_ASSET], seed=SEED, start_ts=time.time() - HISTORY_DAYS * 86400)
+    for frame in plant.frames(HISTORY_DAYS * 1440):
+        main.store.append_frame(frame)
+    return main
@@ -1,16 +1,21 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import plotly.graph_objects as go
 import requests
+import time
 from datetime import datetime
 
 st.set_page_config(layout="wide")
 st.title("Forging Plant Digital Twin Dashboard Suite")
 
-API_URL = "http://localhost:8000/full-analytics"
-CLOSED_LOOP_URL = "http://localhost:8000/closed-loop-optimization"
-SOP_URL = "http://localhost:8000/ai-sop-recommendation"
-ASSISTANT_URL = "http://localhost:8000/digital-worker-assistant"
+BACKEND_URL = "http://localhost:8000"
+BUNDLE_URL = f"{BACKEND_URL}/dashboard-bundle"
+ASSISTANT_URL = f"{BACKEND_URL}/digital-worker-assistant"
+SCORECARD_URL = f"{BACKEND_URL}/sustainability-scorecard"
+CHART_POINTS = 2000
+# Chart range -> seconds of history
+RANGES = {"Last 24 h": 86400, "Last 7 days": 7 * 86400, "Last 30 days": 30 * 86400, "Last year": 365 * 86400}
 
 # --- Synthetic Data Generator ---
 def generate_synthetic_kpi_data():
@@ -64,46 +69,78 @@ def generate_synthetic_kpi_data():
         "timestamp": now
     }
 
-def fetch_analytics():
-    try:
-        resp = requests.get(API_URL, timeout=2)
-        if resp.status_code == 200:
-            return resp.json()
-        else:
-            return generate_synthetic_kpi_data()
-    except Exception:
-        return generate_synthetic_kpi_data()
+@st.cache_resource
+def http_session():
+    # One pooled keep-alive session per dashboard process, shared by all reruns
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
 
-def fetch_closed_loop():
+@st.cache_data(ttl=5, show_spinner=False)
+def fetch_bundle(asset_id, range_s, points=CHART_POINTS):
+    # All panel data in one request; the start is rounded to the minute so reruns share cache entries
+    start = (time.time() - range_s) // 60 * 60
     try:
-        resp = requests.get(CLOSED_LOOP_URL, timeout=2)
+        resp = http_session().get(BUNDLE_URL, params={"asset_id": asset_id, "start": start, "points": points},
+                                  timeout=5)
         if resp.status_code == 200:
             return resp.json()
-        else:
-            return None
-    except Exception:
-        return None
+    except requests.RequestException:
+        pass
+    return None
 
-def fetch_sop():
-    try:
-        resp = requests.get(SOP_URL, timeout=2)
-        if resp.status_code == 200:
-            return resp.json()
-        else:
-            return None
-    except Exception:
-        return None
+def offline_bundle():
+    analytics = generate_synthetic_kpi_data()
+    return {"analytics": analytics, "closed_loop": None, "sop": None, "timeseries": None, "offline": True}
 
-def ask_assistant(query):
+def ask_assistant(query, asset_id):
+    # Not cached here: the backend memoizes answers per context snapshot, which follows new data
     try:
-        resp = requests.post(ASSISTANT_URL, json={"query": query}, timeout=2)
+        resp = http_session().post(ASSISTANT_URL, json={"query": query, "asset_id": asset_id}, timeout=5)
         if resp.status_code == 200:
             return resp.json()["response"]
         else:
             return "Assistant not available (backend error)."
-    except Exception:
+    except requests.RequestException:
         return "Assistant not available (backend offline)."
 
+def series_chart(timeseries, columns, labels):
+    # Downsampled series keep their own timestamps, so each is its own trace
+    fig = go.Figure()
+    for column, label in zip(columns, labels):
+        series = timeseries["series"].get(column)
+        if series:
+            fig.add_trace(go.Scattergl(x=pd.to_datetime(series["ts"], unit="s"), y=series["values"],
+                                       mode="lines", name=label))
+    fig.update_layout(height=350, margin=dict(l=10, r=10, t=10, b=10), legend=dict(orientation="h"))
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{timeseries['rows']:,} readings, downsampled to at most {timeseries['points']:,} points per series "
+               f"({timeseries['method']})")
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_scorecard(asset_id=None, plant_id=None, months=12):
+    # Monthly totals from the backend rollups, converted to the scorecard's units
+    start = pd.Timestamp.now(tz="UTC").normalize().replace(day=1) - pd.DateOffset(months=months - 1)
+    params = {"period": "month", "start": start.timestamp()}
+    params.update({"plant_id": plant_id} if plant_id else {"asset_id": asset_id})
+    try:
+        resp = http_session().get(SCORECARD_URL, params=params, timeout=5)
+        if resp.status_code != 200:
+            return None
+    except requests.RequestException:
+        return None
+    rows = pd.DataFrame(resp.json()["rows"])
+    if rows.empty:
+        return None
+    return pd.DataFrame({
+        "Month": pd.to_datetime(rows["period"]).dt.strftime("%Y-%m"),
+        "Electricity (MWh)": rows["power_usage"] / 1e3,
+        "Gas (Nm³)": rows["gas_consumption"],
+        "Water (m³)": rows["water_usage"],
+        "GHG total (tCO₂e)": rows["total_ghg"] / 1e3,
+        "GHG per unit (kg CO₂e)": rows["ghg_per_unit"],
+    })
+
 def generate_monthly_synthetic_data(months=6):
     base = datetime(2025, 1, 1)
     dates = [base.replace(month=((base.month + i - 1) % 12 + 1)) for i in range(months)]
@@ -127,7 +164,14 @@ DASHBOARD = st.sidebar.radio(
     )
 )
 
-analytics = fetch_analytics()
+ASSET_ID = st.sidebar.text_input("Asset", "press-1")
+RANGE = st.sidebar.selectbox("Chart range", list(RANGES), index=2)
+
+bundle = fetch_bundle(ASSET_ID, RANGES[RANGE]) or offline_bundle()
+if bundle.get("offline"):
+    st.sidebar.warning("Backend offline: showing synthetic sample data.")
+analytics = bundle["analytics"]
+timeseries = bundle["timeseries"]
 kpis = analytics["kpis"]
 alerts = analytics["alerts"]
 emissions = analytics["emissions"]
@@ -151,15 +195,12 @@ if DASHBOARD == "Executive (GHG, Energy, Productivity)":
         st.metric("OEE (%)", f"{kpis['oee']*100:.1f}")
         st.metric("Throughput Rate (units/hr)", f"{kpis['throughput_rate']:.2f}")
         st.metric("First Pass Yield (%)", f"{kpis['first_pass_yield']:.1f}")
-    st.subheader("Resource Usage Over Time (Synthetic Example)")
-    dates = pd.date_range("2025-01-01", periods=30)
-    df = pd.DataFrame({
-        "Date": dates,
-        "Electricity (kWh/unit)": np.random.normal(kpis["electricity_per_unit"], 0.05, 30),
-        "Gas (Nm³/unit)": np.random.normal(kpis["gas_per_unit"], 0.02, 30),
-        "Water (m³/unit)": np.random.normal(kpis["water_per_unit"], 0.01, 30),
-    })
-    st.line_chart(df.set_index("Date"))
+    st.subheader(f"Resource Intensity ({RANGE})")
+    if timeseries:
+        series_chart(timeseries, ["electricity_per_unit", "gas_per_unit", "water_per_unit"],
+                     ["Electricity (kWh/unit)", "Gas (Nm³/unit)", "Water (m³/unit)"])
+    else:
+        st.info("No history available (backend offline).")
 
 # --- Operator Dashboard ---
 elif DASHBOARD == "Operator (Alerts, Setpoints, Tracking)":
@@ -170,38 +211,51 @@ elif DASHBOARD == "Operator (Alerts, Setpoints, Tracking)":
             st.error(alert)
     else:
         st.success("No critical alerts at this time.")
-    st.subheader("Current Setpoints")
-    sp = kpis.get("setpoints", {})
-    st.write(f"**Furnace Temp Setpoint:** {sp.get('furnace_temp', 'N/A'):.1f} °C")
-    st.write(f"**Cycle Time Setpoint:** {sp.get('cycle_time', 'N/A'):.2f} min")
+    st.subheader("Recommended Setpoints")
+    sp = bundle["closed_loop"] or {}
+    if "furnace_temp_setpoint" in sp:
+        st.write(f"**Furnace Temp Setpoint:** {sp['furnace_temp_setpoint']:.1f} °C")
+    if "cycle_time_setpoint" in sp:
+        st.write(f"**Cycle Time Setpoint:** {sp['cycle_time_setpoint']:.2f} min")
+    if not sp:
+        st.write("Setpoint recommendation not available (backend offline).")
     st.subheader("Key Process Tracking")
     col1, col2, col3 = st.columns(3)
     with col1: st.metric("Current Furnace Temp (°C)", f"{kpis['furnace_temp']:.1f}")
     with col2: st.metric("Die Temp (°C)", f"{kpis['die_temp']:.1f}")
     with col3: st.metric("Die Wear Rate", f"{kpis['die_wear_rate']:.2f}")
-    st.subheader("Utility Usage (last 24h, synthetic)")
-    df = pd.DataFrame({
-        "Hour": [f"{h}:00" for h in range(24)],
-        "Electricity (kWh/unit)": np.random.normal(kpis["electricity_per_unit"], 0.05, 24),
-        "Gas (Nm³/unit)": np.random.normal(kpis["gas_per_unit"], 0.02, 24),
-        "Water (m³/unit)": np.random.normal(kpis["water_per_unit"], 0.01, 24),
-    })
-    st.line_chart(df.set_index("Hour"))
+    st.subheader(f"Process Tracking ({RANGE})")
+    if timeseries:
+        series_chart(timeseries, ["furnace_temp", "oee"], ["Furnace Temp (°C)", "OEE"])
+    else:
+        st.info("No history available (backend offline).")
 
 # --- Sustainability Scorecard ---
 elif DASHBOARD == "Sustainability Scorecard":
     st.header("Sustainability Scorecard")
+    scope = st.radio("Scope", ["Asset", "Plant"], horizontal=True)
+    plant_id = st.text_input("Plant", "plant-1") if scope == "Plant" else None
     st.subheader("Resource and Emissions Footprint (Monthly)")
-    df = generate_monthly_synthetic_data()
+    df = fetch_scorecard(asset_id=ASSET_ID, plant_id=plant_id)
+    if df is None:
+        st.info("No rollups available (backend offline or no history): showing synthetic sample data.")
+        df = generate_monthly_synthetic_data()
     st.dataframe(df, hide_index=True)
     st.subheader("Resource Trends")
     st.line_chart(df.set_index("Month")[["Electricity (MWh)", "Gas (Nm³)", "Water (m³)"]])
     st.subheader("GHG Emissions Trend")
     st.line_chart(df.set_index("Month")[["GHG total (tCO₂e)"]])
     st.markdown("#### Sustainability Score")
-    latest = df.iloc[-1]
-    score = max(0, 100 - (latest["GHG total (tCO₂e)"]-200)/2)
-    st.metric("Sustainability Score (demo)", f"{score:.1f} / 100")
+    if "GHG per unit (kg CO₂e)" in df.columns:
+        # Emission intensity this month, against the previous month
+        intensity = df["GHG per unit (kg CO₂e)"]
+        delta = intensity.iloc[-1] - intensity.iloc[-2] if len(df) > 1 else None
+        st.metric("GHG intensity (kg CO₂e / unit)", f"{intensity.iloc[-1]:.3f}",
+                  delta=None if delta is None or pd.isna(delta) else f"{delta:+.3f}", delta_color="inverse")
+    else:
+        latest = df.iloc[-1]
+        score = max(0, 100 - (latest["GHG total (tCO₂e)"]-200)/2)
+        st.metric("Sustainability Score (demo)", f"{score:.1f} / 100")
 
 # --- AI/Assistant & Optimization Dashboard ---
 elif DASHBOARD == "AI/Assistant & Optimization":
@@ -209,7 +263,7 @@ elif DASHBOARD == "AI/Assistant & Optimization":
 
     # Closed-loop optimization
     st.subheader("🔄 Closed-Loop Furnace Optimization (ML Feedback Loop)")
-    cl_opt = fetch_closed_loop()
+    cl_opt = bundle["closed_loop"]
     if cl_opt:
         st.write(f"**Recommended Furnace Temp Setpoint:** {cl_opt['furnace_temp_setpoint']} °C")
         st.info(cl_opt["reason"])
@@ -218,7 +272,7 @@ elif DASHBOARD == "AI/Assistant & Optimization":
 
     # AI-driven SOP
     st.subheader("🤖 AI-Driven SOP Recommendation")
-    sop = fetch_sop()
+    sop = bundle["sop"]
     if sop:
         st.success(sop["recommendation"])
     else:
@@ -228,7 +282,7 @@ elif DASHBOARD == "AI/Assistant & Optimization":
     st.subheader("👷 Digital Worker Assistant (NLP Q&A)")
     user_query = st.text_input("Ask a question about alerts, KPIs, or trends:")
     if user_query:
-        resp = ask_assistant(user_query)
+        resp = ask_assistant(user_query, ASSET_ID)
         st.write(resp)
 
 st.caption("Digital Twin Dashboard | Executive, Operator, Sustainability, and AI/Assistant Views")
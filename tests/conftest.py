@@ -0,0 +1,7 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+# main opens its stores on import; keep them in memory for the tests
+os.environ.setdefault("DT_HISTORY_DB", ":memory:")
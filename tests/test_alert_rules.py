@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from alert_rules import AlertRuleEngine
+
+RULES = [
+    {"id": "hot", "kpi": "furnace_temp", "op": ">", "threshold": 1250, "clear_threshold": 1240, "duration_s": 120},
+    {"id": "low_oee", "kpi": "oee", "op": "<", "threshold": 0.6, "cooldown_s": 600},
+    {"id": "heating_fast", "kpi": "furnace_temp", "type": "rate", "op": ">", "threshold": 50},
+]
+
+
+@pytest.fixture
+def engine():
+    return AlertRuleEngine(RULES)
+
+
+def tick(engine, ts, furnace_temp=np.nan, oee=0.8, asset_id="furnace-1"):
+    events = engine.evaluate_records({asset_id: {"furnace_temp": furnace_temp, "oee": oee}}, ts=ts)
+    return [(e.rule_id, e.state) for e in events]
+
+
+def test_duration_and_hysteresis(engine):
+    assert tick(engine, 0, 1260) == []
+    assert tick(engine, 60, 1260) == []
+    assert tick(engine, 120, 1260) == [("hot", "raised")]
+    assert tick(engine, 180, 1260) == []  # raised once, not per tick
+    assert tick(engine, 240, 1245) == []  # below the threshold, above clear_threshold
+    assert tick(engine, 300, 1239) == [("hot", "cleared")]
+    # Dropping back below restarts the duration
+    assert tick(engine, 360, 1260) == []
+    assert tick(engine, 420, 1230) == []
+    assert tick(engine, 480, 1260) == []
+    assert tick(engine, 540, 1260) == []
+    assert tick(engine, 600, 1260) == [("hot", "raised")]
+
+
+def test_cooldown(engine):
+    assert tick(engine, 0, 1200, oee=0.5) == [("low_oee", "raised")]
+    assert tick(engine, 60, 1200, oee=0.7) == [("low_oee", "cleared")]
+    assert tick(engine, 120, 1200, oee=0.5) == []
+    assert tick(engine, 600, 1200, oee=0.5) == [("low_oee", "raised")]
+
+
+def test_missing_values_change_nothing(engine):
+    assert tick(engine, 0, 1260) == []
+    assert tick(engine, 60) == []  # no reading: the duration keeps running
+    assert tick(engine, 120, 1260) == [("hot", "raised")]
+    assert tick(engine, 180) == []  # no reading: stays active
+    assert engine.active() == {"furnace-1": ["hot"]}
+    assert tick(engine, 240, 1239) == [("hot", "cleared")]
+    assert tick(engine, 300, oee=np.nan) == []
+
+
+def test_rates_use_the_last_known_value(engine):
+    assert tick(engine, 0, 1200) == []
+    assert tick(engine, 60) == []
+    # 30 degrees over the two minutes since the last value: 15/min
+    assert tick(engine, 120, 1230) == []
+    assert tick(engine, 180) == []
+    assert tick(engine, 240, 1330) == []  # 50/min is not above the threshold
+    assert tick(engine, 300) == []
+    # 65/min; "hot" has now also been above 1250 for 120 s
+    assert sorted(tick(engine, 360, 1460)) == [("heating_fast", "raised"), ("hot", "raised")]
+    assert engine.active_messages("furnace-1") == ["hot: furnace_temp > 1250", "heating_fast: furnace_temp > 50"]
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from anomaly import SIGNALS, AnomalyDetector
+
+MEAN = np.array([900.0, 30.0, 400.0, 4.0, 9.0, 0.2, 20.0, 30.0, 28.0, 300.0])
+STD = np.array([10.0, 2.0, 8.0, 0.3, 0.5, 0.02, 0.5, 0.8, 0.7, 6.0])
+# Furnace load drives temperature, gas, flue gas and the die; O2 falls as load rises
+LOADING = np.array([0.8, 0.9, 0.8, -0.7, 0.8, 0.5, 0.0, 0.6, 0.6, 0.5])
+
+
+def readings(asset_id, n, seed):
+    rng = np.random.default_rng(seed)
+    load = rng.normal(size=(n, 1))
+    x = MEAN + STD * (load * LOADING + np.sqrt(1 - LOADING ** 2) * rng.normal(size=(n, len(SIGNALS))))
+    return pd.DataFrame(x, columns=list(SIGNALS)).assign(asset_id=asset_id, ts=np.arange(n) * 60.0)
+
+
+def test_flags_injected_fault_and_names_the_signal():
+    healthy, faulty = readings("press-1", 700, seed=0), readings("press-2", 700, seed=1)
+    fault_at = 550
+    # Cooling water outlet heats up with no change in the inlet or anything else
+    faulty.loc[fault_at:, "cooling_water_out"] += 8 * STD[SIGNALS.index("cooling_water_out")]
+    detector = AnomalyDetector()
+    events = detector.update_frame(pd.concat([healthy, faulty], ignore_index=True))
+
+    assert set(events["asset_id"]) == {"press-2"}
+    assert events["ts"].min() == fault_at * 60.0
+    assert events["signals"].iloc[0][0] == "cooling_water_out"
+    scores = detector.scores()
+    assert scores.loc["press-1", "ready"] and scores.loc["press-1", "flags_raised"] == 0
+
+
+def test_broken_correlation_is_attributed():
+    frame = readings("press-1", 600, seed=2)
+    # O2 rises with CO2 instead of falling, while staying within its usual range
+    o2, co2 = SIGNALS.index("flue_gas_comp.O2"), SIGNALS.index("flue_gas_comp.CO2")
+    z_co2 = (frame.loc[500:, SIGNALS[co2]] - MEAN[co2]) / STD[co2]
+    frame.loc[500:, SIGNALS[o2]] = MEAN[o2] + 2 * z_co2 * STD[o2]
+    detector = AnomalyDetector()
+    contrib = np.array([detector.update(["press-1"], [row])[2][0] for row in frame[list(SIGNALS)].to_numpy()])
+    after = contrib[500:540].mean(axis=0)
+    assert after.argmax() == o2
+    assert after[o2] > 3 * contrib[200:500, o2].mean()
+
+
+def test_contributions_sum_to_score():
+    detector = AnomalyDetector(warmup=20)
+    frame = readings("press-1", 100, seed=3)
+    x = frame[list(SIGNALS)].to_numpy(copy=True)
+    x[::7, 3] = np.nan   # unmeasured signals contribute nothing
+    for row in x:
+        score, _, contrib = detector.update(["press-1"], [row])
+        np.testing.assert_allclose(contrib.sum(axis=1), score)
+        assert (contrib[0][np.isnan(row)] == 0).all()
+    explained = detector.explain("press-1", top=len(SIGNALS))
+    assert np.isclose(sum(s["contribution"] for s in explained["signals"]), explained["score"])
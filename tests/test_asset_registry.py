@@ -0,0 +1,13 @@
+from models import AssetRegistry
+
+
+def test_die_for_follows_the_mounted_die():
+    registry = AssetRegistry.synthetic(lines_per_plant=1, presses_per_line=2, dies_per_press=2)
+    press, furnace = "plant-1/line-1/press-1", "plant-1/line-1/furnace-1"
+    assert registry.die_for(press) == press + "/die-1"
+    registry.mount(press + "/die-2")
+    assert registry.die_for(press) == press + "/die-2"
+    assert registry.die_for("plant-1/line-1/press-2") == "plant-1/line-1/press-2/die-1"
+    assert registry.die_for(furnace) is None
+    assert registry.die_for(press + "/die-1") == press + "/die-1"
+    assert registry.die_for("press-1") == "press-1"  # unregistered: tracked under its own id
@@ -0,0 +1,72 @@
+import itertools
+
+import pytest
+
+import assistant
+from assistant import AssistantContexts
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(assistant.time, "monotonic", clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def contexts():
+    versions = {"press-1": 0}
+    built = itertools.count(1)
+
+    def build(asset_id):
+        n = next(built)
+        return {"kpis": {"oee": n / 10}, "alerts": [f"alert {n}"], "trend": f"trend {n}", "sop": f"sop {n}"}
+
+    contexts = AssistantContexts(build, versions.__getitem__, max_age_s=1.0)
+    contexts.versions = versions
+    return contexts
+
+
+def test_context_is_reused_until_data_moves_and_max_age_passes(clock, contexts):
+    first = contexts.ask("press-1", "show alerts")
+    assert first == {"response": "Current critical alerts: alert 1", "context_version": 1}
+
+    # New data inside max_age: still the same context
+    contexts.versions["press-1"] += 1
+    clock.now += 0.5
+    assert contexts.ask("press-1", "show alerts") == first
+
+    # Old enough but no new data: still the same context
+    contexts.versions["press-1"] -= 1
+    clock.now += 10
+    assert contexts.ask("press-1", "show alerts") == first
+
+    contexts.versions["press-1"] += 1
+    second = contexts.ask("press-1", "show alerts")
+    assert second == {"response": "Current critical alerts: alert 2", "context_version": 2}
+    assert contexts.metrics() == {"contexts": 1, "builds": 2, "hits": 2}
+
+
+def test_answers_are_memoized_per_intent(clock, contexts, monkeypatch):
+    calls = []
+
+    def counting_oee_answer(kpis):
+        calls.append(kpis)
+        return f"Current OEE: {kpis['oee'] * 100:.2f}%"
+
+    monkeypatch.setattr(assistant, "oee_answer", counting_oee_answer)
+    context = contexts.get("press-1")
+    assert context.answer("what is the OEE?") == "Current OEE: 10.00%"
+    assert context.answer("OEE now") == "Current OEE: 10.00%"
+    assert context.answer("scrap trend") == "trend 1"
+    assert context.answer("which sop applies") == "sop 1"
+    assert len(calls) == 1
+    assert contexts.get("press-1") is context
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_index import PROCESS_PARAMS, BatchIndex
+
+ASSETS = ("press-1", "press-2", "press-3")
+PARTS = {"CR-4410": "22MnB5", "CR-5120": "22MnB5", "CR-7300": "HC420LA"}
+
+
+def batches(n, seed, start=0.0):
+    rng = np.random.default_rng(seed)
+    parts = rng.choice(list(PARTS), n)
+    frame = pd.DataFrame({
+        "asset_id": rng.choice(ASSETS, n),
+        "ts": start + np.arange(n) * 60.0,
+        "part_number": parts,
+        "alloy": [PARTS[p] for p in parts],
+        "oee": rng.uniform(40, 95, n),
+        **{p: rng.normal(100 + 10 * i, 5 + i, n) for i, p in enumerate(PROCESS_PARAMS)},
+    })
+    frame.loc[rng.random(n) < 0.02, "oee"] = np.nan
+    frame.loc[rng.random(n) < 0.02, "die_temp"] = np.nan
+    return frame
+
+
+def brute_top_k(frame, k, since=None, until=None, **filters):
+    mask = frame["oee"].notna()
+    for label, value in filters.items():
+        mask &= frame[label] == value
+    if since is not None:
+        mask &= frame["ts"] >= since
+    if until is not None:
+        mask &= frame["ts"] < until
+    return frame[mask].sort_values("oee", ascending=False, kind="stable")["ts"].head(k).tolist()
+
+
+@pytest.mark.parametrize("filters", [{}, {"asset_id": "press-2"}, {"part_number": "CR-4410"},
+                                     {"asset_id": "press-1", "alloy": "22MnB5"},
+                                     {"asset_id": "press-3", "part_number": "CR-7300", "alloy": "HC420LA"}])
+def test_top_k_matches_brute_force(filters):
+    index = BatchIndex(block_size=64)
+    first, second = batches(3000, seed=1), batches(1000, seed=2, start=3000 * 60.0)
+    index.add_frame(first)
+    for k, window in ((5, (None, None)), (20, (30_000.0, 120_000.0)), (1, (100_000.0, None))):
+        got = [r["ts"] for r in index.top_k(k, since=window[0], until=window[1], **filters)]
+        assert got == brute_top_k(first, k, *window, **filters)
+    # Batches appended after a query are picked up by the same partitions
+    index.add_frame(second)
+    both = pd.concat([first, second], ignore_index=True)
+    got = [r["ts"] for r in index.top_k(10, since=150_000.0, **filters)]
+    assert got == brute_top_k(both, 10, since=150_000.0, **filters)
+
+
+def test_top_k_unknown_label():
+    index = BatchIndex()
+    index.add_frame(batches(100, seed=0))
+    assert index.top_k(5, part_number="XX-0000") == []
+
+
+def test_nearest_matches_brute_force():
+    index = BatchIndex(min_rebuild=1024)   # no background rebuild during the test
+    first, second = batches(3000, seed=3), batches(300, seed=4, start=3000 * 60.0)
+    index.add_frame(first)
+    index.build()
+    index.add_frame(second)   # searched by brute force next to the tree
+
+    x = first[list(PROCESS_PARAMS)].to_numpy()
+    center, scale = np.nanmean(x, axis=0), np.nanstd(x, axis=0)
+    both = pd.concat([first, second], ignore_index=True)
+    scaled = np.nan_to_num((both[list(PROCESS_PARAMS)].to_numpy() - center) / scale)
+    query = {"furnace_temp": 104.0, "cycle_time": 108.0, "die_temp": 118.0}
+    q = (np.array([query.get(p, np.nan) for p in PROCESS_PARAMS]) - center) / scale
+    q = np.nan_to_num(q)   # missing parameters sit at the mean
+    dist = np.sqrt(((scaled - q) ** 2).sum(axis=1))
+    for filters in ({}, {"asset_id": "press-2", "part_number": "CR-5120"}):
+        mask = np.ones(len(both), dtype=bool)
+        for label, value in filters.items():
+            mask &= (both[label] == value).to_numpy()
+        rows = np.flatnonzero(mask)[np.argsort(dist[mask], kind="stable")[:8]]
+        got = index.nearest(query, k=8, **filters)
+        assert [r["ts"] for r in got] == both["ts"].to_numpy()[rows].tolist()
+        np.testing.assert_allclose([r["distance"] for r in got], dist[rows])
+
+
+def test_latest_per_asset():
+    index = BatchIndex()
+    frame = batches(500, seed=5)
+    index.add_frame(frame)
+    for asset in ASSETS:
+        newest = frame[frame["asset_id"] == asset].iloc[-1]
+        latest = index.latest(asset)
+        assert (latest["ts"], latest["part_number"]) == (newest["ts"], newest["part_number"])
+    assert index.latest("press-9") is None
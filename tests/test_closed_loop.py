@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from setpoint_optimizer import SetpointOptimizer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from replay_closed_loop import (  # noqa: E402
+    plant_reading, replay, rule_controller, synthetic_history, true_objective
+)
+
+START = (1160.0, 3.6)
+
+
+@pytest.fixture
+def optimizer():
+    return SetpointOptimizer(budget_s=0.05)
+
+
+def test_closed_loop_replay_meets_constraints_and_improves(optimizer):
+    rng = np.random.default_rng(0)
+    history = synthetic_history(200, rng)
+    decisions = replay(optimizer, plant_reading(*START, rng, ts=200.0), history=history, closed_loop=200, rng=rng)
+
+    assert len(decisions) == 200
+    assert (decisions["violations"] == "").all(), decisions.loc[decisions["violations"] != "", "violations"]
+    final = decisions.iloc[-1][["furnace_temp_setpoint", "cycle_time_setpoint"]].to_numpy(dtype=float)
+    reached = true_objective(optimizer, *final)[0]
+    grid_t, grid_c = np.meshgrid(np.linspace(1150, 1250, 201), np.linspace(1.0, 4.0, 121))
+    optimum = true_objective(optimizer, grid_t.ravel(), grid_c.ravel()).min()
+    assert reached < true_objective(optimizer, *START)[0]
+    assert reached < true_objective(optimizer, *rule_controller(200, START, rng))[0]
+    assert reached <= optimum + 0.05 * abs(optimum)
+
+
+def test_open_loop_replay_meets_constraints(optimizer):
+    readings = synthetic_history(300, np.random.default_rng(1))
+    decisions = replay(optimizer, readings)
+    assert len(decisions) > 250
+    assert (decisions["violations"] == "").all()
+
+
+def test_failed_fit_is_not_retried_before_refit_s(optimizer):
+    rng = np.random.default_rng(2)
+    with pytest.raises(ValueError):
+        optimizer.fit("furnace-1", synthetic_history(5, rng))
+    assert not optimizer.needs_fit("furnace-1")
+    assert optimizer.needs_fit("furnace-1", now=time.time() + optimizer.refit_s)
+
+    optimizer.fit("furnace-1", synthetic_history(100, rng))
+    assert not optimizer.needs_fit("furnace-1")
+    assert optimizer.model("furnace-1") is not None
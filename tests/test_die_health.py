@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from die_health import DieHealthEngine
+
+B0, B1 = 1e-4, 5e-5    # wear per cycle at t_ref, and per t_scale degrees above it
+CYCLES = 100.0
+# Noise settings matching wear_path: a constant wear law read with a 0.01 standard deviation
+ENGINE = {"obs_noise": 1e-4, "wear_noise": 1e-8, "rate_noise": 1e-14}
+
+
+def wear_path(n, seed, temps=None):
+    """Observed wear of a die worn at B0 + B1 * (temp - 300) / 100 per cycle, and the true final wear."""
+    rng = np.random.default_rng(seed)
+    temps = np.full(n, 300.0) if temps is None else temps
+    rate = B0 + B1 * (temps - 300.0) / 100.0
+    true = np.concatenate([[0.0], np.cumsum(CYCLES * rate[1:])])
+    return true + rng.normal(0, 0.01, n), temps, true
+
+
+def test_rul_at_constant_temperature():
+    engine = DieHealthEngine(**ENGINE)
+    observed, temps, true = wear_path(60, seed=0)
+    for w, t in zip(observed, temps):
+        engine.update(["die-1"], [w], [t], [CYCLES])
+    est = engine.estimate("die-1")
+    assert est["wear"] == pytest.approx(true[-1], abs=3 * est["wear_std"])
+    assert est["wear_per_cycle"] == pytest.approx(B0, rel=0.05)
+    assert est["rul_cycles"] == pytest.approx((1.0 - true[-1]) / B0, rel=0.1)
+    assert est["rul_cycles_p05"] < est["rul_cycles"]
+
+
+def test_rul_follows_die_temperature():
+    engine = DieHealthEngine(**ENGINE)
+    rng = np.random.default_rng(1)
+    temps = np.where(np.arange(80) % 2 == 0, 250.0, 350.0) + rng.normal(0, 5, 80)
+    observed, temps, true = wear_path(80, seed=1, temps=temps)
+    for w, t in zip(observed, temps):
+        engine.update(["die-1"], [w], [t], [CYCLES])
+    rate = B0 + B1 * (temps[-1] - 300.0) / 100.0
+    assert engine.estimate("die-1")["rul_cycles"] == pytest.approx((1.0 - true[-1]) / rate, rel=0.1)
+
+
+def test_die_change_restarts_the_filter():
+    engine = DieHealthEngine(**ENGINE)
+    observed, temps, _ = wear_path(60, seed=2)
+    for w in observed:
+        engine.update(["die-1"], [w], [300.0], [CYCLES])
+    engine.update(["die-1"], [0.01], [300.0], [CYCLES])
+    est = engine.estimate("die-1")
+    assert est["replacements"] == 1 and est["wear"] == pytest.approx(0.01)
+
+
+def test_update_frame_matches_sequential_updates():
+    frames = []
+    for i, seed in enumerate((3, 4, 5)):
+        observed, temps, _ = wear_path(30, seed=seed)
+        frames.append(pd.DataFrame({"die_id": f"die-{i}", "ts": np.arange(30) * 60.0 + i,
+                                    "die_wear_rate": observed, "die_temp": temps, "cycles": CYCLES}))
+    readings = pd.concat(frames).sample(frac=1, random_state=0)   # interleaved, out of order
+
+    batched, sequential = DieHealthEngine(), DieHealthEngine()
+    batched.update_frame(readings, key="die_id")
+    for row in readings.sort_values("ts").to_dict("records"):
+        sequential.update_one(row["die_id"], row)
+    pd.testing.assert_frame_equal(batched.estimates().sort_index(), sequential.estimates().sort_index())
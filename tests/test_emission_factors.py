@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from emission_factors import EmissionFactorRegistry
+
+JAN_1_2024 = 1704067200.0
+
+
+@pytest.fixture
+def registry():
+    return EmissionFactorRegistry.from_dict({"versions": {"v1": {"factors": {
+        "power_usage": 0.8, "gas_consumption": 2.0, "water_usage": 0.3, "material_input": 1.5}}}})
+
+
+def test_series_csv_with_iso_timestamps(registry, tmp_path):
+    path = tmp_path / "grid.csv"
+    path.write_text("ts,factor\n"
+                    "2024-01-01T00:00:00Z,0.5\n"
+                    "2024-01-01T01:00:00+01:00,0.6\n"   # the same hour in another zone: a duplicate stamp
+                    "2024-01-01T02:00:00,0.4\n")         # naive: UTC
+    registry.load_series_csv("power_usage", str(path))
+    stamps, values = registry.get().series["power_usage"]
+    np.testing.assert_array_equal(stamps, [JAN_1_2024, JAN_1_2024, JAN_1_2024 + 7200])
+    assert registry.factor("power_usage", ts=JAN_1_2024 + 7200 + 1) == 0.4
+    assert registry.factor("power_usage", ts=JAN_1_2024 - 1) == 0.8
+
+
+def test_series_csv_with_unix_seconds(registry, tmp_path):
+    path = tmp_path / "grid.csv"
+    path.write_text(f"ts,factor\n{JAN_1_2024 + 3600:.0f},0.6\n{JAN_1_2024:.0f},0.5\n")
+    registry.load_series_csv("power_usage", str(path))
+    np.testing.assert_array_equal(registry.factor("power_usage", ts=[JAN_1_2024 + 10, JAN_1_2024 + 3600]),
+                                  [0.5, 0.6])
+
+
+def test_series_lookup_matches_brute_force(registry):
+    rng = np.random.default_rng(0)
+    stamps = np.sort(rng.choice(np.arange(1000) * 900.0, 200, replace=False)) + JAN_1_2024
+    values = rng.uniform(0.2, 0.9, len(stamps))
+    shuffled = rng.permutation(len(stamps))   # set_series sorts the profile
+    registry.set_series("power_usage", stamps[shuffled], values[shuffled])
+    queries = np.concatenate([JAN_1_2024 + rng.uniform(-3600, 1000 * 900, 500), stamps[:10], [np.nan]])
+
+    expected = []
+    for t in queries:
+        before = np.flatnonzero(stamps <= t)
+        expected.append(values[before[-1]] if len(before) else 0.8)
+    np.testing.assert_array_equal(registry.factor("power_usage", ts=queries), expected)
+    assert registry.factor("power_usage", ts=float(stamps[3])) == values[3]
+    np.testing.assert_array_equal(registry.factors(ts=queries)["gas_consumption"], np.full(len(queries), 2.0))
+
+
+def test_versions_inherit_and_stay_addressable(registry):
+    registry.set_series("power_usage", [JAN_1_2024], [0.5])
+    registry.add_version("v2", {"gas_consumption": 1.8}, source="2025 update")
+    assert registry.active == "v1"
+    registry.add_version("v3", {"water_usage": 0.25}, base="v2", activate=True)
+
+    assert registry.get().version == "v3"
+    assert registry.factors() == {"gas_consumption": 1.8, "power_usage": 0.8, "water_usage": 0.25,
+                                  "material_input": 1.5}
+    assert registry.factor("gas_consumption", version="v1") == 2.0
+    assert registry.factor("power_usage", ts=JAN_1_2024, version="v3") == 0.5  # series inherited
+    with pytest.raises(KeyError):
+        registry.get("v9")
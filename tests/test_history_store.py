@@ -0,0 +1,81 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from history_store import HistoryStore
+from models import LABEL_FIELDS, READING_FIELDS
+from sample_data import SyntheticPlant
+
+START = 1704067200.0
+
+
+def test_labels_round_trip():
+    store = HistoryStore()
+    frame = SyntheticPlant(["press-1", "press-2"], start_ts=START).chunk(120)
+    store.append_frame(frame)
+    store.append("press-3", {"furnace_temp": 1200.0, "part_number": "CR-7300", "alloy": "HC420LA"}, ts=START)
+
+    got = store.window_frame("press-1", START, columns=["furnace_temp", *LABEL_FIELDS])
+    expected = frame[frame["asset_id"] == "press-1"]
+    assert got["part_number"].tolist() == expected["part_number"].astype(str).tolist()
+    assert got["alloy"].tolist() == expected["alloy"].astype(str).tolist()
+    assert store.window_frame("press-3", START, columns=list(LABEL_FIELDS)).iloc[0].tolist() == [
+        START, "CR-7300", "HC420LA"]
+
+
+def test_store_without_label_columns_is_migrated(tmp_path):
+    path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(path)
+    # The readings table as it was before labels were stored
+    fields = ", ".join(f'"{f}" REAL' for f in READING_FIELDS)
+    conn.execute(f"CREATE TABLE readings (asset_id TEXT NOT NULL, ts REAL NOT NULL, {fields})")
+    conn.execute('INSERT INTO readings (asset_id, ts, "furnace_temp") VALUES (?, ?, ?)', ("press-1", START, 1200.0))
+    conn.commit()
+    conn.close()
+
+    store = HistoryStore(path)
+    store.append("press-1", {"furnace_temp": 1210.0, "part_number": "CR-4410"}, ts=START + 60)
+    got = store.window_frame("press-1", START, columns=["furnace_temp", "part_number"])
+    assert got["furnace_temp"].tolist() == [1200.0, 1210.0]
+    assert pd.isna(got["part_number"].iloc[0]) and got["part_number"].iloc[1] == "CR-4410"
+
+
+def test_late_readings_merge_into_their_compacted_bucket():
+    store = HistoryStore(downsample_after_s=86400)
+    store.append_batch("press-1", [{"furnace_temp": 1200.0}, {"furnace_temp": 1210.0}], [START, START + 60])
+    store.compact(now=START + 2 * 86400)
+    store.append_batch("press-1", [{"furnace_temp": 1240.0, "power_usage": 90.0}, {"furnace_temp": 1250.0}],
+                       [START + 120, START + 180])
+    store.compact(now=START + 2 * 86400)
+
+    got = store.downsampled_frame("press-1", START, columns=["furnace_temp", "power_usage"], counts=True)
+    assert got[["ts", "n"]].values.tolist() == [[START, 4]]
+    assert got["furnace_temp"].iloc[0] == pytest.approx((1200.0 + 1210.0 + 1240.0 + 1250.0) / 4)
+    # Only the late readings had power
+    assert got["power_usage"].iloc[0] == 90.0
+
+
+def test_duplicate_buckets_are_merged_when_opened(tmp_path):
+    path = str(tmp_path / "history.db")
+    HistoryStore(path).close()
+    conn = sqlite3.connect(path)
+    # As an older version left them: two rows for one bucket, no unique index
+    conn.execute("DROP INDEX readings_downsampled_bucket")
+    conn.executemany('INSERT INTO readings_downsampled (asset_id, ts, bucket_s, n, "furnace_temp") '
+                     'VALUES (?, ?, ?, ?, ?)',
+                     [("press-1", START, 3600, 3, 1200.0), ("press-1", START, 3600, 1, 1240.0)])
+    conn.commit()
+    conn.close()
+
+    got = HistoryStore(path).downsampled_frame("press-1", START, columns=["furnace_temp"], counts=True)
+    assert got.values.tolist() == [[START, 4, 1210.0]]
+
+
+def test_window_chunks_cover_the_window_once():
+    store = HistoryStore()
+    # Equal timestamps straddle chunk boundaries
+    store.append_batch("press-1", [{"furnace_temp": float(i)} for i in range(25)], [START + i // 3 for i in range(25)])
+    chunks = list(store.window_chunks("press-1", START, columns=["furnace_temp"], chunk_rows=4))
+    assert [len(c) for c in chunks] == [4] * 6 + [1]
+    assert sorted(pd.concat(chunks)["furnace_temp"].tolist()) == [float(i) for i in range(25)]
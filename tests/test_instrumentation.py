@@ -0,0 +1,64 @@
+import re
+
+from instrumentation import LATENCY_BUCKETS, Metrics
+
+
+def series(text, name):
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines() if line.startswith(name + "{") or line.startswith(name + "_")}
+
+
+def test_render_exposes_cumulative_histograms():
+    metrics = Metrics()
+    metrics.observe_request("GET", "/kpis", 200, 0.003, 0, 1500)
+    metrics.observe_request("GET", "/kpis", 200, 0.2, 0, 900)
+    metrics.observe_request("GET", "/kpis", 404, 50.0, 10, 20)
+    text = metrics.render()
+
+    assert "# HELP dt_http_requests_total Completed HTTP requests." in text
+    assert "# TYPE dt_http_requests_total counter" in text
+    assert "# TYPE dt_http_request_duration_seconds histogram" in text
+    assert 'dt_http_requests_total{method="GET",route="/kpis",status="200"} 2' in text
+    assert 'dt_http_requests_total{method="GET",route="/kpis",status="404"} 1' in text
+
+    duration = series(text, "dt_http_request_duration_seconds")
+    labels = 'method="GET",route="/kpis"'
+    buckets = [duration[f'dt_http_request_duration_seconds_bucket{{{labels},le="{b}"}}']
+               for b in (*LATENCY_BUCKETS, "+Inf")]
+    assert buckets == sorted(buckets)
+    assert duration[f'dt_http_request_duration_seconds_bucket{{{labels},le="0.0025"}}'] == 0
+    assert duration[f'dt_http_request_duration_seconds_bucket{{{labels},le="0.005"}}'] == 1
+    assert duration[f'dt_http_request_duration_seconds_bucket{{{labels},le="0.25"}}'] == 2
+    assert duration[f'dt_http_request_duration_seconds_bucket{{{labels},le="30.0"}}'] == 2
+    assert duration[f'dt_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 3
+    assert duration[f"dt_http_request_duration_seconds_count{{{labels}}}"] == 3
+    assert abs(duration[f"dt_http_request_duration_seconds_sum{{{labels}}}"] - 50.203) < 1e-9
+
+    sizes = series(text, "dt_http_response_size_bytes")
+    assert sizes[f'dt_http_response_size_bytes_bucket{{{labels},le="1000"}}'] == 2
+    assert sizes[f"dt_http_response_size_bytes_sum{{{labels}}}"] == 2420
+
+
+def test_stages_and_disabled_metrics():
+    metrics = Metrics(prefix="x")
+
+    @metrics.timed("fit")
+    def fit():
+        with metrics.stage("inner"):
+            return 1
+
+    fit()
+    fit()
+    text = metrics.render()
+    assert 'x_stage_duration_seconds_count{stage="fit"} 2' in text
+    assert 'x_stage_duration_seconds_count{stage="inner"} 2' in text
+    assert metrics.stage_summary()["fit"]["count"] == 2
+    # Every sample line is "name{labels} value"
+    for line in text.splitlines():
+        assert line.startswith("# ") or re.fullmatch(r"x_\w+\{[^}]*\} \S+", line)
+
+    off = Metrics(enabled=False)
+    off.timed("fit")(lambda: None)()
+    with off.stage("inner"):
+        pass
+    assert off.stage_summary() == {}
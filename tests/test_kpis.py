@@ -0,0 +1,36 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kpis_and_analytics import ingest_kpis, ingest_kpis_batch
+from sample_data import generate_sample_data
+
+
+@pytest.fixture
+def records():
+    random.seed(0)
+    return [generate_sample_data() for _ in range(500)]
+
+
+@pytest.mark.parametrize("kpi", ["oee", "scrap_rate", "electricity_per_unit", "furnace_thermal_efficiency"])
+def test_batch_matches_scalar(records, kpi):
+    batch = ingest_kpis_batch(pd.json_normalize(records))
+    expected = [ingest_kpis(r)[kpi] for r in records]
+    np.testing.assert_allclose(batch[kpi].to_numpy(), expected, rtol=1e-12)
+
+
+def test_batch_ghg_matches_scalar(records):
+    batch = ingest_kpis_batch(pd.json_normalize(records))
+    for scope in ("scope_1", "scope_2", "total_ghg"):
+        expected = [ingest_kpis(r)["ghg_scope_1_2"][scope] for r in records]
+        np.testing.assert_allclose(batch[f"ghg_{scope}"].to_numpy(), expected, rtol=1e-12)
+
+
+def test_batch_keeps_row_order_and_length(records):
+    frame = pd.json_normalize(records)
+    reversed_ = ingest_kpis_batch(frame.iloc[::-1].reset_index(drop=True))
+    forward = ingest_kpis_batch(frame)
+    assert len(forward) == len(records)
+    np.testing.assert_allclose(reversed_["oee"].to_numpy()[::-1], forward["oee"].to_numpy())
@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+import plant_analytics as pa
+from models import AssetRegistry
+from sample_data import generate_sample_data
+
+
+@pytest.fixture
+def site():
+    registry = AssetRegistry.synthetic(plants=2)
+    random.seed(0)
+    return registry, {asset_id: generate_sample_data() for asset_id in registry.presses}
+
+
+def test_thread_mode_matches_vectorized_and_reuses_its_pool(site):
+    registry, readings = site
+    vectorized = pa.plant_analytics(readings, registry)
+    first = pa.plant_analytics(readings, registry, mode="thread", workers=4)
+    pool = pa._pools["thread"]
+    second = pa.plant_analytics(readings, registry, mode="thread", workers=2)
+    assert pa._pools["thread"] is pool
+    for result in (first, second):
+        assert result["assets"].keys() == vectorized["assets"].keys()
+        for asset_id, summary in vectorized["assets"].items():
+            assert result["assets"][asset_id] == pytest.approx(summary)
+        for plant_id, totals in vectorized["plants"].items():
+            assert result["plants"][plant_id] == pytest.approx(totals)
+    pa.shutdown_pools()
+    assert not pa._pools
@@ -0,0 +1,103 @@
+import threading
+import time
+
+from result_cache import ResultCache
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_late_caller_waits_for_the_running_computation():
+    cache = ResultCache()
+    key = ("full-analytics", "press-1")
+    started, release = [], [threading.Event(), threading.Event()]
+
+    def compute():
+        started.append(len(started))
+        release[len(started) - 1].wait(5.0)
+        return {"computation": len(started)}
+
+    results = {}
+
+    def call(name):
+        results[name] = cache.get_or_compute(key, "press-1", compute)
+
+    def callers():
+        return cache._inflight[key][1] if key in cache._inflight else 0
+
+    first = threading.Thread(target=call, args=("first",))
+    first.start()
+    wait_until(lambda: len(started) == 1)
+    waiter = threading.Thread(target=call, args=("waiter",))
+    waiter.start()
+    wait_until(lambda: callers() == 2)
+    # New data while the first computation runs: the waiter must recompute
+    cache.invalidate("press-1")
+    release[0].set()
+    first.join()
+    wait_until(lambda: len(started) == 2)
+    late = threading.Thread(target=call, args=("late",))
+    late.start()
+    wait_until(lambda: callers() == 2)
+    release[1].set()
+    waiter.join()
+    late.join()
+
+    assert len(started) == 2
+    assert results["late"] == results["waiter"]
+    assert not cache._inflight
+
+
+def test_invalidate_and_ttl_turn_hits_into_misses():
+    cache = ResultCache(ttl_s=60.0)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"calls": len(calls)}
+
+    first = cache.get_or_compute("k", "press-1", compute)
+    assert cache.get_or_compute("k", "press-1", compute) is first
+    # Another asset's new data leaves this entry alone
+    cache.invalidate("press-2")
+    assert cache.get_or_compute("k", "press-1", compute) is first
+    cache.invalidate("press-1")
+    second = cache.get_or_compute("k", "press-1", compute)
+    assert second.etag != first.etag
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    cache.ttl_s = 0.0
+    cache.get_or_compute("k2", "press-1", compute)
+    cache.get_or_compute("k2", "press-1", compute)
+    assert len(calls) == 4
+
+
+def test_full_analytics_etag_and_not_modified():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    client = TestClient(main.app)
+    first = client.get("/full-analytics", params={"asset_id": "press-etag"})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    misses = main.cache.misses
+    again = client.get("/full-analytics", params={"asset_id": "press-etag"},
+                       headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+    assert main.cache.misses == misses
+
+    main.cache.invalidate("press-etag")
+    fresh = client.get("/full-analytics", params={"asset_id": "press-etag"},
+                       headers={"If-None-Match": '"other"'})
+    assert fresh.status_code == 200
+    assert fresh.json() == first.json()
+    assert main.cache.misses == misses + 1
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ghg_projection import PERIODS, emissions_report
+from rollups import EMISSIONS, RESOURCES, RollupStore
+
+START = 1704067200.0  # 2024-01-01T00:00:00Z
+PLANT = {"press-1": "plant-1", "press-2": "plant-1", "press-3": None}
+
+
+@pytest.fixture
+def readings():
+    rng = np.random.default_rng(0)
+    n, assets = 6000, list(PLANT)
+    # Three assets over ~2 months, so hours, days and months all have several buckets
+    return pd.DataFrame({
+        "asset_id": np.tile(assets, n // len(assets)),
+        "ts": START + np.repeat(np.arange(n // len(assets)), len(assets)) * 3000.0 + rng.uniform(0, 60, n),
+        **{r: rng.uniform(1, 100, n) for r in RESOURCES},   # per hour
+        "interval_s": 3000.0,
+    })
+
+
+def expected(readings, period, assets):
+    # Brute force: emissions_report and a plain groupby over the usage of every reading of the assets
+    frame = readings[readings["asset_id"].isin(assets)].copy()
+    frame[list(RESOURCES)] = frame[list(RESOURCES)].mul(frame["interval_s"] / 3600.0, axis=0)
+    periods = (frame["ts"].to_numpy() * 1e3).astype("datetime64[ms]").astype(f"datetime64[{PERIODS[period]}]")
+    return emissions_report(frame, period=period), frame[list(RESOURCES)].groupby(periods).sum()
+
+
+@pytest.mark.parametrize("period", ["hour", "day", "month"])
+def test_late_and_out_of_order_chunks_match_recomputation(readings, period):
+    store = RollupStore(group_of=PLANT.get)
+    chunks = np.array_split(np.arange(len(readings)), 60)
+    rng = np.random.default_rng(1)
+    late = set(rng.choice(len(chunks), 10, replace=False).tolist())
+    for i in [i for i in range(len(chunks)) if i not in late] + sorted(late, reverse=True):
+        store.add_frame(readings.iloc[chunks[i]])
+    # Single readings land in already closed buckets too
+    extra = readings.sample(20, random_state=2).assign(ts=lambda f: f["ts"] - 86400 * 3)
+    for row in extra.to_dict("records"):
+        store.add(row["asset_id"], row, row["ts"])
+    everything = pd.concat([readings, extra], ignore_index=True)
+
+    for scope, key, assets in (("asset", "press-1", ["press-1"]), ("asset", "press-3", ["press-3"]),
+                               ("plant", "plant-1", ["press-1", "press-2"])):
+        got = store.scorecard(key, scope=scope, period=period)
+        report, usage = expected(everything, period, assets)
+        assert got.index.equals(report.index)
+        np.testing.assert_array_equal(got["intervals"], report["intervals"])
+        np.testing.assert_allclose(got[list(EMISSIONS)], report[list(EMISSIONS)], rtol=1e-9)
+        np.testing.assert_allclose(got[list(RESOURCES)], usage, rtol=1e-9)
+
+
+def test_scorecard_range(readings):
+    store = RollupStore()
+    store.add_frame(readings)
+    days = store.scorecard("press-1", period="day", start=START + 86400 * 10 + 5, end=START + 86400 * 20)
+    assert days.index[0] == pd.Timestamp("2024-01-11") and days.index[-1] == pd.Timestamp("2024-01-20")
+    assert store.scorecard("press-9", period="day").empty
+
+
+@pytest.mark.parametrize("interval_s", [1.0, 60.0, 600.0])
+def test_totals_do_not_depend_on_the_sampling_rate(interval_s):
+    # Three hours at a constant 120 kWh/h, sampled at different rates and sent in chunks
+    ts = START + np.arange(0, 3 * 3600, interval_s)
+    frame = pd.DataFrame({"asset_id": "press-1", "ts": ts, "power_usage": 120.0})
+    store = RollupStore(default_interval_s=interval_s)
+    for chunk in np.array_split(np.arange(len(frame)), 7):
+        store.add_frame(frame.iloc[chunk])
+    hours = store.scorecard("press-1", period="hour")
+    np.testing.assert_allclose(hours["power_usage"], 120.0)
+    assert store.scorecard("press-1", period="day")["power_usage"].iloc[0] == pytest.approx(360.0)
+
+
+def test_gaps_are_not_filled_beyond_max_interval():
+    store = RollupStore(max_interval_s=600.0)
+    store.add_frame(pd.DataFrame({"asset_id": "press-1", "ts": [START, START + 60], "power_usage": 60.0}))
+    store.add("press-1", {"power_usage": 60.0}, START + 5 * 3600)   # after a five hour outage
+    assert store.scorecard("press-1", period="day")["power_usage"].iloc[0] == pytest.approx(1 + 1 + 10)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scenario_sweep import latin_hypercube_scenarios, pareto_front
+
+
+def dominated(costs, i):
+    others = np.delete(costs, i, axis=0)
+    return bool(np.any(np.all(others <= costs[i], axis=1) & np.any(others < costs[i], axis=1)))
+
+
+def test_pareto_front_is_exactly_the_non_dominated_rows():
+    rng = np.random.default_rng(0)
+    results = pd.DataFrame({"ghg_total_ghg": rng.random(300), "furnace_thermal_efficiency": rng.random(300)})
+    mask = pareto_front(results)
+    costs = np.column_stack([results["ghg_total_ghg"], -results["furnace_thermal_efficiency"]])
+    assert mask.tolist() == [not dominated(costs, i) for i in range(len(costs))]
+
+
+def test_pareto_front_keeps_ties_and_drops_dominated():
+    results = pd.DataFrame({"a": [1.0, 1.0, 2.0, 0.5, 3.0], "b": [1.0, 1.0, 0.5, 3.0, 3.0]})
+    mask = pareto_front(results, {"a": "min", "b": "min"})
+    assert mask.tolist() == [True, True, True, True, False]
+
+
+def test_latin_hypercube_puts_one_sample_per_stratum():
+    scenarios = latin_hypercube_scenarios({"x": (10.0, 20.0), "y": (0.0, 1.0)}, 50, seed=3)
+    for name, (lo, hi) in {"x": (10.0, 20.0), "y": (0.0, 1.0)}.items():
+        strata = np.floor((scenarios[name] - lo) / (hi - lo) * 50).astype(int)
+        assert sorted(strata) == list(range(50))
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("body", [
+    {"method": "random"},
+    {"bounds": {"cycle_time": [1, 2]}},
+    {"bounds": {"gas_consumption": [5, 1]}},
+    {"bounds": {"gas_consumption": ["nan", 1]}},
+    {"bounds": {"gas_consumption": 3}},
+    {"objectives": {"oee": "up"}},
+    {"objectives": {"not_a_kpi": "min"}},
+    {"samples": 0},
+    {"method": "grid", "steps": 1},
+    {"samples": "many"},
+    {"processes": 0},
+])
+def test_sweep_rejects_bad_requests(client, body):
+    assert client.post("/scenario-sweep", json=body).status_code == 422
+
+
+def test_sweep_rejects_oversized_grid(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "SWEEP_MAX_SCENARIOS", 100)
+    assert client.post("/scenario-sweep", json={"method": "grid", "steps": 5}).status_code == 422
+    assert client.post("/scenario-sweep", json={"samples": 101}).status_code == 422
+
+
+def test_sweep_returns_the_pareto_front(client):
+    body = {"asset_id": "press-sweep", "samples": 200, "seed": 1, "include_results": True,
+            "bounds": {"gas_consumption": [10, 30], "furnace_temp": [1100, 1300]},
+            "objectives": {"ghg_total_ghg": "min", "furnace_thermal_efficiency": "max"}}
+    got = client.post("/scenario-sweep", json=body)
+    assert got.status_code == 200
+    got = got.json()
+    assert got["n_scenarios"] == 200
+    assert got["bounds"] == {"gas_consumption": [10, 30], "furnace_temp": [1100, 1300]}
+    results = pd.DataFrame(got["results"])
+    front = pd.DataFrame(got["pareto_front"])
+    assert results["scenario.gas_consumption"].between(10, 30).all()
+    expected = results[pareto_front(results, body["objectives"])]
+    pd.testing.assert_frame_equal(front, expected.reset_index(drop=True))
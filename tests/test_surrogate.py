@@ -0,0 +1,44 @@
+import random
+
+import pandas as pd
+import pytest
+
+import ml.surrogate as surrogate
+from ml.optimizer import (
+    recommend_optimizations, recommend_reading, simulate_optimized_reading, simulate_optimized_usage
+)
+from ml.surrogate import ResourceSurrogate, get_surrogate
+from sample_data import generate_sample_data
+
+
+@pytest.fixture(scope="module")
+def records():
+    random.seed(0)
+    return [generate_sample_data() for _ in range(200)]
+
+
+def test_newest_version_is_followed_without_listing_the_directory(records, tmp_path, monkeypatch):
+    model_dir = str(tmp_path)
+    model = ResourceSurrogate(max_iter=5).fit(pd.json_normalize(records))
+    model.save(model_dir, version="20240101T000000000")
+    assert get_surrogate(model_dir).metadata["version"] == "20240101T000000000"
+
+    def listing(model_dir):
+        raise AssertionError("model directory listed again")
+
+    monkeypatch.setattr(surrogate, "model_versions", listing)
+    model.save(model_dir, version="20240102T000000000")
+    assert get_surrogate(model_dir).metadata["version"] == "20240102T000000000"
+    assert get_surrogate(model_dir) is get_surrogate(model_dir)
+
+
+def test_per_reading_functions_keep_their_shapes(records):
+    data = {**records[0], "power_usage": 150.0, "gas_consumption": 80.0}
+    legacy = recommend_optimizations(data)
+    assert {tuple(sorted(r)) for r in legacy} == {("action", "expected_savings", "suggested_value")}
+    optimized = simulate_optimized_usage(data, legacy)
+    assert optimized["power_usage"] == 130.0 and optimized["gas_consumption"] == 70.0
+
+    recs = recommend_reading(data)
+    assert {r["resource"] for r in recs} >= {"power_usage", "gas_consumption"}
+    assert simulate_optimized_reading(data, recs)["power_usage"] == 130.0